@@ -4,120 +4,64 @@ Academic Cockpit — Integrated app:
 - Header (Academic Cockpit)
 - Explorer's Guide: Nearby Hub + Navigate Smarter
 - Timetable & Assignments
-- Route lookup via OSRM (fallback to straight-line)
+- Route lookup on the local walkway graph (optional OSRM, fallback to straight-line)
 Drop images into /mnt/data (or edit ASSETS_DIR).
 Run: streamlit run app.py
 """
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 from pathlib import Path
-from haversine import haversine, Unit
-import pydeck as pdk
-import requests
 from datetime import datetime, time
+from utils.geo import haversine_np, distances_from
+from utils.places import load_places_shared, load_places_index
+from utils.routing import WALKWAYS_FILE, WalkGraph, LocalBackend, OSRMBackend, RouteCache, Router
+from utils.walk_matrix import WalkMatrix, load_walk_matrix
+from utils.cache import shared_cache, cached, file_version
+from utils.lazy import lazy_import, warm_up, import_timings
+from utils.timetable import Timetable, fmt_minutes
+
+pdk = lazy_import("pydeck")
 
 # ---------------- Page config & constants ----------------
 st.set_page_config(page_title="Academic Cockpit", layout="wide", initial_sidebar_state="expanded")
+warm_up()  # heavy optional modules load in the background, once per process
 
 ASSETS_DIR = Path("/mnt/data")  # adjust if needed
 
-# ---------- Sample Places of Interest (replace with real data) ----------
-PLACES = [
-    {
-        "id": 1,
-        "name": "Campus Cafe",
-        "category": "Eatery",
-        "lat": 30.9315,
-        "lon": 76.5278,
-        "rating": 4.4,
-        "vibes": ["study-friendly", "budget"],
-        "popularity": 78,
-        "img": "campus_cafe.jpg",
-        "desc": "Cozy cafe, quiet corners, reliable Wi-Fi."
-    },
-    {
-        "id": 2,
-        "name": "Central Library",
-        "category": "Library",
-        "lat": 30.9326,
-        "lon": 76.5267,
-        "rating": 4.8,
-        "vibes": ["quiet", "study-friendly"],
-        "popularity": 95,
-        "img": "library.jpg",
-        "desc": "24/7 study halls, group rooms, printer access."
-    },
-    {
-        "id": 3,
-        "name": "Riverside Park",
-        "category": "Outdoor",
-        "lat": 30.9308,
-        "lon": 76.5250,
-        "rating": 4.2,
-        "vibes": ["outdoor", "date-spot"],
-        "popularity": 66,
-        "img": "park.jpg",
-        "desc": "Open lawn, morning joggers, benches and kiosks."
-    },
-    {
-        "id": 4,
-        "name": "Book Exchange Stall",
-        "category": "Marketplace",
-        "lat": 30.9339,
-        "lon": 76.5284,
-        "rating": 4.0,
-        "vibes": ["budget", "bustle"],
-        "popularity": 60,
-        "img": "book_stall.jpg",
-        "desc": "Affordable second-hand textbooks and notes."
-    },
-    {
-        "id": 5,
-        "name": "Night Canteen",
-        "category": "Eatery",
-        "lat": 30.9346,
-        "lon": 76.5262,
-        "rating": 4.1,
-        "vibes": ["late-night", "cheap"],
-        "popularity": 80,
-        "img": "night_canteen.jpg",
-        "desc": "Open late-night, popular with exam-time crowds."
-    },
-]
-
 # ---------------- Utility functions ----------------
-@st.cache_data
-def load_places_df():
-    """Return DataFrame for POIs (cached)."""
-    return pd.DataFrame(PLACES)
-
 def compute_distance_km(a_latlon, b_latlon):
     """Haversine distance (km). Expect tuples: (lat, lon)."""
-    return haversine(a_latlon, b_latlon, unit=Unit.KILOMETERS)
+    return float(haversine_np([b_latlon[0]], [b_latlon[1]], a_latlon)[0])
 
 def google_maps_url(origin, dest):
     """Return Google Maps directions URL (origin/dest are (lat,lon))."""
     return f"https://www.google.com/maps/dir/{origin[0]},{origin[1]}/{dest[0]},{dest[1]}/"
 
-def osrm_route(origin, dest):
-    """
-    Query OSRM public demo server for a route.
-    origin/dest: (lat, lon)
-    Returns: list of [lon, lat] coordinates or None on failure.
-    Note: production apps should run their own routing instance or use a paid provider.
-    """
-    try:
-        lon1, lat1 = origin[1], origin[0]
-        lon2, lat2 = dest[1], dest[0]
-        url = f"http://router.project-osrm.org/route/v1/driving/{lon1},{lat1};{lon2},{lat2}?overview=full&geometries=geojson"
-        resp = requests.get(url, timeout=6)
-        resp.raise_for_status()
-        data = resp.json()
-        coords = data["routes"][0]["geometry"]["coordinates"]  # list of [lon, lat]
-        return coords
-    except Exception:
-        return None
+# Data and engines live in the process-wide shared cache, keyed on the source
+# file version, so every session (and page) reuses one copy until the file changes.
+@cached()
+def _router(walk_version):
+    graph = WalkGraph.from_file(walk_version[0])
+    router = Router([LocalBackend(graph), OSRMBackend()], cache=RouteCache())
+    # stop the OSRM client's loop thread once this router leaves the cache
+    shared_cache.on_invalidate(_router.cache_key(walk_version),
+                               lambda *_: router.backends["osrm"].client.close())
+    return router
+
+def load_router():
+    """Routing engine: local walkway graph first, OSRM as an optional backend."""
+    return _router(file_version(WALKWAYS_FILE))
+
+def add_walking(df, origin):
+    """Add walk_km / walk_min columns from the walk matrix (NaN off campus)."""
+    walk_km = load_walk_matrix().from_origin(origin, df["id"])
+    if walk_km is None:
+        walk_km = np.full(len(df), np.nan)
+    df["walk_km"] = walk_km
+    df["walk_min"] = WalkMatrix.minutes(walk_km)
+    return df
 
 def straight_line_route(origin, dest, steps=2):
     """Fallback route: simple polyline between origin & dest."""
@@ -138,7 +82,7 @@ Welcome to **Academic Cockpit**:
 ### The Explorer's Guide
 This app contains:
 - **Nearby Hub** — filter & discover campus spots (vibes, radius, trending)
-- **Navigate Smarter** — map + route preview (OSRM or straight-line fallback)
+- **Navigate Smarter** — map + route preview (campus walkways, OSRM or straight-line fallback)
 """)
 
 # ---------------- Sidebar: global controls & nav ----------------
@@ -160,12 +104,12 @@ with st.sidebar.expander("Your location"):
 # ---------------- Home (summary) ----------------
 if menu == "Home":
     st.header("Welcome — Quick dashboard")
-    df_all = load_places_df()
+    df_all = load_places_shared()
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("POIs in dataset", len(df_all))
     with col2:
-        st.metric("Trending spots", sum(1 for p in PLACES if p["popularity"] > 70))
+        st.metric("Trending spots", int((df_all["popularity"] > 70).sum()))
     with col3:
         st.metric("Saved assignments", len(st.session_state.get("assignments", [])))
     st.markdown("Use the sidebar to navigate between Nearby Hub, Navigate Smarter, Timetable, and Assignments.")
@@ -173,35 +117,50 @@ if menu == "Home":
 # ---------------- Nearby Hub ----------------
 elif menu == "Nearby Hub":
     st.header("Nearby Hub — discover study spots & campus places")
-    df = load_places_df()
+    df = load_places_shared()
     user_loc = (user_lat, user_lon)
 
     # Filters
     radius_km = st.slider("Search radius (km)", min_value=0.1, max_value=5.0, value=2.0, step=0.1)
-    vibes_available = sorted({v for p in PLACES for v in p["vibes"]})
+    vibes_available = sorted({v for vs in df["vibes"] for v in vs})
     vibe_filter = st.multiselect("Vibe tags (match any)", options=vibes_available, default=[])
-    sort_by = st.selectbox("Sort by", ["distance", "rating", "popularity"])
+    sort_by = st.selectbox("Sort by", ["distance", "walking time", "rating", "popularity"])
     search_term = st.text_input("Search by name or category")
     trending_only = st.checkbox("Trending only (popularity > 70)")
+    road_distances = st.checkbox("Road distances via OSRM (internet required)")
 
-    # compute distances
-    df["distance_km"] = df.apply(lambda r: compute_distance_km(user_loc, (r["lat"], r["lon"])), axis=1)
+    # radius query on the spatial index (distances only for places in range)
+    idx, dist = load_places_index().query_radius(user_loc, radius_km)
+    df = df.iloc[idx].copy()
+    df["distance_km"] = dist
+    add_walking(df, user_loc)
 
     # apply filters
-    mask = df["distance_km"] <= radius_km
+    mask = pd.Series(True, index=df.index)
     if vibe_filter:
         mask &= df["vibes"].apply(lambda vs: any(v in vs for v in vibe_filter))
     if search_term:
         s = search_term.lower()
-        mask &= df.apply(lambda r: s in r["name"].lower() or s in str(r["category"]).lower(), axis=1)
+        mask &= (df["name"].str.lower().str.contains(s, regex=False)
+                 | df["category"].astype(str).str.lower().str.contains(s, regex=False))
     if trending_only:
         mask &= df["popularity"] > 70
 
     df_filtered = df[mask].copy()
 
+    # one batched OSRM /table call for every place still in the list
+    if road_distances and not df_filtered.empty:
+        road = load_router().backends["osrm"].table(user_loc, df_filtered["lat"], df_filtered["lon"])
+        if road is None:
+            st.warning("OSRM is unreachable — showing straight-line distances only.")
+        else:
+            df_filtered["road_km"], df_filtered["road_min"] = road
+
     # sorting
     if sort_by == "distance":
         df_filtered = df_filtered.sort_values("distance_km")
+    elif sort_by == "walking time":
+        df_filtered = df_filtered.sort_values(["walk_min", "distance_km"])
     elif sort_by == "rating":
         df_filtered = df_filtered.sort_values("rating", ascending=False)
     else:
@@ -224,6 +183,10 @@ elif menu == "Nearby Hub":
             with cols[1]:
                 st.markdown(f"**{place['name']}**  \n"
                             f"{place['category']} • {place['rating']}★  • {place['distance_km']:.2f} km away")
+                if pd.notna(place["walk_min"]):
+                    st.caption(f"Walk: {place['walk_km']:.2f} km • ~{place['walk_min']:.0f} min")
+                if pd.notna(place.get("road_km")):
+                    st.caption(f"By road: {place['road_km']:.2f} km • ~{place['road_min']:.0f} min")
                 st.write(place["desc"])
                 st.write("Vibes: " + ", ".join(place["vibes"]))
                 c1, c2 = st.columns([1, 1])
@@ -237,9 +200,10 @@ elif menu == "Nearby Hub":
 # ---------------- Navigate Smarter ----------------
 elif menu == "Navigate Smarter":
     st.header("Navigate Smarter — map & routing")
-    df = load_places_df()
+    df = load_places_shared()
     user_loc = (user_lat, user_lon)
-    df["distance_km"] = df.apply(lambda r: compute_distance_km(user_loc, (r["lat"], r["lon"])), axis=1)
+    df["distance_km"] = distances_from(df, user_loc)
+    add_walking(df, user_loc)
 
     selected_id = st.session_state.get("selected_place", None)
 
@@ -290,17 +254,21 @@ elif menu == "Navigate Smarter":
         st.write(sel["desc"])
         st.write("Vibes:", ", ".join(sel["vibes"]))
         st.write(f"Distance: **{sel['distance_km']:.2f} km** • Rating: **{sel['rating']}★**")
+        if pd.notna(sel["walk_min"]):
+            st.write(f"Walking ETA: **~{sel['walk_min']:.0f} min** ({sel['walk_km']:.2f} km on campus paths)")
 
-        # Try OSRM first
-        use_osrm = st.checkbox("Use OSRM routing (internet required)", value=True)
-        route_coords = None
-        if use_osrm:
-            route_coords = osrm_route(user_loc, (sel["lat"], sel["lon"]))
-            if route_coords is None:
-                st.warning("OSRM routing failed or is unreachable — showing straight-line fallback.")
+        # Local walkway graph by default; OSRM only when asked for (falling back to local)
+        use_osrm = st.checkbox("Use OSRM routing (internet required)", value=False)
+        route = load_router().route(user_loc, (sel["lat"], sel["lon"]),
+                                    backends=("osrm", "local") if use_osrm else ("local",))
+        if use_osrm and (route is None or route["source"] != "osrm"):
+            st.warning("OSRM routing failed or is unreachable — showing campus walkway route.")
 
-        if route_coords is None:
+        if route is None:
             route_coords = straight_line_route(user_loc, (sel["lat"], sel["lon"]))
+        else:
+            route_coords = route["coords"]
+            st.write(f"Route length: **{route['distance_km']:.2f} km** ({route['source']})")
 
         # PathLayer expects list of coords in [lon, lat] pairs
         path_layer = pdk.Layer(
@@ -324,7 +292,8 @@ elif menu == "Navigate Smarter":
 elif menu == "Timetable":
     st.header("Timetable")
     if "timetable" not in st.session_state:
-        st.session_state["timetable"] = []
+        st.session_state["timetable"] = Timetable()
+    timetable = st.session_state["timetable"]
 
     with st.form("add_slot", clear_on_submit=True):
         cols = st.columns(4)
@@ -332,32 +301,34 @@ elif menu == "Timetable":
         day = cols[1].selectbox("Day", ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat"])
         start = cols[2].time_input("Start", value=time(hour=9, minute=0))
         end = cols[3].time_input("End", value=time(hour=10, minute=0))
+        allow_clash = st.checkbox("Add even if it clashes")
         submitted = st.form_submit_button("Add slot")
     if submitted:
-        st.session_state["timetable"].append({
-            "course": course,
-            "day": day,
-            "start": start.strftime("%H:%M"),
-            "end": end.strftime("%H:%M")
-        })
-        st.success("Timetable slot added.")
+        try:
+            timetable.add(day, start, end, course, allow_clash=allow_clash)
+            st.success("Timetable slot added.")
+        except ValueError as e:  # includes SlotClash, which names the clashing classes
+            st.error(f"Not added: {e}.")
 
     st.subheader("Your timetable")
-    if st.session_state["timetable"]:
-        st.table(pd.DataFrame(st.session_state["timetable"]))
+    if len(timetable):
+        st.table(pd.DataFrame(timetable.to_rows()).drop(columns="Location"))
+        gaps = timetable.free_gaps(day, min_minutes=30)
+        st.caption(f"Free on {day}: " + (", ".join(f"{fmt_minutes(a)}–{fmt_minutes(b)}" for a, b in gaps) or "none"))
     else:
         st.info("No timetable entries yet. Add slots using the form above.")
 
     # Quick suggestion: recommend nearest study place for next class (simple heuristic)
-    if st.session_state["timetable"]:
-        # pick first upcoming slot (naive)
-        next_slot = st.session_state["timetable"][0]
+    upcoming = timetable.next_slot()
+    if upcoming:
+        next_slot = upcoming[1]
         st.markdown("**Quick suggestion**: nearest study spot for your next class")
         # find nearest place (using sample user_loc)
-        df = load_places_df()
-        df["distance_km"] = df.apply(lambda r: compute_distance_km((user_lat, user_lon), (r["lat"], r["lon"])), axis=1)
-        nearest = df.sort_values("distance_km").iloc[0]
-        st.write(f"For **{next_slot['course']}** (on {next_slot['day']}):")
+        df = load_places_shared()
+        idx, dist = load_places_index().nearest((user_lat, user_lon), k=1)
+        nearest = df.iloc[idx[0]].copy()
+        nearest["distance_km"] = dist[0]
+        st.write(f"For **{next_slot.subject}** (on {next_slot.day} at {fmt_minutes(next_slot.start)}):")
         st.write(f"- Recommended spot: **{nearest['name']}** — {nearest['category']} ({nearest['distance_km']:.2f} km away)")
 
 # ---------------- Assignments ----------------
@@ -400,11 +371,30 @@ elif menu == "Settings":
         for f in files:
             st.write(f.name)
 
+    st.markdown("Shared data cache (all sessions)")
+    stats = shared_cache.stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Entries", stats["entries"])
+    c2.metric("Hits", stats["hits"])
+    c3.metric("Misses", stats["misses"])
+    c4.metric("Hit rate", f"{stats['hit_rate']:.0%}")
+    if st.button("Clear shared cache"):
+        shared_cache.clear()
+        st.success("Shared cache cleared — data reloads on next use.")
+
+    st.markdown("Deferred imports (loaded on first use or by background warm-up)")
+    timings = import_timings()
+    if timings:
+        st.dataframe(pd.DataFrame(timings).assign(seconds=lambda d: d["seconds"].round(3)),
+                     use_container_width=True, hide_index=True)
+    else:
+        st.caption("Nothing loaded yet.")
+
     st.markdown("Routing provider")
-    st.markdown("- By default this prototype uses the public OSRM server for route polyline lookup. For production, use a paid provider or your own OSRM instance.")
+    st.markdown("- Routes come from the local campus walkway graph (data/campus_walkways.json) and are cached on disk. The public OSRM server is an optional backend; for production, use a paid provider or your own OSRM instance.")
     st.markdown("Developer notes:")
     st.code("""
-- To replace PLACES, load from a CSV / DB or call a Places API.
+- To replace places, edit data/places.csv or point PLACES_FILE (utils/places.py) at a CSV / JSONL / GeoJSON export.
 - To persist timetable/assignments, connect to a DB (SQLite/Postgres/Firebase).
 - To authenticate users, integrate OAuth / your identity provider.
 """)
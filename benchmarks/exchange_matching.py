@@ -0,0 +1,98 @@
+# benchmarks/exchange_matching.py
+"""
+Skill Exchange matching: recompute-per-render vs incremental heaps.
+
+    python -m benchmarks.exchange_matching [sizes...]
+
+For each size it times one page render (20 cards) with the original
+SequenceMatcher scan, with a from-scratch batched vector query, and with
+the incremental ExchangeMatcher, plus the matcher's per-insert cost.
+"""
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+
+from utils.matching import ExchangeMatcher
+
+SUBJECTS = ["python", "java", "calculus", "physics", "logo design", "poster", "laptop repair",
+            "bike repair", "guitar", "essay editing", "react", "figma", "chemistry",
+            "statistics", "cooking", "photography", "video editing", "excel", "resume review"]
+VERBS = ["help with", "tutoring in", "need", "looking for", "can teach", "offering"]
+CATEGORIES = ["Tutoring", "Design", "Coding", "Repair", "Services"]
+PAGE = 20
+
+
+def synthetic_listings(n, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "id": i + 1,
+        "type": rng.choice(["Offer", "Request"]),
+        "title": f"{rng.choice(VERBS)} {rng.choice(SUBJECTS)}",
+        "category": rng.choice(CATEGORIES),
+        "tags": rng.sample(SUBJECTS, 2),
+        "availability": rng.choice(["Available", "Limited", "Unavailable"]),
+    } for i in range(n)]
+
+
+def rerank(listing, target, similarity):
+    score = similarity
+    if listing["category"] == target["category"]:
+        score += 0.3
+    if listing["availability"] == "Available":
+        score += 0.2
+    return round(score, 2)
+
+
+def render_scan(listings, page):
+    """The original page: SequenceMatcher against every opposite listing, per card."""
+    for current in page:
+        opposite = "Request" if current["type"] == "Offer" else "Offer"
+        matches = []
+        for item in listings:
+            if item["type"] == opposite:
+                sim = SequenceMatcher(None, item["title"].lower(), current["title"].lower()).ratio()
+                score = rerank(item, current, sim)
+                if score > 0.4:
+                    matches.append((item, score))
+        matches.sort(key=lambda x: x[1], reverse=True)
+
+
+def render_vector_batch(matcher, page):
+    """Vectors, but still recomputed on every render (one batched query)."""
+    queries = matcher.encoder.encode_queries([matcher.text(l) for l in page])
+    ids, sims = matcher.indexes["Request"].search(queries, matcher.pool)
+    for item, row_ids, row_sims in zip(page, ids, sims):
+        scored = sorted((rerank(matcher.listings[i], item, s) for i, s in zip(row_ids, row_sims)), reverse=True)
+        scored[:matcher.k]
+
+
+def timed(fn, *args, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - start) / repeat
+
+
+def run(n, inserts=200):
+    listings = synthetic_listings(n + inserts)
+    base, extra = listings[:n], listings[n:]
+    page = [l for l in base if l["type"] == "Offer"][:PAGE]
+
+    matcher = ExchangeMatcher(rerank=rerank)
+    build = timed(lambda: matcher.add(base))
+    insert = timed(lambda: [matcher.add([l]) for l in extra]) / inserts
+
+    scan = timed(render_scan, base, page)
+    batch = timed(render_vector_batch, matcher, page, repeat=5)
+    heaps = timed(lambda: matcher.matches([l["id"] for l in page]), repeat=50)
+
+    print(f"{n:>7,} listings | render: scan {scan * 1e3:9.1f} ms  "
+          f"vector batch {batch * 1e3:7.2f} ms  heaps {heaps * 1e3:6.3f} ms | "
+          f"insert {insert * 1e3:6.2f} ms  cold build {build:6.1f} s")
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [1_000, 10_000, 50_000]
+    for n in sizes:
+        run(n)
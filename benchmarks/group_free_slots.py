@@ -0,0 +1,57 @@
+# benchmarks/group_free_slots.py
+"""
+Group free-slot queries over a synthetic cohort.
+
+    python -m benchmarks.group_free_slots [students] [group sizes...]
+
+Loads the cohort into a GroupScheduler (15-minute slots, Mon–Fri) and
+times common-window and quorum queries for random groups of each size.
+"""
+import random
+import sys
+import time
+
+import pandas as pd
+
+from utils.group_slots import GroupScheduler
+from utils.timetable import DAYS
+
+QUERIES = 200
+
+
+def synthetic_cohort(n, classes_per_week=22, seed=0):
+    """One row per class: Student, Day, Start, End (minutes), hour-long classes 8:00–18:00."""
+    rng = random.Random(seed)
+    rows = []
+    for s in range(n):
+        for _ in range(classes_per_week):
+            start = rng.randrange(8, 18) * 60
+            rows.append((f"S{s:05d}", rng.choice(DAYS[:5]), start, start + rng.choice((60, 60, 120))))
+    return pd.DataFrame(rows, columns=["Student", "Day", "Start", "End"])
+
+
+def main(n=5000, sizes=(3, 10, 50, 500)):
+    cohort = synthetic_cohort(n)
+    scheduler = GroupScheduler()
+    t0 = time.perf_counter()
+    scheduler.load(cohort)
+    print(f"load {n} students ({len(cohort)} classes): {(time.perf_counter() - t0) * 1000:.0f} ms, "
+          f"{scheduler.free.nbytes / 1e3:.0f} kB of bitsets")
+
+    rng = random.Random(1)
+    for size in sizes:
+        groups = [rng.sample(scheduler.students, size) for _ in range(QUERIES)]
+        t0 = time.perf_counter()
+        found = sum(bool(scheduler.common_windows(g)) for g in groups)
+        common = (time.perf_counter() - t0) / QUERIES * 1000
+        t0 = time.perf_counter()
+        for g in groups:
+            scheduler.quorum_windows(g, quorum=max(1, int(size * 0.8)))
+        quorum = (time.perf_counter() - t0) / QUERIES * 1000
+        print(f"group of {size:>4}: common {common:.3f} ms ({found}/{QUERIES} have a window), "
+              f"80% quorum {quorum:.3f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args[:1] or [5000]), *([tuple(args[1:])] if len(args) > 1 else []))
@@ -2,19 +2,27 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+from utils.timetable import Timetable, fmt_minutes
 
 def show_academic():
     st.header("Academic Cockpit — Timetable & Assignments")
     if "timetable" not in st.session_state:
-        st.session_state["timetable"] = []
+        st.session_state["timetable"] = Timetable()
+    timetable = st.session_state["timetable"]
     with st.form("slot"):
         course = st.text_input("Course", value="Course name")
         day = st.selectbox("Day", ["Mon","Tue","Wed","Thu","Fri"])
         start = st.time_input("Start", value=datetime.strptime("09:00","%H:%M").time())
         end = st.time_input("End", value=datetime.strptime("10:00","%H:%M").time())
         if st.form_submit_button("Add slot"):
-            st.session_state["timetable"].append({"course":course,"day":day,"start":start,"end":end})
-    st.table(pd.DataFrame(st.session_state["timetable"]))
+            try:
+                timetable.add(day, start, end, course)
+            except ValueError as e:  # SlotClash names the clashing classes
+                st.error(str(e))
+    st.table(pd.DataFrame(timetable.to_rows()))
+    upcoming = timetable.next_slot()
+    if upcoming:
+        st.caption(f"Next: {upcoming[1].subject}, {upcoming[1].day} {fmt_minutes(upcoming[1].start)}")
 
     if "assignments" not in st.session_state:
         st.session_state["assignments"] = []
@@ -1,23 +1,20 @@
 import streamlit as st
-import pydeck as pdk
 import pandas as pd
-import math
-from components.nearby import load_df
+import numpy as np
+from utils.places import load_places_shared
+from utils.geo import haversine_np, distances_from
+from utils.walk_matrix import WalkMatrix, load_walk_matrix
+from utils.lazy import lazy_import
+
+pdk = lazy_import("pydeck")
 
 # =================================================
-# Distance calculation (Pure Python – Cloud Safe)
+# Distance calculation (vectorized NumPy)
 # =================================================
 def haversine_km(lat1, lon1, lat2, lon2):
-    R = 6371
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-
-    a = (
-        math.sin(dphi / 2) ** 2 +
-        math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    )
-    return 2 * R * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    """Distance (km) from (lat1, lon1) to one point or to arrays of points."""
+    dist = haversine_np(np.atleast_1d(lat2), np.atleast_1d(lon2), (lat1, lon1))
+    return float(dist[0]) if np.ndim(lat2) == 0 else dist
 
 
 # =================================================
@@ -27,7 +24,7 @@ def show_navigate():
     st.header("🗺️ Navigate Smarter")
     st.caption("Visualize nearby places and preview routes instantly")
 
-    df = load_df()
+    df = load_places_shared()
 
     # ---------------- Sidebar Controls ----------------
     with st.sidebar.expander("📍 Your Location", expanded=True):
@@ -37,12 +34,11 @@ def show_navigate():
     user_loc = (user_lat, user_lon)
 
     # ---------------- Distance Calculation ----------------
-    df["distance_km"] = df.apply(
-        lambda r: haversine_km(user_lat, user_lon, r["lat"], r["lon"]),
-        axis=1
-    )
+    df["distance_km"] = distances_from(df, user_loc)
+    walk_km = load_walk_matrix().from_origin(user_loc, df["id"])
+    df["walk_min"] = WalkMatrix.minutes(walk_km) if walk_km is not None else np.nan
 
-    df = df.sort_values("distance_km")
+    df = df.sort_values(["walk_min", "distance_km"])
 
     # ---------------- Map View ----------------
     st.subheader("📌 Map View")
@@ -121,11 +117,14 @@ def show_navigate():
 
     # ---------------- Extra UX ----------------
     st.markdown("### 🚶 Quick Actions")
-    cols = st.columns(2)
+    cols = st.columns(3)
 
     with cols[0]:
         st.metric("Distance (km)", round(sel["distance_km"], 2))
 
     with cols[1]:
+        st.metric("Walk (min)", "—" if pd.isna(sel["walk_min"]) else round(sel["walk_min"]))
+
+    with cols[2]:
         maps_url = f"https://www.google.com/maps/dir/{user_lat},{user_lon}/{sel['lat']},{sel['lon']}"
         st.link_button("Open in Google Maps", maps_url)
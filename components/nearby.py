@@ -1,27 +1,22 @@
 # components/nearby.py
 import streamlit as st
 import pandas as pd
-from haversine import haversine, Unit
 from pathlib import Path
+from utils.places import load_places_shared, load_places_index
 
 ASSETS_DIR = Path("/mnt/data")
-PLACES = [
-    {"id":1,"name":"Campus Cafe","category":"Eatery","lat":30.9315,"lon":76.5278,"rating":4.4,"vibes":["study-friendly","budget"],"popularity":78,"img":"campus_cafe.jpg","desc":"Cozy cafe."},
-    {"id":2,"name":"Central Library","category":"Library","lat":30.9326,"lon":76.5267,"rating":4.8,"vibes":["quiet","study-friendly"],"popularity":95,"img":"library.jpg","desc":"24/7 study halls."},
-]
-
-def load_df():
-    return pd.DataFrame(PLACES)
 
 def show_nearby():
     st.header("Nearby Hub")
-    df = load_df()
+    df = load_places_shared()
     user_loc = (30.9320,76.5269)
     radius = st.slider("Radius (km)", 0.5, 5.0, 2.0)
-    vibes = sorted({v for p in PLACES for v in p["vibes"]})
+    vibes = sorted({v for vs in df["vibes"] for v in vs})
     sel_vibes = st.multiselect("Vibes", vibes)
-    df["distance_km"] = df.apply(lambda r: haversine(user_loc, (r["lat"],r["lon"]), unit=Unit.KILOMETERS), axis=1)
-    mask = df["distance_km"] <= radius
+    idx, dist = load_places_index().query_radius(user_loc, radius)
+    df = df.iloc[idx].copy()
+    df["distance_km"] = dist
+    mask = pd.Series(True, index=df.index)
     if sel_vibes:
         mask &= df["vibes"].apply(lambda vs: any(v in vs for v in sel_vibes))
     res = df[mask].sort_values("distance_km")
@@ -0,0 +1,14 @@
+# components/pager.py
+import math
+import streamlit as st
+from utils.store import PAGE_SIZE
+
+
+def page_controls(total, key, page_size=PAGE_SIZE):
+    """Page picker for server-side pagination. Returns (limit, offset)."""
+    pages = max(math.ceil(total / page_size), 1)
+    if pages == 1:
+        return page_size, 0
+    page = st.number_input(f"Page (1–{pages})", min_value=1, max_value=pages, value=1, step=1, key=key)
+    st.caption(f"Showing {min((page - 1) * page_size + 1, total)}–{min(page * page_size, total)} of {total}")
+    return page_size, (page - 1) * page_size
@@ -1,6 +1,12 @@
+import io
 import streamlit as st
 import pandas as pd
 from datetime import datetime, date
+from pathlib import Path
+from utils.cache import cached, shared_cache
+from utils.group_slots import GroupScheduler
+from utils.timetable import DAYS, fmt_minutes
+from utils.timetable_ingest import TimetableFormatError, ingest_upload, timetable_for, upload_digest
 
 st.set_page_config(page_title="Live Timetable", layout="wide")
 st.title("📅 Live Timetable")
@@ -8,14 +14,17 @@ st.title("📅 Live Timetable")
 # =====================================================
 # SAFE DATA LOADING
 # =====================================================
+# Uploads are hashed; the parsed timetable is cached under that hash,
+# so reruns with the same file skip parsing entirely.
 
 st.sidebar.header("📂 Timetable Source")
 
 uploaded_file = st.sidebar.file_uploader(
-    "Upload timetable CSV",
-    type=["csv"]
+    "Upload timetable (CSV or calendar .ics)",
+    type=["csv", "ics"]
 )
 
+@cached()
 def load_mock_data():
     """Fallback mock timetable so app NEVER crashes"""
     data = {
@@ -23,39 +32,169 @@ def load_mock_data():
         "Time": ["9-10", "10-11", "9-10", "10-11", "9-10"],
         "Subject": ["Maths", "Free", "Physics", "Free", "Electronics"]
     }
-    return pd.DataFrame(data)
+    return pd.DataFrame(data).to_csv(index=False).encode()
 
+def upload_key(upload):
+    """Content hash of the upload, computed once per uploaded file."""
+    digests = st.session_state.setdefault("timetable_digests", {})
+    if upload.file_id not in digests:
+        digests[upload.file_id] = upload_digest(upload)
+    return digests[upload.file_id]
+
+def load_demo():
+    demo = io.BytesIO(load_mock_data())
+    digest = upload_digest(demo)
+    return digest, ingest_upload(demo, name="demo.csv", digest=digest)
+
+ingested = None
 if uploaded_file:
-    df = pd.read_csv(uploaded_file)
-    st.success("✅ Timetable loaded from uploaded file")
-else:
-    df = load_mock_data()
-    st.info("ℹ️ Using demo timetable (upload CSV to replace)")
+    try:
+        digest = upload_key(uploaded_file)
+        ingested = ingest_upload(uploaded_file, name=uploaded_file.name, digest=digest)
+        st.success(f"✅ Timetable loaded from uploaded file ({len(ingested.frame)} classes)")
+    except TimetableFormatError as e:
+        st.error(f"Could not read this timetable: {e}. Showing the demo timetable instead.")
+if ingested is None:
+    digest, ingested = load_demo()
+    if not uploaded_file:
+        st.info("ℹ️ Using demo timetable (upload CSV to replace)")
+
+if ingested.error_count:
+    with st.expander(f"⚠️ {ingested.error_count} of {ingested.rows} row(s) skipped"):
+        st.dataframe(pd.DataFrame(ingested.errors, columns=["Row", "Problem"]),
+                     use_container_width=True, hide_index=True)
+
+section = None
+if ingested.sections:
+    section = st.sidebar.selectbox("Section", ingested.sections)
+
+frame = ingested.frame
+if section is not None:
+    frame = frame[frame["Section"] == section]
 
 # =====================================================
 # DISPLAY TIMETABLE
 # =====================================================
 
 st.subheader("📘 Your Weekly Schedule")
-st.dataframe(df, use_container_width=True)
+st.dataframe(
+    frame.assign(Start=frame["Start"].map(fmt_minutes), End=frame["End"].map(fmt_minutes))
+         .loc[:, lambda d: d.astype(str).ne("").any()],  # hide empty Section/Location
+    use_container_width=True, hide_index=True,
+)
 
 # =====================================================
 # FREE PERIOD FINDER (SIMULATED AI LOGIC)
 # =====================================================
 # Logic:
-# - Any row where Subject == "Free" is treated as a free slot
-# - Simple rule-based filtering (transparent + explainable)
+# - Every class is parsed into a minute interval ("9-10" -> 09:00–10:00)
+# - Free periods are the real gaps between classes in the teaching day
+#   (rows marked "Free" are just gaps too)
+# - Overlapping classes are reported as clashes
 
 st.subheader("🔍 Free Period Finder")
 
-free_slots = df[df["Subject"].str.lower() == "free"]
+timetable, clashes = timetable_for(digest, ingested, section)
+
+for slot, existing in clashes:
+    others = ", ".join(f"{c.subject} ({c.label})" for c in existing)
+    st.error(f"⚠️ Clash: {slot.subject} ({slot.label}) overlaps {others}")
+
+min_gap = st.slider("Shortest useful gap (minutes)", 0, 120, 30, step=15)
+gaps = timetable.week_gaps(min_minutes=min_gap, days=[d for d in DAYS if timetable.days[d].slots] or DAYS[:5])
 
-if free_slots.empty:
+if not gaps:
     st.warning("No free periods detected.")
 else:
-    st.success(f"Found {len(free_slots)} free slot(s)")
+    st.success(f"Found {len(gaps)} free slot(s)")
+    free_slots = pd.DataFrame([
+        {"Day": day, "From": fmt_minutes(start), "To": fmt_minutes(end), "Minutes": end - start}
+        for day, start, end in gaps
+    ])
     st.dataframe(free_slots, use_container_width=True)
 
+# =====================================================
+# RIGHT NOW
+# =====================================================
+
+st.subheader("🕒 Right Now")
+
+now = datetime.now()
+current = timetable.current(now)
+upcoming = timetable.next_slot(now)
+
+if current:
+    st.info("In class: " + ", ".join(f"**{s.subject}** until {fmt_minutes(s.end)}" for s in current))
+else:
+    free_for = timetable.free_until(now)
+    st.success(f"You're free now ({free_for} min until your next class or the end of the day)."
+               if free_for else "You're free now.")
+if upcoming:
+    ahead, slot = upcoming
+    when = "today" if ahead == 0 else "tomorrow" if ahead == 1 else slot.day
+    st.write(f"Next: **{slot.subject}** {when} at {fmt_minutes(slot.start)}")
+
+# =====================================================
+# GROUP FREE-SLOT FINDER (SIMULATED AI LOGIC)
+# =====================================================
+# Logic:
+# - Every student's week becomes a row of free/busy bits (5 or 15 min slots)
+# - A group's common free time is the AND of its members' rows
+# - If the whole group is never free together, a quorum view counts who is free per slot
+
+st.subheader("👥 Group Free-Slot Finder")
+
+group_files = st.file_uploader(
+    "Classmates' timetables (one file per student, or one CSV with a Student column)",
+    type=["csv", "ics"],
+    accept_multiple_files=True,
+)
+slot_minutes = st.radio("Slot size", [15, 5], horizontal=True, format_func=lambda m: f"{m} min")
+
+def group_scheduler(files, slot_minutes):
+    """GroupScheduler for you + the uploaded files, cached on their hashes."""
+    keys = tuple(upload_key(f) for f in files)
+
+    def build():
+        scheduler, problems = GroupScheduler(slot_minutes=slot_minutes), []
+        scheduler.add_timetable("You", timetable)
+        for upload, key in zip(files, keys):
+            try:
+                group = ingest_upload(upload, name=upload.name, digest=key).frame
+            except TimetableFormatError as e:
+                problems.append(f"{upload.name}: {e}")
+                continue
+            students = group["Student"].astype(str).replace("", Path(upload.name).stem)
+            scheduler.load(group.assign(Student=students))
+        return scheduler, problems
+
+    return shared_cache.get_or_set(("group_scheduler", digest, section, keys, slot_minutes), build)
+
+if not group_files:
+    st.info("Upload classmates' timetables to find times when everyone is free.")
+else:
+    scheduler, problems = group_scheduler(group_files, slot_minutes)
+    for problem in problems:
+        st.warning(f"Skipped {problem}")
+
+    members = st.multiselect("Group", scheduler.students, default=scheduler.students[:10])
+    if len(members) >= 2:
+        windows = scheduler.common_windows(members, min_minutes=min_gap or slot_minutes)
+        if windows:
+            st.success(f"{len(windows)} window(s) where all {len(members)} are free")
+        else:
+            st.info("The whole group is never free together — showing times when most of it is.")
+            quorum = st.slider("At least this many free", 1, len(members), max(1, len(members) * 3 // 4))
+            windows = scheduler.quorum_windows(members, quorum, min_minutes=min_gap or slot_minutes)
+        if windows:
+            st.dataframe(pd.DataFrame([
+                {"Day": w["day"], "From": fmt_minutes(w["start"]), "To": fmt_minutes(w["end"]),
+                 "Minutes": w["minutes"], **({"Free": f"{w['free']}/{len(members)}"} if "free" in w else {})}
+                for w in windows
+            ]), use_container_width=True, hide_index=True)
+        else:
+            st.warning("No shared free time found for this group.")
+
 # =====================================================
 # EXAM COUNTDOWN
 # =====================================================
@@ -1,11 +1,19 @@
 import streamlit as st
 import pandas as pd
+from utils.cache import read_csv_shared
+from utils.grades import load_grades, GPA_SCALE
 
 st.title("📘 LMS Lite")
 
-# Load data
-assignments = pd.read_csv("data/assignments.csv")
-grades = pd.read_csv("data/grades.csv")
+# Load data (shared across sessions, re-read only when a file changes;
+# grade analytics only parse rows appended since the last load)
+assignments = read_csv_shared("data/assignments.csv")
+try:
+    analytics = load_grades("data/grades.csv")
+except ValueError as exc:  # e.g. no Grade or Credits column
+    st.error(f"Could not read data/grades.csv: {exc}")
+    st.stop()
+students = analytics.students
 
 # Assignments section
 st.subheader("📝 Assignments")
@@ -13,14 +21,48 @@ st.dataframe(assignments, use_container_width=True)
 
 # Grades section
 st.subheader("📊 Grades")
-st.dataframe(grades, use_container_width=True)
+if not students:
+    st.info("No grades yet: add rows (Course, Grade, Credits) to data/grades.csv.")
+    if analytics.dropped:
+        st.caption(f"{analytics.dropped} row(s) in grades.csv skipped (missing student, grade or credits).")
+    st.stop()
+student = students[0] if len(students) == 1 else st.selectbox("Student", students)
+grades = analytics.frame
+grades = grades[grades["Student"] == student].drop(columns="Student")
+if not analytics.has_terms:
+    grades = grades.drop(columns="Term")
+st.dataframe(grades, use_container_width=True, hide_index=True)
+if analytics.dropped:
+    st.caption(f"{analytics.dropped} row(s) in grades.csv skipped (missing student, grade or credits).")
 
 # GPA Calculator
 st.subheader("🎯 GPA Calculator")
-gpa = (grades["Grade"] * grades["Credits"]).sum() / grades["Credits"].sum()
-st.metric("Current GPA", round(gpa / 10, 2))
+gpa = analytics.gpa(student)
+if len(students) == 1:
+    st.metric("Current GPA", round(gpa, 2))
+else:
+    ranking = analytics.student_table()
+    row = ranking.loc[student]
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Current GPA", round(gpa, 2))
+    c2.metric("Percentile", f"{row['Percentile']:.0f}")
+    c3.metric("Rank", f"{int(row['Rank'])} / {len(ranking)}")
 
 # Performance Analytics
 st.subheader("📈 Performance Analytics")
-st.bar_chart(grades.set_index("Course")["Grade"])
+st.bar_chart(grades.groupby("Course", observed=True)["Grade"].mean())
 
+if analytics.has_terms:
+    st.markdown("**GPA by term**")
+    st.line_chart(analytics.trend(student))
+
+if len(students) > 1:
+    st.markdown("**Cohort GPA distribution**")
+    counts, edges = analytics.gpa_distribution()
+    st.bar_chart(pd.Series(counts, index=[f"{e:.1f}" for e in edges[:-1]], name="Students"))
+
+    st.markdown("**Course statistics**")
+    courses = analytics.course_table()
+    st.dataframe(courses, use_container_width=True)
+    st.caption(f"Grades out of 100; GPA is the credit-weighted mean / {GPA_SCALE}. "
+               f"Cohort mean GPA {ranking['GPA'].mean():.2f}.")
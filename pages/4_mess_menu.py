@@ -1,40 +1,48 @@
 import streamlit as st
+import copy
+import json
+from utils.store import get_store
 
 st.set_page_config(page_title="Mess Menu", layout="wide")
 
 # ---------------- INIT DATA ----------------
-if "mess_menu" not in st.session_state:
-    st.session_state.mess_menu = {
-        "Monday": {
-            "Breakfast": "Poha, Tea",
-            "Lunch": "Rajma, Rice",
-            "Dinner": "Roti, Paneer"
-        },
-        "Tuesday": {
-            "Breakfast": "Idli, Sambhar",
-            "Lunch": "Chole, Rice",
-            "Dinner": "Roti, Mix Veg"
-        },
-        "Wednesday": {
-            "Breakfast": "Upma, Coffee",
-            "Lunch": "Dal, Rice",
-            "Dinner": "Roti, Aloo Sabzi"
-        }
+# One menu for every student: admin updates are saved in the shared SQLite
+# store, so they survive cache clears and restarts.
+DEFAULT_MENU = {
+    "Monday": {
+        "Breakfast": "Poha, Tea",
+        "Lunch": "Rajma, Rice",
+        "Dinner": "Roti, Paneer"
+    },
+    "Tuesday": {
+        "Breakfast": "Idli, Sambhar",
+        "Lunch": "Chole, Rice",
+        "Dinner": "Roti, Mix Veg"
+    },
+    "Wednesday": {
+        "Breakfast": "Upma, Coffee",
+        "Lunch": "Dal, Rice",
+        "Dinner": "Roti, Aloo Sabzi"
     }
+}
+
+store = get_store()
+saved = store.get_meta("mess_menu")
+mess_menu = json.loads(saved) if saved else copy.deepcopy(DEFAULT_MENU)
 
 # ---------------- UI ----------------
 st.title("🍽 Live Mess Menu")
 
 day = st.selectbox(
     "📅 Select Day",
-    list(st.session_state.mess_menu.keys())
+    list(mess_menu.keys())
 )
 
 col1, col2, col3 = st.columns(3)
 
-col1.metric("🍳 Breakfast", st.session_state.mess_menu[day]["Breakfast"])
-col2.metric("🍛 Lunch", st.session_state.mess_menu[day]["Lunch"])
-col3.metric("🍽 Dinner", st.session_state.mess_menu[day]["Dinner"])
+col1.metric("🍳 Breakfast", mess_menu[day]["Breakfast"])
+col2.metric("🍛 Lunch", mess_menu[day]["Lunch"])
+col3.metric("🍽 Dinner", mess_menu[day]["Dinner"])
 
 st.divider()
 
@@ -47,7 +55,9 @@ with st.expander("🔐 Admin: Update Menu"):
         new_item = st.text_input("Enter Updated Menu")
 
         if st.button("Update Menu"):
-            st.session_state.mess_menu[day][meal] = new_item
+            updated = copy.deepcopy(mess_menu)
+            updated[day][meal] = new_item
+            store.set_meta("mess_menu", json.dumps(updated))
             st.success(f"{meal} updated for {day} ✅")
 
     elif admin_pass:
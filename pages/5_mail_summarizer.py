@@ -1,5 +1,11 @@
+import hashlib
 import streamlit as st
-import google.generativeai as genai
+import pandas as pd
+from utils.cache import shared_cache
+from utils.mail_batch import ingest
+from utils.summarizer import (
+    DATA_DIR, ExtractiveBackend, GeminiBackend, SummaryCache, Summarizer, TokenBucket, RateLimited
+)
 
 # ---------------- PAGE CONFIG ----------------
 st.set_page_config(
@@ -8,12 +14,38 @@ st.set_page_config(
 )
 
 # ---------------- GEMINI SETUP ----------------
-genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
-model = genai.GenerativeModel("gemini-1.5-flash")
+def _gemini_key():
+    try:
+        return st.secrets["GEMINI_API_KEY"]
+    except (KeyError, FileNotFoundError):
+        return None
+
+
+def _new_summarizer():
+    api_key = _gemini_key()
+    local = ExtractiveBackend()
+    backends = [GeminiBackend(api_key), local] if api_key else [local]
+    # Gemini free tier: ~15 requests/minute; busy or slow → local summary
+    return Summarizer(
+        backends, cache=SummaryCache(), bucket=TokenBucket(rate=15 / 60, capacity=5),
+        fallback=local.name, first_chunk_timeout=8.0,
+    )
+
+
+summarizer = shared_cache.get_or_set("mail_summarizer", _new_summarizer)
 
 # ---------------- UI ----------------
-st.title("📧 AI Mail Summarizer (Gemini)")
+st.title("📧 AI Mail Summarizer")
 st.caption("Paste any official college mail and get a clear, student-friendly summary.")
+ENGINES = {
+    "extractive": "⚡ Local (instant, offline)",
+}
+for name in summarizer.backends:
+    ENGINES.setdefault(name, "☁️ Gemini (falls back to local if slow)")
+
+engine = st.radio("Engine", list(summarizer.backends), format_func=ENGINES.get, horizontal=True)
+if len(summarizer.backends) == 1:
+    st.caption("No GEMINI_API_KEY configured: summaries are generated locally.")
 
 mail_text = st.text_area(
     "Paste College Mail Here",
@@ -25,21 +57,55 @@ if st.button("Summarize Mail"):
     if not mail_text.strip():
         st.warning("Please paste a mail first.")
     else:
-        with st.spinner("Summarizing using Gemini AI..."):
-            prompt = f"""
-You are a college assistant AI.
+        st.subheader("📌 Summary")
+        box = st.empty()
+        text = ""
+        try:
+            with st.spinner("Summarizing..."):
+                for chunk in summarizer.stream(mail_text, backend=engine):
+                    text += chunk
+                    box.success(text)
+        except RateLimited as exc:
+            st.error(str(exc))
+        except Exception as exc:  # backend failures (network, API errors) without a fallback
+            st.error(f"Summarization failed: {exc}")
+
+# ---------------- BULK MAILBOX ----------------
+st.divider()
+st.subheader("📬 Bulk Mailbox Digest")
+st.caption("Upload an .mbox export or .eml files: duplicates are merged, "
+           "dates and actions are pulled into one table.")
 
-Summarize the following mail in simple student-friendly language.
+uploads = st.file_uploader("Mailbox files", type=["mbox", "eml"], accept_multiple_files=True)
 
-Return:
-1. 3–5 bullet point summary
-2. Important dates (if any)
-3. Action required (Yes/No)
+if uploads and st.button("Build Digest"):
+    digest = hashlib.sha256()
+    for up in uploads:
+        digest.update(up.name.encode() + up.getvalue())
+    # same upload → same folder, so a re-run resumes from its checkpoint
+    work_dir = DATA_DIR / ".cache" / "mail_batch" / digest.hexdigest()[:16]
+    inbox = work_dir / "inbox"
+    inbox.mkdir(parents=True, exist_ok=True)
+    for i, up in enumerate(uploads):
+        (inbox / f"{i:05d}_{up.name}").write_bytes(up.getvalue())
 
-Mail:
-{mail_text}
-"""
-            response = model.generate_content(prompt)
+    progress = st.empty()
+    try:
+        counts = ingest(
+            inbox, work_dir / "digest.csv", summarizer, workers=4,
+            on_progress=lambda c: progress.caption(f"Processed {c['processed']} mails "
+                                                   f"({c['duplicates']} duplicates)…"),
+        )
+        progress.caption(f"Done: {counts['processed']} new, {counts['duplicates']} duplicates, "
+                         f"{counts['skipped']} from an earlier run.")
+    except RateLimited as exc:
+        st.error(f"{exc} Press Build Digest again to resume.")
+    except Exception as exc:
+        st.error(f"Digest stopped: {exc}. Finished mails are saved; "
+                 "press Build Digest again to resume.")
 
-            st.subheader("📌 Summary")
-            st.success(response.text)
+    digest_file = work_dir / "digest.csv"
+    if digest_file.exists():
+        table = pd.read_csv(digest_file).sort_values("position")
+        st.dataframe(table.drop(columns=["position"]), use_container_width=True)
+        st.download_button("Download digest (CSV)", digest_file.read_bytes(), file_name="mail_digest.csv")
@@ -1,5 +1,8 @@
 import streamlit as st
-from difflib import SequenceMatcher
+from utils.store import get_store
+from utils.matching import ExchangeMatcher
+from utils.cache import shared_cache
+from components.pager import page_controls
 
 # =========================================================
 # Student Exchange – Skill & Service Hub
@@ -15,35 +18,54 @@ st.title("🤝 Student Exchange – Skill & Service Hub")
 st.caption("Offer skills. Request help. Barter smartly.")
 
 # =========================================================
-# In-memory mock storage
+# Shared storage (SQLite, visible to every student)
 # =========================================================
-if "listings" not in st.session_state:
-    st.session_state.listings = []
+store = get_store()
 
 # =========================================================
 # SIMULATED AI / MATCHING LOGIC
 # =========================================================
 
-def text_similarity(a, b):
+def _new_matcher():
+    matcher = ExchangeMatcher(rerank=relevance_score, k=3, min_score=0.4)
+    matcher.load_matches(store.skill_matches())
+    return matcher
+
+
+def exchange_matcher():
     """
-    SIMULATED NLP SIMILARITY
+    SIMULATED NLP EMBEDDINGS
     -----------------------
-    Uses simple string similarity to approximate
-    relevance between skills/services.
+    Process-wide vector index over listing titles + tags
+    (hashed TF-IDF, one index per listing type).
+    Catches up on listings posted since its last sync (e.g. by other sessions):
+    each new listing is scored once against the opposite type and the
+    top-3 heaps it touches are saved. Listings matched in an earlier run
+    are only re-indexed.
     """
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+    matcher = shared_cache.get_or_set("exchange_matcher", _new_matcher)
+    matched_through = int(store.get_meta("exchange_matched_through", 0))
+
+    new_listings = store.skill_listings_since(matcher.last_id)
+    old = [l for l in new_listings if l["id"] <= matched_through]
+    new = [l for l in new_listings if l["id"] > matched_through]
+    matcher.add(old, score=False)
+    if new:
+        store.replace_skill_matches(matcher.add(new))
+        store.set_meta("exchange_matched_through", new[-1]["id"])
+    return matcher
 
 
-def relevance_score(listing, target):
+def relevance_score(listing, target, similarity):
     """
     SIMULATED AI RELEVANCE SCORE
     ----------------------------
     Factors:
-    1. Skill/Service text similarity
+    1. Skill/Service embedding similarity
     2. Same category boost
     3. Availability bonus
     """
-    score = text_similarity(listing["title"], target["title"])
+    score = similarity
 
     if listing["category"] == target["category"]:
         score += 0.3
@@ -54,27 +76,16 @@ def relevance_score(listing, target):
     return round(score, 2)
 
 
-def find_recommendations(current):
+def find_recommendations(items):
     """
     SIMULATED MATCH ENGINE
     ---------------------
     Matches:
     - Offer ↔ Request
-    - Ranked by relevance score
+    - Nearest listings by embedding, re-ranked by relevance score
+    - Top 3 per card, kept up to date as listings are posted
     """
-    matches = []
-
-    for item in st.session_state.listings:
-        if item is current:
-            continue
-
-        if item["type"] != current["type"]:
-            score = relevance_score(item, current)
-            if score > 0.4:
-                matches.append((item, score))
-
-    matches.sort(key=lambda x: x[1], reverse=True)
-    return matches
+    return exchange_matcher().matches([item["id"] for item in items])
 
 
 def barter_suggestion(category):
@@ -119,7 +130,7 @@ with st.form("listing_form", clear_on_submit=True):
     submit = st.form_submit_button("Post Listing")
 
     if submit and title:
-        st.session_state.listings.append({
+        store.add_skill_listing({
             "type": listing_type,
             "title": title,
             "category": category,
@@ -135,10 +146,9 @@ with st.form("listing_form", clear_on_submit=True):
 st.divider()
 view_mode = st.radio("View", ["Offers", "Requests"], horizontal=True)
 
-filtered = [
-    l for l in st.session_state.listings
-    if l["type"] == ("Offer" if view_mode == "Offers" else "Request")
-]
+view_type = "Offer" if view_mode == "Offers" else "Request"
+limit, offset = page_controls(store.count_skill_listings(view_type), key="exchange_page")
+filtered = store.skill_listings(type=view_type, limit=limit, offset=offset)
 
 # =========================================================
 # DISPLAY LISTINGS + AI RECOMMENDATIONS
@@ -147,6 +157,7 @@ filtered = [
 if not filtered:
     st.info(f"No {view_mode.lower()} available yet.")
 else:
+    recommendations_by_item = find_recommendations(filtered)
     for item in filtered:
         with st.container():
             st.markdown(
@@ -162,11 +173,11 @@ else:
             )
 
             # ================= AI RECOMMENDATIONS =================
-            recommendations = find_recommendations(item)
+            recommendations = recommendations_by_item.get(item["id"], [])
 
             if recommendations:
                 st.markdown("🤖 **Recommended matches:**")
-                for rec, score in recommendations[:3]:
+                for rec, score in recommendations:
                     st.markdown(
                         f"- **{rec['title']}** ({rec['type']}) — Relevance: `{score}`"
                     )
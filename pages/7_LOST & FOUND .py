@@ -1,6 +1,10 @@
 import streamlit as st
 from datetime import date
-from difflib import SequenceMatcher
+from utils.store import get_store
+from utils.search import InvertedIndex
+from utils.matching import LostFoundMatcher
+from utils.cache import shared_cache
+from components.pager import page_controls
 
 # =========================================================
 # Student Exchange – Lost & Found
@@ -16,10 +20,9 @@ st.title("🎒 Student Exchange – Lost & Found")
 st.caption("Simple campus lost & found system with **simulated AI matching**")
 
 # =========================================================
-# In-memory storage (resets on refresh)
+# Shared storage (SQLite, visible to every student)
 # =========================================================
-if "lost_found_items" not in st.session_state:
-    st.session_state["lost_found_items"] = []
+store = get_store()
 
 # =========================================================
 # Simulated AI Logic
@@ -38,25 +41,37 @@ def auto_tag(description: str):
     return "Other"
 
 
-def text_similarity(a: str, b: str):
-    """Simulated NLP similarity"""
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+def search_text(item):
+    return f"{item['name']} {item['description']} {item['location']}"
 
 
-def find_matches(current_item, threshold=0.6):
-    """Find LOST vs FOUND matches"""
-    matches = []
+def lost_found_engines():
+    """
+    Process-wide BM25 search index and Lost ↔ Found matcher.
+    Both catch up on rows added since their last sync (e.g. by other sessions).
+    Items already matched in an earlier run are only re-indexed, not re-scored.
+    """
+    index = shared_cache.get_or_set("lost_found_search_index", InvertedIndex)
+    matcher = shared_cache.get_or_set("lost_found_matcher", LostFoundMatcher)
+    matched_through = int(store.get_meta("lost_found_matched_through", 0))
+
+    new_items = store.lost_found_since(min(index.last_id, matcher.last_id))
+    for item in new_items:
+        index.add(item["id"], search_text(item))
+        matches = matcher.add(item, score=item["id"] > matched_through)
+        if matches:
+            store.add_lost_found_matches(item["id"], matches)
+    if new_items and new_items[-1]["id"] > matched_through:
+        store.set_meta("lost_found_matched_through", new_items[-1]["id"])
+    return index, matcher
 
-    for item in st.session_state["lost_found_items"]:
-        if item["status"] != current_item["status"]:
-            score = text_similarity(
-                current_item["description"],
-                item["description"]
-            )
-            if score >= threshold:
-                matches.append((item, score))
 
-    return matches
+def find_matches(items):
+    """
+    Find LOST vs FOUND matches for the displayed items
+    (blocked by category + MinHash/LSH, scored once when an item arrives)
+    """
+    return store.lost_found_matches([item["id"] for item in items])
 
 
 # =========================================================
@@ -85,7 +100,7 @@ with col1:
                 "category": auto_tag(lost_desc)
             }
 
-            st.session_state["lost_found_items"].append(new_item)
+            store.add_lost_found(new_item)
             st.success("Lost item submitted successfully!")
 
 with col2:
@@ -108,7 +123,7 @@ with col2:
                 "category": auto_tag(found_desc)
             }
 
-            st.session_state["lost_found_items"].append(new_item)
+            store.add_lost_found(new_item)
             st.success("Found item submitted successfully!")
 
 # =========================================================
@@ -119,12 +134,16 @@ st.divider()
 st.subheader("📋 All Submissions")
 
 search = st.text_input("🔍 Search by name, description, or location")
+index, _ = lost_found_engines()
 
-filtered_items = []
-for item in st.session_state["lost_found_items"]:
-    combined = f"{item['name']} {item['description']} {item['location']}".lower()
-    if search.lower() in combined:
-        filtered_items.append(item)
+if search.strip():
+    # ranked BM25 results from the inverted index
+    ranked, total = index.search(search)
+    limit, offset = page_controls(total, key="lost_found_page")
+    filtered_items = store.lost_found_by_ids(ranked[offset:offset + limit])
+else:
+    limit, offset = page_controls(store.count_lost_found(), key="lost_found_page")
+    filtered_items = store.lost_found_items(limit=limit, offset=offset)
 
 # =========================================================
 # Display Cards with AI Match Highlighting
@@ -133,6 +152,7 @@ for item in st.session_state["lost_found_items"]:
 if not filtered_items:
     st.info("No items found.")
 else:
+    matches_by_item = find_matches(filtered_items)
     for item in filtered_items:
         with st.container():
             st.markdown(
@@ -149,7 +169,7 @@ else:
                 unsafe_allow_html=True
             )
 
-            matches = find_matches(item)
+            matches = matches_by_item.get(item["id"], [])
 
             if matches:
                 st.markdown("🤖 **AI-suggested possible matches:**")
@@ -1,5 +1,13 @@
 import streamlit as st
+import heapq
+import numpy as np
 from datetime import datetime, timedelta
+from utils.store import get_store
+from utils.trips import TripIndex
+from utils.gazetteer import load_gazetteer
+from utils.pooling import plan_pools
+from utils.cache import shared_cache
+from components.pager import page_controls
 
 # =========================================================
 # Student Exchange – Travel Sharing
@@ -15,10 +23,9 @@ st.title("🚗 Student Exchange – Travel Sharing")
 st.caption("Find safe, coordinated travel partners on campus")
 
 # =========================================================
-# In-memory storage (resets on refresh)
+# Shared storage (SQLite, visible to every student)
 # =========================================================
-if "trips" not in st.session_state:
-    st.session_state.trips = []
+store = get_store()
 
 # =========================================================
 # Simulated AI / Heuristic Logic
@@ -29,22 +36,40 @@ def time_difference_hours(t1, t2):
     return abs((t1 - t2).total_seconds()) / 3600
 
 
-def route_similarity(a, b):
+START_SCALE_KM = 0.5  # start points this far apart score ~0.37
+
+
+def keyword_overlap(a, b):
+    """
+    Share of a's start-point words found in b's.
+    a and b are (text, word set, word count) tuples precomputed by the trip index.
+    """
+    if a[0] == b[0]:
+        return 1.0
+
+    common = a[1] & b[1]
+    return len(common) / max(a[2], 1)
+
+
+def route_similarity(index, current_trip, trips):
     """
     SIMULATED ROUTE SIMILARITY
     -------------------------
-    Very simple heuristic:
-    - Same starting point → high similarity
-    - Otherwise partial similarity based on keyword overlap
+    Start points are geocoded through the campus gazetteer
+    ("Main Gate" and "Gate 1" are the same place):
+    - Same starting point → 1.0
+    - Otherwise decays with walking distance between the start points
+    - Unknown start points fall back to keyword overlap
+    Scores for all trips are computed in one vectorized step.
     """
-    a = a.lower()
-    b = b.lower()
+    dist = index.start_distances(current_trip, trips)
+    scores = np.exp(-dist / START_SCALE_KM)
 
-    if a == b:
-        return 1.0
-
-    common = set(a.split()) & set(b.split())
-    return len(common) / max(len(a.split()), 1)
+    # trips added by another session since the last sync are not indexed yet
+    current_route = index.route(current_trip)
+    for i in np.flatnonzero(np.isnan(dist)):
+        scores[i] = keyword_overlap(index.route(trips[i]), current_route)
+    return scores
 
 
 def estimate_cost_split(passengers):
@@ -58,46 +83,67 @@ def estimate_cost_split(passengers):
     return round(BASE_COST / max(passengers, 1), 2)
 
 
-def find_matches(current_trip, time_window=3):
+def trip_index():
+    """
+    Process-wide index of trips by destination and departure time.
+    Catches up on trips added since its last sync (e.g. by other sessions).
+    """
+    index = shared_cache.get_or_set("trip_index", lambda: TripIndex(gazetteer=load_gazetteer()))
+    for trip in store.trips_since(index.last_id):
+        index.add(trip)
+    return index
+
+
+def find_matches(current_trip, index, time_window=3, limit=3):
     """
     SIMULATED AI MATCHING ENGINE
     ----------------------------
     Rules:
-    1. Same destination
-    2. Time difference within X hours
+    1. Same destination (geocoded, so "New Delhi" = "Delhi")
+    2. Time difference within X hours (range lookup in the trip index)
     3. Rank using:
        - Time closeness
        - Route similarity
     """
-    matches = []
+    trips = index.window(current_trip, time_window)
+    if not trips:
+        return []
 
-    for trip in st.session_state.trips:
-        if trip is current_trip:
-            continue
+    departures = np.array([t["datetime"].timestamp() for t in trips])
+    time_diffs = np.abs(departures - current_trip["datetime"].timestamp()) / 3600
+    route_scores = route_similarity(index, current_trip, trips)
 
-        if trip["destination"].lower() == current_trip["destination"].lower():
-            time_diff = time_difference_hours(
-                trip["datetime"], current_trip["datetime"]
-            )
+    # Combined score: lower time diff + higher route similarity
+    scores = 1 / (1 + time_diffs) + route_scores
 
-            if time_diff <= time_window:
-                route_score = route_similarity(
-                    trip["start"], current_trip["start"]
-                )
+    matches = [{
+        "trip": trip,
+        "score": float(score),
+        "time_diff": float(time_diff),
+        "route_score": float(route_score)
+    } for trip, score, time_diff, route_score in zip(trips, scores, time_diffs, route_scores)]
 
-                # Combined score: lower time diff + higher route similarity
-                score = (1 / (1 + time_diff)) + route_score
+    # Best matches first
+    return heapq.nlargest(limit, matches, key=lambda x: x["score"])
 
-                matches.append({
-                    "trip": trip,
-                    "score": score,
-                    "time_diff": time_diff,
-                    "route_score": route_score
-                })
 
-    # Rank best matches first
-    matches.sort(key=lambda x: x["score"], reverse=True)
-    return matches
+def plan_destination_pools(index, key, time_window=3):
+    """
+    SIMULATED AI POOL PLANNER
+    ------------------------
+    Groups every trip to one destination into vehicles:
+    - Cars (+seats) are filled with riders (-seats) departing nearby
+    - Leftover riders share cabs, then cabs are emptied into spare seats
+    - Fewer vehicles → lower cost per person
+    Cached until a new trip is added.
+    """
+    def route_scores(trip, others):
+        return route_similarity(index, trip, others)
+
+    return shared_cache.get_or_set(
+        ("trip_pool_plan", key, index.last_id, time_window),
+        lambda: plan_pools(index.destination(key), route_scores, time_window=time_window),
+    )
 
 
 # =========================================================
@@ -135,9 +181,50 @@ with st.form("travel_form", clear_on_submit=True):
             "seats": seats
         }
 
-        st.session_state.trips.append(new_trip)
+        store.add_trip(new_trip)
         st.success("Travel plan added successfully!")
 
+# =========================================================
+# Ride-Pool Planner
+# =========================================================
+
+st.divider()
+st.subheader("🧩 Ride-Pool Planner")
+
+index = trip_index()
+destinations = sorted(index.buckets)
+
+if not destinations:
+    st.info("Add travel plans to get a pooling plan.")
+else:
+    pool_key = st.selectbox("Destination", destinations, format_func=str.title)
+    vehicles, idle_cars = plan_destination_pools(index, pool_key)
+
+    if not vehicles:
+        st.info("No riders to pool for this destination yet.")
+    else:
+        persons = sum(v.persons for v in vehicles)
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Vehicles", len(vehicles))
+        c2.metric("Travellers", persons)
+        c3.metric("Avg cost/person", f"₹{round(sum(v.cost_per_person * v.persons for v in vehicles) / persons, 2)}")
+
+        st.dataframe(
+            [{
+                "Departs": v.anchor["datetime"].strftime("%d %b %Y, %H:%M"),
+                "Vehicle": "🚗 Car" if v.kind == "car" else "🚕 Cab",
+                "From": v.anchor["start"],
+                "Riders (from)": ", ".join(f"{r['start']} ×{-r['seats']}" for r in v.riders),
+                "People": v.persons,
+                "Seats left": v.free,
+                "Cost/person (₹)": v.cost_per_person,
+            } for v in vehicles],
+            use_container_width=True,
+            hide_index=True,
+        )
+        if idle_cars:
+            st.caption(f"{len(idle_cars)} car(s) with free seats found no riders in their time window.")
+
 # =========================================================
 # Display All Travel Entries
 # =========================================================
@@ -145,10 +232,13 @@ with st.form("travel_form", clear_on_submit=True):
 st.divider()
 st.subheader("🧳 All Travel Plans")
 
-if not st.session_state.trips:
+total_trips = store.count_trips()
+
+if not total_trips:
     st.info("No travel plans yet.")
 else:
-    for trip in st.session_state.trips:
+    limit, offset = page_controls(total_trips, key="trips_page")
+    for trip in store.trips(limit=limit, offset=offset):
         with st.container():
             st.markdown(
                 f"""
@@ -163,11 +253,11 @@ else:
             )
 
             # ================= AI MATCH SUGGESTIONS =================
-            matches = find_matches(trip)
+            matches = find_matches(trip, index)
 
             if matches:
                 st.markdown("🤖 **Suggested travel matches:**")
-                for m in matches[:3]:
+                for m in matches:
                     matched_trip = m["trip"]
                     passengers = abs(trip["seats"]) + abs(matched_trip["seats"])
                     cost = estimate_cost_split(passengers)
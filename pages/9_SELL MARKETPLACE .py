@@ -1,4 +1,9 @@
 import streamlit as st
+from utils.store import get_store
+from utils.pricing import PriceModel
+from utils.market import MarketIndex, SORT_MODES
+from utils.cache import shared_cache
+from components.pager import page_controls
 
 # =========================================================
 # Student Exchange – Buy/Sell Marketplace
@@ -14,15 +19,14 @@ st.title("🛒 Student Exchange – Buy/Sell Marketplace")
 st.caption("Campus marketplace with **AI-simulated price recommendations**")
 
 # =========================================================
-# In-memory storage
+# Shared storage (SQLite, visible to every student)
 # =========================================================
-if "listings" not in st.session_state:
-    st.session_state.listings = []
+store = get_store()
 
 # =========================================================
-# Mock historical price data (SIMULATED AI KNOWLEDGE)
+# Price model (SIMULATED AI KNOWLEDGE)
 # =========================================================
-# These act like learned averages from past data
+# Starting prices before the marketplace has listings of its own
 HISTORICAL_AVG = {
     "Books": {"New": 600, "Good": 400, "Used": 250},
     "Electronics": {"New": 8000, "Good": 5500, "Used": 3500},
@@ -30,28 +34,70 @@ HISTORICAL_AVG = {
     "Cycles": {"New": 7000, "Good": 4500, "Used": 3000},
 }
 
+PRICE_MODEL_KEY = "market_price_model"
+
+
+def _load_price_model():
+    model = PriceModel(HISTORICAL_AVG)
+    saved = store.get_meta(PRICE_MODEL_KEY)
+    if saved:
+        model.loads(saved)
+    return model
+
+
+def price_model():
+    """
+    SIMULATED AI LEARNING
+    ---------------------
+    Streaming per-(category, condition) price sketches
+    (running mean + P² quantiles), shared by all sessions.
+    Catches up on listings added since the saved sketch, O(1) per listing.
+    """
+    model = shared_cache.get_or_set("market_price_model", _load_price_model)
+    new_listings = store.market_listings_since(model.last_id)
+    for listing in new_listings:
+        model.add(listing)
+    if new_listings:
+        store.set_meta(PRICE_MODEL_KEY, model.dumps())
+    return model
+
+
 def recommend_price(category, condition):
     """
     SIMULATED AI PRICE RECOMMENDER
     ------------------------------
-    Uses mocked historical averages based on
-    category + condition.
+    Median listed price for category + condition,
+    blended with the historical average while data is sparse.
     """
-    return HISTORICAL_AVG[category][condition]
+    return price_model().recommend(category, condition)
 
-def price_flag(user_price, recommended):
+def price_flag(user_price, recommended, band=None):
     """
     SIMULATED AI PRICE EVALUATION
     -----------------------------
-    Flags listings based on deviation
-    from recommended price.
+    Flags listings outside the typical price range of similar
+    items (10th–90th percentile, blended with the prior like the
+    recommendation). Falls back to ±25% of the recommended price
+    until enough similar items are listed.
     """
-    if user_price > recommended * 1.25:
+    low, high = band or (recommended * 0.75, recommended * 1.25)
+    if user_price > high:
         return "🔴 Overpriced"
-    elif user_price < recommended * 0.75:
+    elif user_price < low:
         return "🟡 Underpriced"
     return "🟢 Fairly priced"
 
+def market_index():
+    """
+    Process-wide price-sorted index of listings per category.
+    Catches up on listings added since its last sync (e.g. by other sessions).
+    """
+    index = shared_cache.get_or_set("market_index", MarketIndex)
+    for listing in store.market_listings_since(index.last_id):
+        index.add(listing)
+    return index
+
+
 def negotiation_tip(flag):
     """
     SIMULATED AI NEGOTIATION ADVICE
@@ -88,10 +134,10 @@ with st.form("list_item", clear_on_submit=True):
 
     if submit and name and price > 0:
         rec_price = recommend_price(category, condition)
-        flag = price_flag(price, rec_price)
+        flag = price_flag(price, rec_price, price_model().band(category, condition))
         negotiation = negotiation_tip(flag)
 
-        st.session_state.listings.append({
+        store.add_market_listing({
             "name": name,
             "category": category,
             "condition": condition,
@@ -123,6 +169,12 @@ max_price = st.sidebar.slider(
     step=500
 )
 
+sort_mode = st.sidebar.selectbox(
+    "Sort by",
+    list(SORT_MODES),
+    format_func=SORT_MODES.get
+)
+
 # =========================================================
 # Marketplace Display
 # =========================================================
@@ -130,10 +182,11 @@ max_price = st.sidebar.slider(
 st.divider()
 st.subheader("📦 Marketplace Listings")
 
-filtered = [
-    item for item in st.session_state.listings
-    if item["category"] in filter_category and item["price"] <= max_price
-]
+index = market_index()
+limit, offset = page_controls(index.count(filter_category, max_price), key="market_page")
+filtered = store.market_listings_by_ids(
+    index.page(filter_category, max_price, sort=sort_mode, limit=limit, offset=offset)
+)
 
 if not filtered:
     st.info("No items match the selected filters.")
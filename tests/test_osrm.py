@@ -0,0 +1,168 @@
+# tests/test_osrm.py
+"""OSRMClient against a local aiohttp stub server (no internet needed)."""
+import asyncio
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+web = pytest.importorskip("aiohttp.web")
+
+from utils.osrm import OSRMClient
+from utils.routing import OSRMBackend
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _points(coords):
+    """'lon,lat;lon,lat' -> [(lon, lat), ...]"""
+    return [tuple(map(float, p.split(","))) for p in coords.split(";")]
+
+
+class StubOSRM:
+    """Minimal /route and /table server on its own loop thread; records every hit."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.hits = []
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    async def _route(self, request):
+        self.hits.append(request.path_qs)
+        await asyncio.sleep(self.delay)
+        points = _points(request.match_info["coords"])
+        return web.json_response({"routes": [{
+            "geometry": {"coordinates": [list(p) for p in points]},
+            "distance": 1234.0,
+        }]})
+
+    async def _table(self, request):
+        self.hits.append(request.path_qs)
+        await asyncio.sleep(self.delay)
+        points = _points(request.match_info["coords"])
+        # distance (m) = destination lon * 1000, so merge order is checkable
+        return web.json_response({
+            "distances": [[lon * 1000 for lon, _ in points]],
+            "durations": [[lon * 60 for lon, _ in points]],
+        })
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get("/route/v1/{profile}/{coords}", self._route)
+        app.router.add_get("/table/v1/{profile}/{coords}", self._table)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", self.port).start()
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(timeout=5)
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+@pytest.fixture
+def stub():
+    server = StubOSRM().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def slow_stub():
+    server = StubOSRM(delay=0.3).start()
+    yield server
+    server.stop()
+
+
+def test_identical_concurrent_routes_share_one_upstream_call(slow_stub):
+    client = OSRMClient(slow_stub.base_url, timeout=5)
+    try:
+        with ThreadPoolExecutor(8) as pool:
+            routes = list(pool.map(lambda _: client.route((30.0, 76.0), (30.1, 76.1)), range(8)))
+    finally:
+        client.close()
+
+    assert len(slow_stub.hits) == 1
+    assert client.upstream_calls == 1
+    assert all(r == routes[0] for r in routes)
+    assert routes[0]["distance_km"] == pytest.approx(1.234)
+    assert routes[0]["coords"] == [[76.0, 30.0], [76.1, 30.1]]
+
+
+def test_table_is_chunked_and_merged_in_order(stub):
+    client = OSRMClient(stub.base_url, timeout=5, table_chunk=3)
+    lats = [30.0] * 8
+    lons = [float(i + 1) for i in range(8)]
+    try:
+        km, minutes = client.table((30.5, 0.5), zip(lats, lons))
+    finally:
+        client.close()
+
+    assert len(stub.hits) == 3  # 3 + 3 + 2 destinations
+    for hit in stub.hits:
+        coords = hit.split("/table/v1/driving/")[1].split("?")[0]
+        assert len(_points(coords)) <= client.table_chunk + 1
+        assert _points(coords)[0] == (0.5, 30.5)  # origin leads every chunk
+    np.testing.assert_allclose(km, lons)
+    np.testing.assert_allclose(minutes, lons)
+
+
+def test_large_table_waits_for_every_chunk(slow_stub):
+    # 12 chunks over 2 connections: 6 rounds of 0.3 s, well past one request timeout
+    client = OSRMClient(slow_stub.base_url, timeout=0.6, pool_size=2, table_chunk=1)
+    lons = [float(i + 1) for i in range(12)]
+    try:
+        km, _ = client.table((30.5, 0.5), zip([30.0] * 12, lons))
+    finally:
+        client.close()
+
+    assert len(slow_stub.hits) == 12
+    np.testing.assert_allclose(km, lons)
+
+
+def test_default_table_chunk_fits_default_max_table_size():
+    client = OSRMClient("http://127.0.0.1:9")
+    try:
+        assert client.table_chunk + 1 <= 100
+    finally:
+        client.close()
+
+
+def test_timeout_returns_none(slow_stub):
+    backend = OSRMBackend(base_url=slow_stub.base_url, timeout=0.1)
+    try:
+        assert backend.route((30.0, 76.0), (30.1, 76.1)) is None
+        assert backend.table((30.0, 76.0), [30.1], [76.1]) is None
+    finally:
+        backend.client.close()
+
+
+def test_unreachable_server_returns_none():
+    backend = OSRMBackend(base_url=f"http://127.0.0.1:{_free_port()}", timeout=2)
+    try:
+        assert backend.route((30.0, 76.0), (30.1, 76.1)) is None
+        assert backend.table((30.0, 76.0), [30.1], [76.1]) is None
+    finally:
+        backend.client.close()
+
+
+def test_close_is_idempotent():
+    client = OSRMClient("http://127.0.0.1:9")
+    client.close()
+    client.close()
+    with pytest.raises(RuntimeError):
+        client.route((30.0, 76.0), (30.1, 76.1))
@@ -0,0 +1,40 @@
+# tests/test_timetable_ingest.py
+"""CSV section markers in timetable uploads."""
+import io
+
+import pytest
+
+from utils.timetable_ingest import parse_timetable
+
+
+def _parse(text):
+    return parse_timetable(io.BytesIO(text.encode()))
+
+
+@pytest.mark.parametrize("marker_a, marker_b", [
+    ("Section: A", "Section: B"),
+    ("Section: A,,,", "Section: B,,,"),
+])
+def test_section_markers(marker_a, marker_b):
+    text = "\n".join([
+        marker_a,
+        "Day,Time,Subject",
+        "Mon,9-10,Maths",
+        "Tue,10-11,Physics",
+        marker_b,
+        "Mon,11-12,Chemistry",
+    ])
+    result = _parse(text)
+
+    assert result.error_count == 0
+    assert result.sections == ["A", "B"]
+    rows = {r["Subject"]: r["Section"] for _, r in result.frame.iterrows()}
+    assert rows == {"Maths": "A", "Physics": "A", "Chemistry": "B"}
+
+
+def test_marker_mid_file_is_not_a_data_row():
+    text = "Day,Time,Subject\nMon,9-10,Maths\nSection: B\nMon,11-12,Chemistry\n"
+    result = _parse(text)
+
+    assert result.rows == 2
+    assert list(result.frame["Section"].astype(str)) == ["", "B"]
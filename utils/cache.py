@@ -0,0 +1,165 @@
+# utils/cache.py
+import functools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+
+class SharedCache:
+    """
+    Process-wide cache shared by every Streamlit session.
+
+    - Size-bounded LRU eviction (max_entries)
+    - Optional TTL per entry (default_ttl or per-call ttl, seconds)
+    - Per-key invalidation hooks, called once when an entry is dropped
+      (outside the lock; a failing hook is logged, never raised)
+    - Hit / miss / eviction counters for the Settings page
+    """
+
+    def __init__(self, max_entries=256, default_ttl=None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()  # key -> (value, expires_at or None)
+        self._hooks = {}
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _drop(self, key, reason):
+        """Remove key (lock held); returns its hook calls for _run_hooks."""
+        self._data.pop(key, None)
+        return [(hook, key, reason) for hook in self._hooks.pop(key, [])]
+
+    @staticmethod
+    def _run_hooks(calls):
+        """Call dropped entries' hooks; run after the lock is released."""
+        for hook, key, reason in calls:
+            try:
+                hook(key, reason)
+            except Exception:
+                log.exception("invalidation hook for %r failed", key)
+
+    def get(self, key, default=None):
+        calls = []
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                calls = self._drop(key, "expired")
+            self.misses += 1
+        self._run_hooks(calls)
+        return default
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else None
+        calls = []
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                oldest = next(iter(self._data))
+                self.evictions += 1
+                calls += self._drop(oldest, "evicted")
+        self._run_hooks(calls)
+
+    def get_or_set(self, key, factory, ttl=None):
+        """Return the cached value, computing it once even under concurrent misses."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                entry = self._data.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                return entry[0]
+            value = factory()
+            self.set(key, value, ttl=ttl)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return value
+
+    def invalidate(self, key):
+        calls = []
+        with self._lock:
+            if key in self._data:
+                calls = self._drop(key, "invalidated")
+        self._run_hooks(calls)
+
+    def clear(self):
+        calls = []
+        with self._lock:
+            for key in list(self._data):
+                calls += self._drop(key, "invalidated")
+        self._run_hooks(calls)
+
+    def on_invalidate(self, key, hook):
+        """
+        Register hook(key, reason) for when key expires, is evicted or invalidated.
+        Hooks fire once and are then removed; register again for a rebuilt entry.
+        """
+        with self._lock:
+            hooks = self._hooks.setdefault(key, [])
+            if hook not in hooks:
+                hooks.append(hook)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+shared_cache = SharedCache(max_entries=512)
+
+
+def cached(ttl=None, cache=shared_cache):
+    """Memoize a function's return value in the shared cache (args must be hashable)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (fn.__module__, fn.__qualname__, args, tuple(sorted(kwargs.items())))
+            return cache.get_or_set(key, lambda: fn(*args, **kwargs), ttl=ttl)
+        wrapper.cache_key = lambda *args, **kwargs: (
+            fn.__module__, fn.__qualname__, args, tuple(sorted(kwargs.items())))
+        return wrapper
+    return decorator
+
+
+def file_version(path):
+    """(path, mtime_ns, size): changes whenever the file is rewritten."""
+    stat = os.stat(path)
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+@cached()
+def _read_csv_version(version):
+    return pd.read_csv(version[0])
+
+
+def read_csv_shared(path):
+    """
+    Read a CSV once per process and file version.
+    Callers get a shallow copy, so adding columns never touches the shared frame.
+    """
+    return _read_csv_version(file_version(path)).copy(deep=False)
@@ -0,0 +1,93 @@
+# utils/gazetteer.py
+import csv
+import re
+import threading
+from difflib import get_close_matches
+from pathlib import Path
+
+from utils.cache import cached, file_version
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+GAZETTEER_FILE = DATA_DIR / "gazetteer.csv"
+
+_NOISE = {"the", "near", "opp", "opposite", "no", "number", "from", "at"}
+
+
+def normalize_place(text):
+    """'Gate No. 1 ' -> 'gate 1': lowercase words with filler dropped."""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return " ".join(w for w in words if w not in _NOISE)
+
+
+def _numbers(key):
+    return [w for w in key.split() if w.isdigit()]
+
+
+class Gazetteer:
+    """
+    Local gazetteer: campus spots and nearby cities with their aliases.
+
+    lookup() resolves free text to (name, lat, lon) in three steps:
+    exact alias, fuzzy alias (typos, "hostl 4"; numbers must match exactly,
+    so "hostel 2" never becomes Hostel 7), then the longest alias whose
+    words all appear in the text ("hostel 4 main road").
+    Results, including misses, are memoized per normalized text.
+    """
+
+    def __init__(self, entries):
+        self.names = {}  # normalized alias -> (name, lat, lon)
+        for name, aliases, lat, lon in entries:
+            place = (name, float(lat), float(lon))
+            for alias in [name, *aliases]:
+                key = normalize_place(alias)
+                if key:
+                    self.names.setdefault(key, place)
+        self.keys = sorted(self.names)
+        self._by_words = sorted(((frozenset(k.split()), k) for k in self.keys), key=lambda x: -len(x[1]))
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path=GAZETTEER_FILE):
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        return cls([
+            (r["name"], [a for a in (r.get("aliases") or "").split("|") if a], r["lat"], r["lon"])
+            for r in rows
+        ])
+
+    def _resolve(self, key):
+        if key in self.names:
+            return self.names[key]
+        numbers = _numbers(key)
+        for close in get_close_matches(key, self.keys, n=5, cutoff=0.8):
+            if _numbers(close) == numbers:
+                return self.names[close]
+        words = set(key.split())
+        for alias_words, alias in self._by_words:
+            if alias_words <= words:
+                return self.names[alias]
+        return None
+
+    def lookup(self, text):
+        """(name, lat, lon) for text, or None if it cannot be placed."""
+        key = normalize_place(text)
+        if not key:
+            return None
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        hit = self._resolve(key)
+        with self._lock:
+            self._memo[key] = hit
+        return hit
+
+
+@cached()
+def _gazetteer(version):
+    return Gazetteer.from_file(version[0])
+
+
+def load_gazetteer(path=GAZETTEER_FILE):
+    """Process-wide Gazetteer, reloaded when the file changes."""
+    return _gazetteer(file_version(path))
@@ -0,0 +1,36 @@
+# utils/geo.py
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_np(lats, lons, origins):
+    """
+    Vectorized haversine distance (km).
+
+    lats/lons: array-likes of point coordinates (e.g. df["lat"], df["lon"]).
+    origins: a single (lat, lon) tuple, or an (m, 2) array of (lat, lon) rows.
+
+    Returns a 1-D array of n distances for a single origin,
+    or an (m, n) matrix for many origins.
+    """
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    lon2 = np.radians(np.asarray(lons, dtype=np.float64))
+
+    origins = np.asarray(origins, dtype=np.float64)
+    single = origins.ndim == 1
+    origins = np.atleast_2d(origins)
+    lat1 = np.radians(origins[:, 0])[:, None]
+    lon1 = np.radians(origins[:, 1])[:, None]
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    dist = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    return dist[0] if single else dist
+
+
+def distances_from(df, origin):
+    """Distance (km) from origin (lat, lon) to every row of a lat/lon DataFrame."""
+    return haversine_np(df["lat"].to_numpy(), df["lon"].to_numpy(), origin)
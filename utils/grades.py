@@ -0,0 +1,355 @@
+# utils/grades.py
+"""
+Grade analytics for LMS Lite, sized for whole cohorts.
+
+grades.csv columns: Course, Grade (0–100), Credits, plus optional Student
+and Term (a single student's file has neither). Everything the dashboard
+shows is kept as running aggregates:
+
+- per student: credit-weighted points and credits (GPA, percentile, rank)
+- per course: a 0–100 grade histogram (count, mean, percentiles)
+- per (student, term): points and credits (trends)
+
+Appending rows to the file updates the aggregates from the new bytes
+only. Results are pickled under the file's content hash, so a restart
+with an unchanged file skips parsing.
+"""
+import hashlib
+import pickle
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from utils.cache import file_version, shared_cache
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+GRADES_FILE = DATA_DIR / "grades.csv"
+CACHE_DIR = DATA_DIR / ".cache"
+
+REQUIRED = ["Course", "Grade", "Credits"]
+DEFAULT_STUDENT = "You"
+CHUNK_ROWS = 200_000
+GPA_SCALE = 10  # GPA = credit-weighted mean grade / GPA_SCALE (100 -> 10.0)
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def _hash_prefix(path, size):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        left = size
+        while left > 0:
+            block = f.read(min(1 << 20, left))
+            if not block:
+                break
+            h.update(block)
+            left -= len(block)
+    return h.hexdigest()
+
+
+KEY_COLUMNS = ("Student", "Term", "Course")
+
+
+def _category(values, default=""):
+    """Stripped categorical; the strip runs once per distinct value, not per row."""
+    values = values.astype("category")
+    stripped = values.cat.categories.astype(str).str.strip()
+    if stripped.is_unique:
+        values = values.cat.rename_categories(stripped)
+    else:  # "A" and "A " both present: merge them the slow way
+        values = values.astype(str).str.strip().astype("category")
+    if values.isna().any():
+        values = values.cat.add_categories([default]) if default not in values.cat.categories else values
+        values = values.fillna(default)
+    return values
+
+
+def _typed_chunk(chunk):
+    """Validated chunk: Student, Term, Course, Grade, Credits; returns (frame, dropped rows)."""
+    missing = [c for c in REQUIRED if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"grades file is missing column(s): {', '.join(missing)}")
+    n = len(chunk)
+    out = pd.DataFrame({
+        "Student": _category(chunk["Student"]) if "Student" in chunk
+        else pd.Categorical.from_codes(np.zeros(n, np.int8), [DEFAULT_STUDENT]),
+        "Term": _category(chunk["Term"]) if "Term" in chunk else pd.Categorical.from_codes(np.zeros(n, np.int8), [""]),
+        "Course": _category(chunk["Course"]),
+        "Grade": pd.to_numeric(chunk["Grade"], errors="coerce").astype("float32"),
+        "Credits": pd.to_numeric(chunk["Credits"], errors="coerce").astype("float32"),
+    }, index=chunk.index)
+    ok = out["Grade"].between(0, 100) & (out["Credits"] > 0) & (out["Student"] != "")
+    return out[ok], int((~ok).sum())
+
+
+def _plain(series):
+    """Group result with categorical index level(s) turned into plain strings."""
+    index = series.index
+    if isinstance(index, pd.MultiIndex):
+        series.index = pd.MultiIndex.from_arrays(
+            [index.get_level_values(i).astype(str) for i in range(index.nlevels)], names=index.names)
+    else:
+        series.index = index.astype(str)
+    return series
+
+
+def _accumulate(total, part):
+    """total + part, aligned on the index (new keys start at zero)."""
+    part = _plain(part)
+    return part if total.empty else total.add(part, fill_value=0)
+
+
+class GradeAnalytics:
+    """Running per-student, per-course and per-term aggregates over a grades table."""
+
+    def __init__(self):
+        self.columns = None  # header of the source file
+        self.rows = 0
+        self.dropped = 0  # rows with no student or a missing/out-of-range grade or credits
+        self.frames = []  # typed chunks (the columnar store), concatenated on demand
+        self._frame = None
+        self.student_points = pd.Series(dtype="float64")
+        self.student_credits = pd.Series(dtype="float64")
+        self.term_points = pd.Series(dtype="float64")  # (Student, Term) index
+        self.term_credits = pd.Series(dtype="float64")
+        self.course_hist = {}  # course -> int64[101] grade counts
+        self.course_sum = pd.Series(dtype="float64")
+        self.offset = 0  # bytes of the source consumed
+        self.ends_with_newline = True
+        self.digest = None  # sha256 of the consumed bytes
+        self._lock = threading.RLock()
+
+    # ---------------- Updates ----------------
+
+    def add(self, chunk):
+        """Fold one raw chunk (as read from the CSV) into the aggregates."""
+        typed, dropped = _typed_chunk(chunk)
+        with self._lock:
+            self.rows += len(chunk)
+            self.dropped += dropped
+            if typed.empty:
+                return
+            self.frames.append(typed)
+            self._frame = None
+
+            points = typed["Grade"].astype("float64") * typed["Credits"]
+            credits = typed["Credits"].astype("float64")
+            student, term = typed["Student"], [typed["Student"], typed["Term"]]
+            self.student_points = _accumulate(self.student_points, points.groupby(student, observed=True).sum())
+            self.student_credits = _accumulate(self.student_credits, credits.groupby(student, observed=True).sum())
+            self.term_points = _accumulate(self.term_points, points.groupby(term, observed=True).sum())
+            self.term_credits = _accumulate(self.term_credits, credits.groupby(term, observed=True).sum())
+            self.course_sum = _accumulate(
+                self.course_sum, typed["Grade"].astype("float64").groupby(typed["Course"], observed=True).sum())
+
+            # one histogram row per course category, filled with a single bincount
+            course = typed["Course"].cat
+            names = course.categories.astype(str)
+            bins = np.rint(typed["Grade"].to_numpy()).astype(np.int64)
+            counts = np.bincount(course.codes.to_numpy().astype(np.int64) * 101 + bins,
+                                 minlength=len(names) * 101).reshape(len(names), 101)
+            for name, row in zip(names, counts):
+                if not row.any():
+                    continue
+                if name in self.course_hist:
+                    self.course_hist[name] += row
+                else:
+                    self.course_hist[name] = row
+
+    # ---------------- Reads ----------------
+
+    @property
+    def frame(self):
+        """All valid rows as one frame (Student/Term/Course categorical)."""
+        with self._lock:
+            if self._frame is None:
+                if not self.frames:
+                    self._frame = pd.DataFrame(columns=["Student", "Term", "Course", "Grade", "Credits"])
+                else:
+                    frame = pd.DataFrame({
+                        col: union_categoricals([f[col] for f in self.frames]) if col in KEY_COLUMNS
+                        else np.concatenate([f[col].to_numpy() for f in self.frames])
+                        for col in self.frames[0].columns
+                    })
+                    self.frames, self._frame = [frame], frame
+            return self._frame
+
+    @property
+    def students(self):
+        return list(self.student_credits.index)
+
+    @property
+    def has_terms(self):
+        return bool(len(self.term_credits)) and any(t for _, t in self.term_credits.index)
+
+    def student_table(self):
+        """Student, GPA, Credits, Percentile (0–100, higher is better), Rank."""
+        with self._lock:
+            gpa = self.student_points / self.student_credits / GPA_SCALE
+            credits = self.student_credits
+        table = pd.DataFrame({"GPA": gpa.round(2), "Credits": credits})
+        table["Percentile"] = (gpa.rank(pct=True) * 100).round(1)
+        table["Rank"] = gpa.rank(ascending=False, method="min").astype(int)
+        return table.rename_axis("Student").sort_values("Rank")
+
+    def gpa(self, student=DEFAULT_STUDENT):
+        with self._lock:
+            credits = self.student_credits.get(student, 0)
+            return self.student_points.get(student, 0) / credits / GPA_SCALE if credits else None
+
+    def course_table(self):
+        """Per course: Students, Mean and the PERCENTILES of grades, from the histograms."""
+        with self._lock:
+            names = list(self.course_hist)
+            hist = np.array([self.course_hist[n] for n in names]) if names else np.zeros((0, 101), np.int64)
+            sums = self.course_sum.reindex(names).to_numpy()
+        n = hist.sum(axis=1)
+        cum = np.cumsum(hist, axis=1)
+        table = pd.DataFrame({"Course": names, "Students": n, "Mean": np.round(sums / np.maximum(n, 1), 1)})
+        for p in PERCENTILES:
+            # first grade whose cumulative count reaches p% of the course (vectorized over courses)
+            target = np.ceil(n * p / 100).clip(min=1)[:, None]
+            table[f"P{p}"] = (cum >= target).argmax(axis=1)
+        return table.set_index("Course").sort_index()
+
+    def course_histogram(self, course):
+        with self._lock:
+            return self.course_hist.get(course, np.zeros(101, np.int64)).copy()
+
+    def trend(self, student=DEFAULT_STUDENT):
+        """GPA per term for one student, in term-label order (e.g. "2025-1", "2025-2")."""
+        with self._lock:
+            points = self.term_points.get(student)
+            credits = self.term_credits.get(student)
+        if credits is None or not len(credits):
+            return pd.Series(dtype="float64")
+        return (points / credits / GPA_SCALE).round(2).rename("GPA")
+
+    def gpa_distribution(self, bins=20):
+        """(counts, edges) histogram of student GPAs."""
+        gpa = self.student_table()["GPA"].to_numpy()
+        return np.histogram(gpa, bins=bins, range=(0, 100 / GPA_SCALE))
+
+
+# =========================================================
+# Loading, appends and the on-disk cache
+# =========================================================
+
+def _read(path, analytics, start=0):
+    """
+    Parse path from byte offset start (0 = with header) into analytics, in chunks.
+    An empty file leaves analytics empty (columns stay None, so appends rebuild).
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        header = dict(header=None, names=analytics.columns) if start else {}
+        try:
+            reader = pd.read_csv(f, chunksize=CHUNK_ROWS, skipinitialspace=True,
+                                 dtype={c: "category" for c in KEY_COLUMNS}, **header)
+        except pd.errors.EmptyDataError:
+            return
+        for chunk in reader:
+            if analytics.columns is None:
+                analytics.columns = list(chunk.columns)
+            analytics.add(chunk)
+
+
+def _consumed(path, analytics, size):
+    analytics.offset = size
+    with open(path, "rb") as f:
+        f.seek(max(size - 1, 0))
+        analytics.ends_with_newline = f.read(1) in (b"\n", b"")
+    analytics.digest = _hash_prefix(path, size)
+
+
+def _cache_path(path, digest):
+    return CACHE_DIR / f"{Path(path).name}-{digest[:16]}.analytics.pkl"
+
+
+def _save(path, analytics):
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        target = _cache_path(path, analytics.digest)
+        tmp = target.with_suffix(".tmp")
+        with analytics._lock:
+            analytics.frame  # store one concatenated frame
+            state = {k: v for k, v in analytics.__dict__.items() if k != "_lock"}
+        tmp.write_bytes(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+        tmp.replace(target)
+        for old in CACHE_DIR.glob(f"{Path(path).name}-*.analytics.pkl"):
+            if old != target:
+                old.unlink(missing_ok=True)
+    except OSError:
+        pass  # read-only deployments just recompute after a restart
+
+
+def _load_cached(path, digest):
+    target = _cache_path(path, digest)
+    if not target.exists():
+        return None
+    try:
+        state = pickle.loads(target.read_bytes())
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    analytics = GradeAnalytics()
+    analytics.__dict__.update(state)
+    return analytics if analytics.digest == digest else None
+
+
+def build_analytics(path):
+    """Full parse of path (or the pickled result for the same content)."""
+    size = Path(path).stat().st_size
+    digest = _hash_prefix(path, size)
+    analytics = _load_cached(path, digest)
+    if analytics is None:
+        analytics = GradeAnalytics()
+        _read(path, analytics)
+        _consumed(path, analytics, size)
+        _save(path, analytics)
+    return analytics
+
+
+def refresh(path, analytics):
+    """
+    Bring analytics up to date with path. Appended rows are parsed from the
+    old end of file onward; any other change rebuilds from scratch.
+    Returns the analytics to use (the same object when only appended to).
+    """
+    size = Path(path).stat().st_size
+    if size == analytics.offset and _hash_prefix(path, size) == analytics.digest:
+        return analytics
+    appended = (
+        size > analytics.offset
+        and analytics.columns is not None
+        and _hash_prefix(path, analytics.offset) == analytics.digest
+    )
+    if appended and not analytics.ends_with_newline:
+        with open(path, "rb") as f:
+            f.seek(analytics.offset)
+            appended = f.read(1) in (b"\n", b"\r")  # else the old last line was extended
+    if not appended:
+        return build_analytics(path)
+    _read(path, analytics, start=analytics.offset)
+    _consumed(path, analytics, size)
+    _save(path, analytics)
+    return analytics
+
+
+def load_grades(path=GRADES_FILE):
+    """
+    Process-wide GradeAnalytics for path. Checked against the file's
+    version on every call; appends are folded in incrementally.
+    """
+    key = ("grade_analytics", str(path))
+    entry = shared_cache.get_or_set(key, lambda: {"version": file_version(path),
+                                                  "analytics": build_analytics(path),
+                                                  "lock": threading.Lock()})
+    version = file_version(path)
+    if entry["version"] != version:
+        with entry["lock"]:
+            if entry["version"] != version:
+                entry["analytics"] = refresh(path, entry["analytics"])
+                entry["version"] = version
+    return entry["analytics"]
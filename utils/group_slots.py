@@ -0,0 +1,148 @@
+# utils/group_slots.py
+"""
+Common free time for groups of students (study groups, club meetings).
+
+Each student's week is a row of bits, one per slot_minutes slot of the
+teaching day (1 = free), packed 8 slots to a byte. A group query ANDs
+its members' rows and reads free windows off the result; quorum queries
+popcount each slot across the members instead. Both are single NumPy
+reductions, so a query over thousands of students takes milliseconds.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.timetable import DAYS, DAY_END, DAY_START, normalize_day
+
+
+class GroupScheduler:
+    """Packed free/busy bitsets for many students, with group free-window queries."""
+
+    def __init__(self, slot_minutes=15, days=DAYS[:5], day_start=DAY_START, day_end=DAY_END):
+        self.slot_minutes = slot_minutes
+        self.days = list(days)
+        self.day_start = day_start
+        self.per_day = -(-(day_end - day_start) // slot_minutes)
+        self.n_slots = self.per_day * len(self.days)
+        self.students = []
+        self.index = {}  # student -> row
+        self.free = np.empty((0, -(-self.n_slots // 8)), dtype=np.uint8)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.students)
+
+    def _busy_rows(self, rows, days, starts, ends, n):
+        """(n, n_slots) bool busy matrix from class rows, via a difference array."""
+        day_col = {d: i for i, d in enumerate(self.days)}
+        day = np.array([day_col.get(d, -1) for d in days], dtype=np.int64)
+        keep = day >= 0  # classes on days outside the grid (e.g. Sat) are ignored
+        rows, day = np.asarray(rows)[keep], day[keep]
+        first = (np.asarray(starts)[keep] - self.day_start) // self.slot_minutes
+        last = -(-(np.asarray(ends)[keep] - self.day_start) // self.slot_minutes)  # a class touching a slot blocks it
+        first, last = np.clip(first, 0, self.per_day), np.clip(last, 0, self.per_day)
+
+        # one spare column per day stops a class's -1 marker leaking into the next day
+        width = self.per_day + 1
+        diff = np.zeros((n, width * len(self.days)), dtype=np.int32)
+        np.add.at(diff, (rows, day * width + first), 1)
+        np.add.at(diff, (rows, day * width + last), -1)
+        busy = np.cumsum(diff, axis=1) > 0
+        return busy.reshape(n, len(self.days), width)[:, :, :self.per_day].reshape(n, self.n_slots)
+
+    def load(self, frame, student_col="Student"):
+        """
+        Add (or replace) students from a frame with student_col, Day, Start and End
+        (minutes after midnight), one row per class. Students with no classes
+        can be listed with empty Day to count as free all week.
+        """
+        with self._lock:
+            students = list(dict.fromkeys(frame[student_col].astype(str)))
+            local = {s: i for i, s in enumerate(students)}
+            has_class = frame["Day"].astype(str).str.strip() != ""
+            classes = frame[has_class]
+            day_names = classes["Day"].astype(str)
+            busy = self._busy_rows(
+                classes[student_col].astype(str).map(local).to_numpy(),
+                day_names.map({d: normalize_day(d) for d in day_names.unique()}).to_numpy(),
+                classes["Start"].to_numpy(dtype=np.int64),
+                classes["End"].to_numpy(dtype=np.int64),
+                len(students),
+            )
+            packed = np.packbits(~busy, axis=1)
+
+            new = [s for s in students if s not in self.index]
+            self.free = np.vstack([self.free, np.zeros((len(new), self.free.shape[1]), dtype=np.uint8)])
+            for s in new:
+                self.index[s] = len(self.students)
+                self.students.append(s)
+            self.free[[self.index[s] for s in students]] = packed
+            return len(new)
+
+    def add_timetable(self, student, timetable):
+        """Add one student from a utils.timetable.Timetable."""
+        slots = timetable.slots()
+        frame = pd.DataFrame({
+            "Student": [student] * max(len(slots), 1),
+            "Day": [s.day for s in slots] or [""],
+            "Start": [s.start for s in slots] or [0],
+            "End": [s.end for s in slots] or [0],
+        })
+        self.load(frame)
+
+    # =========================================================
+    # Queries
+    # =========================================================
+
+    def _rows(self, students):
+        missing = [s for s in students if s not in self.index]
+        if missing:
+            raise KeyError(f"unknown students: {', '.join(map(str, missing[:5]))}")
+        return np.fromiter((self.index[s] for s in students), dtype=np.int64, count=len(students))
+
+    def common_free(self, students):
+        """Bool mask over all slots: True where every student is free."""
+        with self._lock:
+            packed = np.bitwise_and.reduce(self.free[self._rows(students)], axis=0)
+        return np.unpackbits(packed, count=self.n_slots).astype(bool)
+
+    def free_counts(self, students):
+        """Number of students free in each slot (popcount down the group)."""
+        with self._lock:
+            bits = np.unpackbits(self.free[self._rows(students)], axis=1, count=self.n_slots)
+        return bits.sum(axis=0, dtype=np.int32)
+
+    def _windows(self, mask, min_minutes, limit, counts=None):
+        """Runs of True inside each day, longest first, as window dicts."""
+        grid = mask.reshape(len(self.days), self.per_day).astype(np.int8)
+        edges = np.diff(np.pad(grid, ((0, 0), (1, 1))), axis=1)
+        day_s, start_s = np.nonzero(edges == 1)
+        _, end_s = np.nonzero(edges == -1)  # same row-major order as the starts
+        length = end_s - start_s
+        keep = length * self.slot_minutes >= max(min_minutes, 1)
+        day_s, start_s, end_s, length = day_s[keep], start_s[keep], end_s[keep], length[keep]
+        order = np.lexsort((start_s, day_s, -length))[:limit]
+
+        windows = []
+        for i in order:
+            window = {
+                "day": self.days[day_s[i]],
+                "start": self.day_start + int(start_s[i]) * self.slot_minutes,
+                "end": self.day_start + int(end_s[i]) * self.slot_minutes,
+                "minutes": int(length[i]) * self.slot_minutes,
+            }
+            if counts is not None:
+                flat = day_s[i] * self.per_day
+                window["free"] = int(counts[flat + start_s[i]:flat + end_s[i]].min())
+            windows.append(window)
+        return windows
+
+    def common_windows(self, students, min_minutes=30, limit=10):
+        """Windows where every student is free, longest first."""
+        return self._windows(self.common_free(students), min_minutes, limit)
+
+    def quorum_windows(self, students, quorum, min_minutes=30, limit=10):
+        """Windows where at least quorum students are free (with the minimum free count)."""
+        counts = self.free_counts(students)
+        return self._windows(counts >= quorum, min_minutes, limit, counts=counts)
@@ -0,0 +1,110 @@
+# utils/lazy.py
+"""
+Deferred imports for heavy, optional dependencies.
+
+    pdk = lazy_import("pydeck")   # nothing is imported yet
+    pdk.Deck(...)                 # imported (and timed) here, on first use
+
+warm_up() imports the heavy modules in a background thread once the app
+has started, so the first page renders without waiting for them and a
+later first use usually finds them ready. import_timings() reports how
+long each one took and what triggered it.
+"""
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+
+# Imported in this order by warm_up(); modules that are not installed are skipped
+HEAVY_MODULES = ("pydeck", "pyarrow.feather", "aiohttp", "google.generativeai", "hnswlib")
+WARMUP_DELAY = 1.0  # seconds, lets the first script run finish before warming
+
+_timings = {}  # module name -> {"seconds", "trigger", "status"}
+_locks = {}
+_registry_lock = threading.Lock()
+_warmup_thread = None
+
+
+def available(name):
+    """True if the module can be imported (checked without importing it)."""
+    if name in sys.modules:
+        return True
+    try:
+        spec = importlib.util.find_spec(name.split(".")[0])
+        if spec is not None and spec.origin is None and "." in name:
+            # namespace package (e.g. "google"): look for the module itself
+            spec = importlib.util.find_spec(name)
+        return spec is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _load(name, trigger):
+    with _registry_lock:
+        lock = _locks.setdefault(name, threading.Lock())
+    with lock:
+        if name in sys.modules and name in _timings:
+            return sys.modules[name]
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            _timings[name] = {"seconds": time.perf_counter() - start, "trigger": trigger,
+                              "status": "missing"}
+            raise
+        _timings[name] = {"seconds": time.perf_counter() - start, "trigger": trigger,
+                          "status": "loaded"}
+        return module
+
+
+class LazyModule:
+    """Stands in for a module and imports it on the first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = _load(self._name, "first use")
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    """A LazyModule for name; the real import happens on first use."""
+    return LazyModule(name)
+
+
+def warm_up(names=HEAVY_MODULES, delay=WARMUP_DELAY):
+    """
+    Import names in a daemon thread, once per process. Safe to call on
+    every script run; returns the warm-up thread.
+    """
+    global _warmup_thread
+    with _registry_lock:
+        if _warmup_thread is not None:
+            return _warmup_thread
+
+        def run():
+            time.sleep(delay)
+            for name in names:
+                if available(name):
+                    try:
+                        _load(name, "warm-up")
+                    except Exception:  # a broken optional install must not kill the thread
+                        pass
+
+        _warmup_thread = threading.Thread(target=run, name="lazy-warmup", daemon=True)
+        _warmup_thread.start()
+        return _warmup_thread
+
+
+def import_timings():
+    """Rows of {module, seconds, trigger, status}, slowest first."""
+    rows = [{"module": name, **info} for name, info in list(_timings.items())]
+    return sorted(rows, key=lambda r: -r["seconds"])
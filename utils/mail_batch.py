@@ -0,0 +1,335 @@
+# utils/mail_batch.py
+"""
+Bulk mailbox ingestion for the Mail Summarizer.
+
+Streams an mbox file or a directory of .mbox/.eml files into a CSV digest:
+
+    python -m utils.mail_batch semester.mbox --out digest.csv --workers 4
+
+- Messages are parsed lazily, one at a time
+- Near-identical notices (SimHash, Hamming distance <= 3) are summarized once
+- Long mails are split into chunks that are summarized separately
+- Summaries run on a bounded worker pool (at most 2 x workers in flight)
+- Important dates and action-required are extracted into their own columns
+- Progress is checkpointed, so an interrupted run resumes where it stopped
+"""
+import csv
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email import message_from_bytes
+from email.header import decode_header, make_header
+from email.policy import compat32
+from pathlib import Path
+
+import numpy as np
+
+from utils.summarizer import ACTION_WORDS, DATE_RE
+
+DIGEST_COLUMNS = ["position", "message_id", "date", "sender", "subject",
+                  "duplicate_of", "important_dates", "action_required", "summary"]
+MAX_CHUNK_CHARS = 4000
+CHECKPOINT_EVERY = 50
+
+# =========================================================
+# Parsing (lazy)
+# =========================================================
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_QUOTED_FROM = re.compile(rb">+From ")
+
+
+def _body_text(msg):
+    """First text/plain part (else text/html, tags stripped) as a string."""
+    parts = [p for p in msg.walk() if p.get_content_maintype() == "text" and not p.is_multipart()]
+    part = next((p for p in parts if p.get_content_subtype() == "plain"), parts[0] if parts else None)
+    if part is None:
+        return ""
+    payload = part.get_payload(decode=True) or b""
+    try:
+        text = payload.decode(part.get_content_charset() or "utf-8", errors="replace")
+    except LookupError:
+        text = payload.decode("utf-8", errors="replace")
+    if part.get_content_subtype() == "html":
+        text = _TAG_RE.sub(" ", text)
+    return text.strip()
+
+
+def _header(msg, name):
+    value = msg.get(name)
+    if value is None:
+        return ""
+    return str(make_header(decode_header(value))).strip()
+
+
+def _record(position, raw):
+    # compat32 skips the structured header parsing that dominates policy.default
+    msg = message_from_bytes(raw, policy=compat32)
+    body = _body_text(msg)
+    return {
+        "position": position,
+        "message_id": _header(msg, "Message-ID") or hashlib.sha1(raw).hexdigest(),
+        "date": _header(msg, "Date"),
+        "sender": _header(msg, "From"),
+        "subject": _header(msg, "Subject"),
+        "body": body,
+    }
+
+
+def _iter_mbox(path):
+    """
+    Raw messages of an mbox file, split on 'From ' lines while reading.
+    Quoted '>From ' lines are unescaped mboxrd-style (one '>' removed from '>>From ' too).
+    """
+    with open(path, "rb") as f:
+        lines = []
+        for line in f:
+            if line.startswith(b"From ") and lines:
+                yield b"".join(lines)
+                lines = []
+            if lines or not line.startswith(b"From "):
+                lines.append(line[1:] if _QUOTED_FROM.match(line) else line)
+        if lines:
+            yield b"".join(lines)
+
+
+def _iter_dir(path):
+    """Raw messages of every .mbox and .eml file under path, in sorted file order."""
+    files = sorted(p for p in path.rglob("*") if p.suffix.lower() in (".mbox", ".eml") and p.is_file())
+    for file in files:
+        if file.suffix.lower() == ".mbox":
+            yield from _iter_mbox(file)
+        else:
+            yield file.read_bytes()
+
+
+def iter_messages(path):
+    """Yield one record per mail in an mbox file or a directory of .mbox/.eml files."""
+    path = Path(path)
+    raws = _iter_dir(path) if path.is_dir() else _iter_mbox(path)
+    for position, raw in enumerate(raws):
+        yield _record(position, raw)
+
+
+# =========================================================
+# Near-duplicate detection
+# =========================================================
+
+def simhash(text):
+    """64-bit SimHash over word 3-grams (bit votes tallied with NumPy)."""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    grams = [" ".join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))]
+    digests = b"".join(hashlib.blake2b(g.encode(), digest_size=8).digest() for g in grams)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(len(grams), 8), axis=1)
+    votes = 2 * bits.sum(axis=0, dtype=np.int64) - len(grams)  # big-endian bit order
+    return int("".join("1" if v > 0 else "0" for v in votes), 2)
+
+
+class SimHashIndex:
+    """
+    Finds an earlier fingerprint within max_distance bits. Fingerprints are
+    split into max_distance + 1 blocks: any near-duplicate must match at
+    least one block exactly, so lookups only check those buckets.
+    """
+
+    def __init__(self, max_distance=3, bits=64):
+        self.max_distance = max_distance
+        self.blocks = max_distance + 1
+        self.width = bits // self.blocks
+        self.buckets = {}  # (block, value) -> [(fingerprint, key)]
+
+    def _parts(self, fp):
+        mask = (1 << self.width) - 1
+        return [(b, fp >> (b * self.width) & mask) for b in range(self.blocks)]
+
+    def find(self, fp):
+        for part in self._parts(fp):
+            for other, key in self.buckets.get(part, ()):
+                if bin(fp ^ other).count("1") <= self.max_distance:
+                    return key
+        return None
+
+    def add(self, fp, key):
+        for part in self._parts(fp):
+            self.buckets.setdefault(part, []).append((fp, key))
+
+    def items(self):
+        seen = {}
+        for entries in self.buckets.values():
+            for fp, key in entries:
+                seen[key] = fp
+        return [(fp, key) for key, fp in seen.items()]
+
+
+# =========================================================
+# Extraction and summarization
+# =========================================================
+
+def chunk_text(text, max_chars=MAX_CHUNK_CHARS):
+    """Split on paragraph boundaries into pieces of at most ~max_chars."""
+    chunks, current = [], ""
+    for para in re.split(r"\n\s*\n", text):
+        while len(para) > max_chars:
+            chunks.append(para[:max_chars])
+            para = para[max_chars:]
+        if current and len(current) + len(para) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{para}" if current else para
+    if current:
+        chunks.append(current)
+    return chunks or [""]
+
+
+def extract_fields(text):
+    """Important dates and action-required flag found in a mail body."""
+    dates = list(dict.fromkeys(m.group(0) for m in DATE_RE.finditer(text)))
+    action = any(w in text.lower() for w in ACTION_WORDS)
+    return "; ".join(dates), "Yes" if action else "No"
+
+
+def summarize_record(summarizer, record):
+    chunks = chunk_text(record["body"])
+    summary = "\n\n".join(summarizer.summarize(c) for c in chunks if c.strip())
+    dates, action = extract_fields(f"{record['subject']}\n{record['body']}")
+    return {k: record[k] for k in DIGEST_COLUMNS if k in record} | {
+        "duplicate_of": "",
+        "important_dates": dates,
+        "action_required": action,
+        "summary": summary,
+    }
+
+
+# =========================================================
+# Checkpointed pipeline
+# =========================================================
+
+class Checkpoint:
+    """
+    Resumable progress: every position below `through` is done, plus the
+    positions in `done` above it, and `offset` is the digest CSV's size at
+    that point. Written atomically (tmp file + rename).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.through = 0
+        self.done = set()
+        self.fingerprints = []
+        self.offset = None  # no checkpoint yet
+        if self.path.exists():
+            data = json.loads(self.path.read_text())
+            self.through = data["through"]
+            self.done = set(data["done"])
+            self.fingerprints = data["fingerprints"]
+            self.offset = data["offset"]
+
+    def is_done(self, position):
+        return position < self.through or position in self.done
+
+    def mark(self, position):
+        self.done.add(position)
+        while self.through in self.done:
+            self.done.remove(self.through)
+            self.through += 1
+
+    def save(self, index, offset):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "through": self.through,
+            "done": sorted(self.done),
+            "offset": offset,
+            "fingerprints": [[str(fp), *key] for fp, key in index.items()],
+        }))
+        os.replace(tmp, self.path)
+
+
+def ingest(source, out_path, summarizer, workers=4, checkpoint_path=None, on_progress=None):
+    """
+    Summarize every mail in source into the CSV at out_path (appending when
+    resuming). Returns {"processed", "duplicates", "skipped"} for this run.
+    """
+    out_path = Path(out_path)
+    checkpoint = Checkpoint(checkpoint_path or out_path.with_suffix(".checkpoint.json"))
+    index = SimHashIndex()  # fingerprint -> (position, message_id) of the first copy
+    for fp, position, message_id in checkpoint.fingerprints:
+        index.add(int(fp), (position, message_id))
+
+    # rows written after the last checkpoint are redone on resume, so drop them
+    if checkpoint.offset is not None and out_path.exists() and out_path.stat().st_size > checkpoint.offset:
+        with open(out_path, "r+b") as f:
+            f.truncate(checkpoint.offset)
+
+    counts = {"processed": 0, "duplicates": 0, "skipped": 0}
+    write_header = not out_path.exists() or out_path.stat().st_size == 0
+    lock = threading.Lock()
+
+    with open(out_path, "a", newline="", encoding="utf-8") as f, ThreadPoolExecutor(workers) as pool:
+        writer = csv.DictWriter(f, fieldnames=DIGEST_COLUMNS)
+        if write_header:
+            writer.writeheader()
+
+        def finish(row):
+            with lock:
+                writer.writerow(row)
+                checkpoint.mark(row["position"])
+                counts["processed"] += 1
+                if counts["processed"] % CHECKPOINT_EVERY == 0:
+                    f.flush()
+                    checkpoint.save(index, out_path.stat().st_size)
+                if on_progress:
+                    on_progress(counts)
+
+        pending = set()
+        try:
+            for record in iter_messages(source):
+                if checkpoint.is_done(record["position"]):
+                    counts["skipped"] += 1
+                    continue
+
+                fp = simhash(f"{record['subject']} {record['body']}")
+                original = index.find(fp)
+                if original is not None and original[0] == record["position"]:
+                    original = None  # this record, queued but unfinished when the last run stopped
+                elif original is None:
+                    index.add(fp, (record["position"], record["message_id"]))
+                if original is not None:
+                    counts["duplicates"] += 1
+                    dates, action = extract_fields(f"{record['subject']}\n{record['body']}")
+                    finish({k: record[k] for k in DIGEST_COLUMNS if k in record} | {
+                        "duplicate_of": original[1], "important_dates": dates,
+                        "action_required": action, "summary": ""})
+                    continue
+
+                if len(pending) >= 2 * workers:  # bound memory: never queue the whole mailbox
+                    completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in completed:
+                        finish(future.result())
+                pending.add(pool.submit(summarize_record, summarizer, record))
+
+            for future in pending:
+                finish(future.result())
+        finally:
+            f.flush()
+            checkpoint.save(index, out_path.stat().st_size)
+    return counts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from utils.summarizer import ExtractiveBackend, SummaryCache, Summarizer
+
+    parser = argparse.ArgumentParser(description="Summarize a mailbox into a CSV digest.")
+    parser.add_argument("source", help="mbox file or directory of .mbox/.eml files")
+    parser.add_argument("--out", default="mail_digest.csv")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    summarizer = Summarizer(ExtractiveBackend(), cache=SummaryCache())
+    counts = ingest(args.source, args.out, summarizer, workers=args.workers)
+    print(f"{counts['processed']} mails ({counts['duplicates']} duplicates, "
+          f"{counts['skipped']} already done) -> {args.out}")
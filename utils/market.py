@@ -0,0 +1,84 @@
+# utils/market.py
+import bisect
+import heapq
+import math
+import threading
+from collections import defaultdict
+from itertools import islice
+
+FLAG_ORDER = ("Underpriced", "Fairly priced", "Overpriced")  # best deals first
+SORT_MODES = {
+    "newest": "Newest first",
+    "price_asc": "Price: low → high",
+    "price_desc": "Price: high → low",
+    "deals": "Best deals first",
+}
+
+
+def flag_rank(flag):
+    """Position of a price flag in FLAG_ORDER (unknown flags sort last)."""
+    return next((i for i, name in enumerate(FLAG_ORDER) if name in flag), len(FLAG_ORDER))
+
+
+class MarketIndex:
+    """
+    Listing ids kept per category in price order, so a max_price cutoff is
+    a bisect and a page of results is a lazy k-way merge across the selected
+    categories. Only (price, id) pairs are held; callers fetch the page's
+    rows from the store.
+    """
+
+    def __init__(self):
+        self.by_price = defaultdict(list)  # category -> sorted [(price, id)]
+        self.by_flag = defaultdict(list)  # (category, flag rank) -> sorted [(price, id)]
+        self.by_id = defaultdict(list)  # category -> [(id, price)] in insertion order
+        self.last_id = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return sum(len(v) for v in self.by_price.values())
+
+    def add(self, listing):
+        with self._lock:
+            if listing["id"] <= self.last_id:
+                return
+            cat, price, id_ = listing["category"], listing["price"], listing["id"]
+            bisect.insort(self.by_price[cat], (price, id_))
+            bisect.insort(self.by_flag[(cat, flag_rank(listing["flag"]))], (price, id_))
+            self.by_id[cat].append((id_, price))
+            self.last_id = id_
+
+    @staticmethod
+    def _cut(keys, max_price):
+        """Number of (price, id) keys with price <= max_price."""
+        if max_price is None:
+            return len(keys)
+        return bisect.bisect_right(keys, (max_price, math.inf))
+
+    def count(self, categories, max_price=None):
+        with self._lock:
+            return sum(self._cut(self.by_price.get(c, []), max_price) for c in categories)
+
+    def _ascending(self, lists, max_price):
+        return heapq.merge(*(islice(keys, self._cut(keys, max_price)) for keys in lists))
+
+    def _descending(self, keys, max_price):
+        for i in range(self._cut(keys, max_price) - 1, -1, -1):
+            yield keys[i]
+
+    def page(self, categories, max_price=None, sort="newest", limit=20, offset=0):
+        """Listing ids for one page of the given categories under max_price."""
+        with self._lock:
+            if sort == "price_asc":
+                ordered = self._ascending([self.by_price.get(c, []) for c in categories], max_price)
+            elif sort == "price_desc":
+                ordered = heapq.merge(
+                    *(self._descending(self.by_price.get(c, []), max_price) for c in categories), reverse=True)
+            elif sort == "deals":
+                ordered = (key for rank in range(len(FLAG_ORDER) + 1) for key in self._ascending(
+                    [self.by_flag.get((c, rank), []) for c in categories], max_price))
+            else:  # newest
+                ordered = ((price, id_) for id_, price in heapq.merge(
+                    *(reversed(self.by_id.get(c, [])) for c in categories), reverse=True)
+                    if max_price is None or price <= max_price)
+            return [id_ for _, id_ in islice(ordered, offset, offset + limit)]
@@ -0,0 +1,263 @@
+# utils/matching.py
+import heapq
+import threading
+import zlib
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+import numpy as np
+
+from utils.vectors import HashingEncoder, VectorIndex
+
+_PRIME = (1 << 31) - 1
+MATCH_CHUNK = 256  # listings indexed and matched per step of a bulk add
+
+
+class MinHasher:
+    """MinHash signatures over character shingles (vectorized with NumPy)."""
+
+    def __init__(self, num_perm=128, shingle=3, seed=7):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle = shingle
+        self.a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text):
+        text = " ".join(text.lower().split())
+        if len(text) <= self.shingle:
+            return {text} if text else set()
+        return {text[i:i + self.shingle] for i in range(len(text) - self.shingle + 1)}
+
+    def signature(self, text):
+        sh = self.shingles(text)
+        if not sh:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        x = np.fromiter((zlib.crc32(s.encode()) % _PRIME for s in sh), dtype=np.uint64, count=len(sh))
+        # universal hashing (a*x + b) mod p; a, x < 2^31 keeps it inside uint64
+        return ((self.a[:, None] * x[None, :] + self.b[:, None]) % _PRIME).min(axis=1)
+
+
+class LSHIndex:
+    """
+    Banded LSH over MinHash signatures. With 2-row bands, two texts share a
+    bucket in at least one band with high probability once their shingle
+    Jaccard is ~0.2+.
+    Signatures are kept in one growing matrix so candidates can be
+    re-checked against the query with a single vectorized comparison.
+    """
+
+    def __init__(self, num_perm=128, bands=64):
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets = defaultdict(list)  # (block, band, hash) -> [row]
+        self.doc_ids = []
+        self.signatures = np.empty((1024, num_perm), dtype=np.uint64)
+
+    def _keys(self, block, signature):
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows]
+            yield (block, band, chunk.tobytes())
+
+    def add(self, block, doc_id, signature):
+        row = len(self.doc_ids)
+        if row == len(self.signatures):
+            self.signatures = np.concatenate([self.signatures, np.empty_like(self.signatures)])
+        self.signatures[row] = signature
+        self.doc_ids.append(doc_id)
+        for key in self._keys(block, signature):
+            self.buckets[key].append(row)
+
+    def query(self, block, signature, min_jaccard=0.0):
+        """Doc ids colliding with signature in block, filtered by estimated Jaccard."""
+        hits = [self.buckets[key] for key in self._keys(block, signature) if key in self.buckets]
+        if not hits:
+            return []
+        rows = np.unique(np.concatenate([np.asarray(h, dtype=np.int64) for h in hits]))
+        if min_jaccard > 0:
+            est = (self.signatures[rows] == signature).mean(axis=1)
+            rows = rows[est >= min_jaccard]
+        return [self.doc_ids[r] for r in rows]
+
+
+class LostFoundMatcher:
+    """
+    Lost ↔ Found matching in three stages:
+    1. Blocking: only opposite-status items with the same auto-tag category
+       that collide in MinHash/LSH over description shingles are candidates
+       (and whose estimated shingle Jaccard clears min_jaccard)
+    2. Scoring: SequenceMatcher on candidates only, skipping pairs whose
+       quick_ratio upper bound is already below the threshold
+    3. Caching: add() returns the new item's matches once, for the caller
+       to persist; identical description pairs are scored only once
+    """
+
+    def __init__(self, threshold=0.6, num_perm=128, bands=64, min_jaccard=0.15):
+        self.threshold = threshold
+        self.min_jaccard = min_jaccard
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.lsh = LSHIndex(num_perm=num_perm, bands=bands)
+        self.descriptions = {}  # id -> lowercased description
+        self.pair_scores = {}  # (desc, desc) -> score
+        self.last_id = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _opposite(status):
+        return "Found" if status == "Lost" else "Lost"
+
+    def _score(self, a, b):
+        key = (a, b) if a <= b else (b, a)
+        score = self.pair_scores.get(key)
+        if score is None:
+            sm = SequenceMatcher(None, a, b)
+            if sm.real_quick_ratio() < self.threshold or sm.quick_ratio() < self.threshold:
+                score = 0.0
+            else:
+                score = sm.ratio()
+            self.pair_scores[key] = score
+        return score
+
+    def add(self, item, score=True):
+        """
+        Index one item. With score=True, also score it against its blocked
+        candidates and return [(other_id, score)] above the threshold.
+        Use score=False to re-index items whose matches are already stored.
+        """
+        with self._lock:
+            if item["id"] in self.descriptions:
+                return []
+            desc = item["description"].lower()
+            sig = self.hasher.signature(desc)
+
+            found = []
+            if score:
+                other_block = (self._opposite(item["status"]), item["category"])
+                for other_id in self.lsh.query(other_block, sig, self.min_jaccard):
+                    s = self._score(desc, self.descriptions[other_id])
+                    if s >= self.threshold:
+                        found.append((other_id, s))
+
+            self.lsh.add((item["status"], item["category"]), item["id"], sig)
+            self.descriptions[item["id"]] = desc
+            self.last_id = max(self.last_id, item["id"])
+            return found
+
+
+class ExchangeMatcher:
+    """
+    Offer ↔ Request matching for the Skill Exchange, maintained on insert.
+
+    Titles and tags are encoded with HashingEncoder and kept in one vector
+    index per listing type. When listings arrive, each one pulls a candidate
+    pool from the opposite index, the pool is re-ranked with rerank()
+    (category / availability boosts), and both sides' bounded top-k heaps
+    are updated. Reading recommendations is then a dict lookup per card.
+    """
+
+    TYPES = ("Offer", "Request")
+
+    def __init__(self, rerank, k=3, min_score=0.4, dim=1024, pool=30):
+        self.rerank = rerank  # rerank(candidate, target, similarity) -> score
+        self.k = k
+        self.min_score = min_score
+        self.pool = pool
+        self.encoder = HashingEncoder(dim=dim)
+        self.indexes = {t: VectorIndex(dim) for t in self.TYPES}
+        self.listings = {}  # id -> listing
+        self.heaps = defaultdict(list)  # id -> min-heap of (score, other_id), size <= k
+        self.last_id = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def opposite(type_):
+        return "Request" if type_ == "Offer" else "Offer"
+
+    @staticmethod
+    def text(listing):
+        return " ".join([listing["title"], *listing.get("tags", [])])
+
+    def load_matches(self, rows):
+        """Restore heaps from stored (listing_id, other_id, score) rows."""
+        with self._lock:
+            for listing_id, other_id, score in rows:
+                self._push(listing_id, other_id, score)
+
+    def _push(self, listing_id, other_id, score):
+        """Offer other_id to listing_id's heap; True if the heap changed."""
+        if score <= self.min_score:
+            return False
+        heap = self.heaps[listing_id]
+        if any(o == other_id for _, o in heap):
+            return False
+        if len(heap) < self.k:
+            heapq.heappush(heap, (score, other_id))
+            return True
+        if score > heap[0][0]:
+            heapq.heapreplace(heap, (score, other_id))
+            return True
+        return False
+
+    def add(self, listings, score=True):
+        """
+        Index new listings. With score=True, also match them against the
+        opposite type and return {listing_id: [(other_id, score)]} for every
+        heap that changed, for the caller to persist.
+        Use score=False to re-index listings whose matches are already stored.
+        """
+        with self._lock:
+            listings = sorted((l for l in listings if l["id"] not in self.listings), key=lambda l: l["id"])
+            if not listings:
+                return {}
+            vectors = self.encoder.fit_encode([self.text(l) for l in listings])
+
+            # index and match in id order, a chunk at a time, so a bulk catch-up
+            # only over-fetches past the later listings of the current chunk
+            changed = set()
+            for start in range(0, len(listings), MATCH_CHUNK):
+                chunk = listings[start:start + MATCH_CHUNK]
+                self._index(chunk, vectors[start:start + MATCH_CHUNK])
+                if score:
+                    changed |= self._match(chunk)
+            return {i: self._sorted(i) for i in changed}
+
+    def _index(self, listings, vectors):
+        for type_ in self.TYPES:
+            rows = [i for i, l in enumerate(listings) if l["type"] == type_]
+            if rows:
+                self.indexes[type_].add([listings[i]["id"] for i in rows], vectors[rows])
+        for l in listings:
+            self.listings[l["id"]] = l
+            self.last_id = max(self.last_id, l["id"])
+
+    def _match(self, listings):
+        """Score listings against earlier opposite listings; ids of changed heaps."""
+        changed = set()
+        for type_ in self.TYPES:
+            group = [l for l in listings if l["type"] == type_]
+            if not group:
+                continue
+            index = self.indexes[self.opposite(type_)]
+            # later listings are skipped (the pair is handled when they are added),
+            # so fetch that many extra for a full pool of earlier candidates
+            other_ids = np.sort(np.asarray(index.ids, dtype=np.int64))
+            later = len(other_ids) - np.searchsorted(other_ids, [l["id"] for l in group], side="right")
+            queries = self.encoder.encode_queries([self.text(l) for l in group])
+            ids, sims = index.search(queries, self.pool + int(later.max()))
+            for item, row_ids, row_sims in zip(group, ids, sims):
+                pool = [(o, sim) for o, sim in zip(row_ids, row_sims) if o < item["id"]][:self.pool]
+                for other_id, sim in pool:
+                    other = self.listings[other_id]
+                    if self._push(item["id"], other_id, self.rerank(other, item, sim)):
+                        changed.add(item["id"])
+                    if self._push(other_id, item["id"], self.rerank(item, other, sim)):
+                        changed.add(other_id)
+        return changed
+
+    def _sorted(self, listing_id):
+        return [(o, s) for s, o in sorted(self.heaps.get(listing_id, []), reverse=True)]
+
+    def matches(self, ids):
+        """{listing_id: [(listing, score)]}, best first."""
+        with self._lock:
+            return {i: [(self.listings[o], s) for o, s in self._sorted(i)] for i in ids}
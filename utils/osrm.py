@@ -0,0 +1,143 @@
+# utils/osrm.py
+import asyncio
+import math
+import threading
+
+import numpy as np
+
+from utils.lazy import lazy_import
+
+aiohttp = lazy_import("aiohttp")
+
+
+class OSRMClient:
+    """
+    Async OSRM HTTP client shared by every Streamlit session in the process.
+
+    - One pooled aiohttp session (keep-alive connections) on a background loop
+    - Identical in-flight requests are coalesced into a single upstream call
+    - /table lookups batch one origin against many destinations
+
+    The sync wrappers (route, table) are safe to call from any script thread.
+    """
+
+    def __init__(self, base_url="http://router.project-osrm.org", profile="driving",
+                 timeout=6, pool_size=20, table_chunk=99):
+        self.base_url = base_url.rstrip("/")
+        self.profile = profile
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.table_chunk = table_chunk
+
+        self._session = None
+        self._inflight = {}
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self.upstream_calls = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="osrm-client", daemon=True)
+        self._thread.start()
+
+    # ---------------- HTTP (runs on the client loop) ----------------
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def _fetch(self, url):
+        session = await self._get_session()
+        self.upstream_calls += 1
+        async with session.get(url) as resp:
+            resp.raise_for_status()
+            return await resp.json(content_type=None)
+
+    async def get_json(self, url):
+        """GET url as JSON; concurrent callers for the same url share one request."""
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(url))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _coords(points):
+        return ";".join(f"{lon},{lat}" for lat, lon in points)
+
+    async def route_async(self, origin, dest):
+        """Route between (lat, lon) points: {"coords", "distance_km"}."""
+        url = (f"{self.base_url}/route/v1/{self.profile}/{self._coords([origin, dest])}"
+               f"?overview=full&geometries=geojson")
+        route = (await self.get_json(url))["routes"][0]
+        return {"coords": route["geometry"]["coordinates"],
+                "distance_km": route["distance"] / 1000}
+
+    async def table_async(self, origin, destinations):
+        """
+        Road distance (km) and duration (min) from origin to every destination.
+        Destinations are split into chunks fetched concurrently, at most
+        pool_size at a time (so each request's timeout covers only itself);
+        each request also carries the origin, so table_chunk + 1 must stay within
+        the server's --max-table-size (100 by default).
+        Unreachable destinations come back as NaN.
+        """
+        destinations = list(destinations)
+        chunks = [destinations[i:i + self.table_chunk]
+                  for i in range(0, len(destinations), self.table_chunk)]
+        slots = asyncio.Semaphore(self.pool_size)
+
+        async def one(chunk):
+            url = (f"{self.base_url}/table/v1/{self.profile}/{self._coords([origin, *chunk])}"
+                   f"?sources=0&annotations=distance,duration")
+            async with slots:
+                data = await self.get_json(url)
+            dist = np.array(data["distances"][0][1:], dtype=np.float64)
+            dur = np.array(data["durations"][0][1:], dtype=np.float64)
+            return dist / 1000, dur / 60
+
+        results = await asyncio.gather(*(one(c) for c in chunks))
+        if not results:
+            return np.empty(0), np.empty(0)
+        return (np.concatenate([r[0] for r in results]),
+                np.concatenate([r[1] for r in results]))
+
+    # ---------------- Sync wrappers (any thread) ----------------
+
+    def _run(self, coro, waves=1):
+        """Run coro on the client loop; allow `waves` back-to-back request timeouts."""
+        if self._closed:
+            coro.close()
+            raise RuntimeError("OSRM client is closed")
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        return future.result(timeout=self.timeout * waves + 1)
+
+    def route(self, origin, dest):
+        return self._run(self.route_async(origin, dest))
+
+    def table(self, origin, destinations):
+        destinations = list(destinations)
+        chunks = math.ceil(len(destinations) / self.table_chunk)
+        return self._run(self.table_async(origin, destinations),
+                         waves=max(math.ceil(chunks / self.pool_size), 1))
+
+    def close(self):
+        """Close the session and stop the loop thread; safe to call more than once."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        if not self._loop.is_running():
+            return
+
+        async def _close():
+            if self._session is not None:
+                await self._session.close()
+        try:
+            asyncio.run_coroutine_threadsafe(_close(), self._loop).result(timeout=self.timeout + 1)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
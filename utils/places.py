@@ -0,0 +1,221 @@
+# utils/places.py
+import csv
+import hashlib
+import json
+import re
+from pathlib import Path
+
+import pandas as pd
+
+from utils.cache import cached, file_version
+from utils.lazy import available, lazy_import
+from utils.spatial import GridIndex
+
+if available("pyarrow"):  # imported on first cache read/write
+    pa = lazy_import("pyarrow")
+    feather = lazy_import("pyarrow.feather")
+else:  # cache falls back to pickle
+    pa = None
+    feather = None
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+PLACES_FILE = DATA_DIR / "places.csv"
+CACHE_DIR = DATA_DIR / ".cache"
+
+COLUMNS = ["id", "name", "category", "lat", "lon", "rating", "vibes", "popularity", "img", "desc"]
+CHUNK_ROWS = 50_000
+
+# =========================================================
+# Source readers (stream rows, never the whole file at once)
+# =========================================================
+
+def _iter_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def _iter_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _iter_geojson(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    for feature in data.get("features", []):
+        props = dict(feature.get("properties") or {})
+        lon, lat = feature["geometry"]["coordinates"][:2]
+        props.setdefault("lat", lat)
+        props.setdefault("lon", lon)
+        yield props
+
+
+READERS = {
+    ".csv": _iter_csv,
+    ".jsonl": _iter_jsonl,
+    ".geojson": _iter_geojson,
+}
+
+
+def normalize_vibes(value):
+    """Vibes as a clean list: accepts lists or 'a|b', 'a;b', 'a,b' strings."""
+    if value is None or (isinstance(value, float) and value != value):
+        return []
+    if isinstance(value, str):
+        value = re.split(r"[|;,]", value)
+    seen = []
+    for v in value:
+        v = str(v).strip().lower()
+        if v and v not in seen:
+            seen.append(v)
+    return seen
+
+
+def _typed_frame(rows):
+    """Build a DataFrame chunk with fixed column dtypes."""
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    df["id"] = pd.to_numeric(df["id"]).astype("int64")
+    df["lat"] = pd.to_numeric(df["lat"]).astype("float64")
+    df["lon"] = pd.to_numeric(df["lon"]).astype("float64")
+    df["rating"] = pd.to_numeric(df["rating"]).fillna(0).astype("float32")
+    df["popularity"] = pd.to_numeric(df["popularity"]).fillna(0).astype("int32")
+    for col in ["name", "category", "img", "desc"]:
+        df[col] = df[col].fillna("").astype(str)
+    return df
+
+
+def read_places_source(path):
+    """Parse a CSV/JSONL/GeoJSON POI file in chunks into one typed DataFrame."""
+    path = Path(path)
+    reader = READERS.get(path.suffix.lower())
+    if reader is None:
+        raise ValueError(f"Unsupported places file type: {path.suffix}")
+
+    chunks, rows = [], []
+    for raw in reader(path):
+        row = {c: raw.get(c) for c in COLUMNS}
+        row["vibes"] = normalize_vibes(raw.get("vibes"))
+        rows.append(row)
+        if len(rows) >= CHUNK_ROWS:
+            chunks.append(_typed_frame(rows))
+            rows = []
+    if rows or not chunks:
+        chunks.append(_typed_frame(rows))
+
+    df = pd.concat(chunks, ignore_index=True)
+    df["category"] = df["category"].astype("category")
+    return df
+
+# =========================================================
+# Columnar cache (Feather, memory-mapped on read)
+# =========================================================
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cache_paths(path):
+    # same-named sources in different directories get their own cache files
+    where = hashlib.sha256(str(Path(path).resolve()).encode()).hexdigest()[:12]
+    stem = f"{Path(path).name}-{where}"
+    ext = ".feather" if feather is not None else ".pkl"
+    return CACHE_DIR / f"{stem}{ext}", CACHE_DIR / f"{stem}.meta.json"
+
+
+def _cache_is_fresh(path, data_path, meta_path):
+    """Fresh if mtime/size match, or if the content hash still matches."""
+    if not (data_path.exists() and meta_path.exists()):
+        return False
+    try:
+        meta = json.loads(meta_path.read_text())
+    except ValueError:
+        return False
+
+    stat = Path(path).stat()
+    if meta.get("mtime_ns") == stat.st_mtime_ns and meta.get("size") == stat.st_size:
+        return True
+    if meta.get("sha256") == _file_hash(path):
+        # touched but unchanged: refresh the stamp, keep the cache
+        meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        meta_path.write_text(json.dumps(meta))
+        return True
+    return False
+
+
+def _write_cache(df, path, data_path, meta_path):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = data_path.with_suffix(data_path.suffix + ".tmp")
+    if feather is not None:
+        feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), tmp,
+                              compression="uncompressed")
+    else:
+        df.to_pickle(tmp)
+    tmp.replace(data_path)
+
+    stat = Path(path).stat()
+    meta_path.write_text(json.dumps({
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": _file_hash(path),
+    }))
+
+
+def _read_cache(data_path):
+    if feather is not None:
+        table = feather.read_table(data_path, memory_map=True)
+        df = table.drop(["vibes"]).to_pandas()
+        df.insert(COLUMNS.index("vibes"), "vibes", table.column("vibes").to_pylist())
+        return df
+    return pd.read_pickle(data_path)
+
+
+def load_places(path=PLACES_FILE):
+    """
+    Load POIs from path, using the columnar cache when it is still fresh.
+    The cache is rebuilt when the source file's content changes.
+    """
+    data_path, meta_path = _cache_paths(path)
+    if _cache_is_fresh(path, data_path, meta_path):
+        try:
+            return _read_cache(data_path)
+        except (OSError, ValueError):
+            pass  # corrupt cache: rebuild below
+
+    df = read_places_source(path)
+    try:
+        _write_cache(df, path, data_path, meta_path)
+    except OSError:
+        pass  # read-only deployments still get the parsed frame
+    return df
+
+
+# =========================================================
+# Shared copies (one per process and file version)
+# =========================================================
+
+@cached()
+def _shared_places(version):
+    return load_places(version[0])
+
+
+@cached()
+def _shared_index(version):
+    df = _shared_places(version)
+    return GridIndex(df["lat"].to_numpy(), df["lon"].to_numpy())
+
+
+def load_places_shared(path=PLACES_FILE):
+    """POIs shared by every session and page (shallow copy per caller)."""
+    return _shared_places(file_version(path)).copy(deep=False)
+
+
+def load_places_index(path=PLACES_FILE):
+    """Spatial grid index over POIs (built once per places file version)."""
+    return _shared_index(file_version(path))
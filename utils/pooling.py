@@ -0,0 +1,172 @@
+# utils/pooling.py
+"""
+Ride-pool planner for Travel Sharing.
+
+Trips with seats > 0 are cars offering that many free seats (plus the
+driver); trips with seats < 0 are riders needing that many seats. For one
+destination the planner fills cars with riders, packs everyone left over
+into shared cabs, then tries to empty cabs by moving their riders into
+spare seats elsewhere. Every vehicle costs base_cost, so fewer vehicles
+means a lower cost per person.
+
+Every member of a vehicle departs within time_window hours of the
+vehicle's anchor trip (the car's own trip, or the cab's first rider).
+"""
+import bisect
+from dataclasses import dataclass, field
+
+CANDIDATES_PER_RIDER = 20  # nearest-in-time cars with room considered per rider
+MAX_SEARCH_PASSES = 3
+
+
+@dataclass
+class Vehicle:
+    kind: str  # "car" or "cab"
+    anchor: dict  # trip that sets the departure time
+    capacity: int  # seats for riders
+    riders: list = field(default_factory=list)
+    used: int = 0  # seats taken by riders
+    cost_per_person: float = 0.0
+
+    def __post_init__(self):
+        self.ts = self.anchor["datetime"].timestamp()
+
+    def add(self, rider):
+        self.riders.append(rider)
+        self.used -= rider["seats"]
+
+    @property
+    def free(self):
+        return self.capacity - self.used
+
+    @property
+    def persons(self):
+        return self.used + (1 if self.kind == "car" else 0)
+
+
+def _outward(times, ts, window_s):
+    """Indexes of times within ±window_s of ts, nearest first."""
+    lo = bisect.bisect_left(times, ts - window_s)
+    hi = bisect.bisect_right(times, ts + window_s)
+    left = bisect.bisect_left(times, ts, lo, hi) - 1
+    right = left + 1
+    while left >= lo or right < hi:
+        if right < hi and (left < lo or times[right] - ts <= ts - times[left]):
+            yield right
+            right += 1
+        else:
+            yield left
+            left -= 1
+
+
+def _fill_cars(cars, riders, window_s, route_scores):
+    """Greedy: each rider (largest groups first) takes the best nearby car with room."""
+    open_cars = sorted(cars, key=lambda v: v.ts)
+    times = [v.ts for v in open_cars]
+    left = []
+    for rider in sorted(riders, key=lambda r: (r["seats"], r["datetime"])):
+        ts = rider["datetime"].timestamp()
+        need = -rider["seats"]
+        candidates = []
+        for j in _outward(times, ts, window_s):
+            if open_cars[j].free >= need:
+                candidates.append(j)
+                if len(candidates) == CANDIDATES_PER_RIDER:
+                    break
+        if not candidates:
+            left.append(rider)
+            continue
+        similarity = route_scores(rider, [open_cars[j].anchor for j in candidates])
+        # tighter fit first, then similar start point, then closer in time
+        best = min(range(len(candidates)), key=lambda c: (
+            open_cars[candidates[c]].free - need, -similarity[c], abs(times[candidates[c]] - ts)))
+        j = candidates[best]
+        car = open_cars[j]
+        car.add(rider)
+        if car.free == 0:
+            del open_cars[j], times[j]
+    return left
+
+
+def _pack_cabs(riders, window_s, cab_capacity):
+    """Sweep riders in time order, first-fit into cabs still open in the window."""
+    cabs, open_cabs = [], []
+    for rider in sorted(riders, key=lambda r: r["datetime"]):
+        ts = rider["datetime"].timestamp()
+        open_cabs = [c for c in open_cabs if ts - c.ts <= window_s and c.free > 0]
+        cab = next((c for c in open_cabs if c.free >= -rider["seats"]), None)
+        if cab is None:
+            cab = Vehicle("cab", rider, max(cab_capacity, -rider["seats"]))
+            cabs.append(cab)
+            open_cabs.append(cab)
+        cab.add(rider)
+    return cabs
+
+
+def _dissolve_cabs(vehicles, window_s):
+    """
+    Local search: try to empty each cab (emptiest first) by moving all of
+    its riders into spare seats of vehicles departing close enough.
+    Only vehicles with free seats are searched.
+    """
+    open_ = sorted((v for v in vehicles if v.free > 0), key=lambda v: v.ts)
+    times = [v.ts for v in open_]
+
+    def close(vehicle):
+        i = bisect.bisect_left(times, vehicle.ts)
+        while open_[i] is not vehicle:
+            i += 1
+        del open_[i], times[i]
+
+    removed = set()
+    for _ in range(MAX_SEARCH_PASSES):
+        changed = False
+        cabs = [v for v in vehicles if v.kind == "cab" and id(v) not in removed]
+        for cab in sorted(cabs, key=lambda v: v.used):
+            pending, moves = {}, []
+            for rider in sorted(cab.riders, key=lambda r: r["seats"]):
+                need = -rider["seats"]
+                target = next((open_[j] for j in _outward(times, rider["datetime"].timestamp(), window_s)
+                               if open_[j] is not cab and open_[j].free - pending.get(id(open_[j]), 0) >= need),
+                              None)
+                if target is None:
+                    break
+                pending[id(target)] = pending.get(id(target), 0) + need
+                moves.append((rider, target))
+            if len(moves) < len(cab.riders):
+                continue
+            for rider, target in moves:
+                target.add(rider)
+            for target in {id(t): t for _, t in moves}.values():
+                if target.free == 0:
+                    close(target)
+            if cab.free > 0:
+                close(cab)
+            cab.riders, cab.used = [], 0
+            removed.add(id(cab))
+            changed = True
+        if not changed:
+            break
+    return [v for v in vehicles if id(v) not in removed]
+
+
+def plan_pools(trips, route_scores, time_window=3, base_cost=600, cab_capacity=4):
+    """
+    Group one destination's trips into vehicles.
+    route_scores(trip, others) rates how close trip's starting point is to
+    each of others' (array of 0–1 scores).
+    Returns (vehicles, idle_cars): vehicles carry at least one rider, in
+    departure order; idle cars found no riders.
+    """
+    window_s = time_window * 3600
+    cars = [Vehicle("car", t, t["seats"]) for t in trips if t["seats"] > 0]
+    riders = [t for t in trips if t["seats"] < 0]
+
+    left = _fill_cars(cars, riders, window_s, route_scores)
+    # idle cars stay in the search so they can still take riders out of cabs
+    vehicles = _dissolve_cabs(cars + _pack_cabs(left, window_s, cab_capacity), window_s)
+    vehicles = [v for v in vehicles if v.riders]
+
+    for v in vehicles:
+        v.cost_per_person = round(base_cost / max(v.persons, 1), 2)
+    return vehicles, [c for c in cars if not c.riders]
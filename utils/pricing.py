@@ -0,0 +1,178 @@
+# utils/pricing.py
+"""
+Streaming price model for the Buy/Sell Marketplace.
+
+Every (category, condition) group keeps a running mean and P² quantile
+markers (Jain & Chlamtac) for its listed prices. Adding a listing is O(1)
+and reading a recommendation never touches listing history. Groups with
+too few listings fall back to prior prices.
+"""
+import bisect
+import json
+import threading
+
+QUANTILES = (0.1, 0.5, 0.9)
+
+
+class P2Quantile:
+    """Single streaming quantile estimate with five markers (P² algorithm)."""
+
+    def __init__(self, p):
+        self.p = p
+        self.q = []  # marker heights (the first 5 values, sorted, until warm)
+        self.n = [0, 1, 2, 3, 4]  # marker positions
+        self.want = [0, 2 * p, 4 * p, 2 + 2 * p, 4]  # desired positions
+        self.step = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        q, n = self.q, self.n
+        if len(q) < 5:
+            bisect.insort(q, x)
+            return
+
+        if x < q[0]:
+            q[0], k = x, 0
+        elif x >= q[4]:
+            q[4], k = x, 3
+        else:
+            k = bisect.bisect_right(q, x) - 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.want[i] += self.step[i]
+
+        for i in (1, 2, 3):
+            d = self.want[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = qp
+                n[i] += d
+
+    def value(self):
+        if not self.q:
+            return None
+        if len(self.q) < 5:
+            return self.q[round(self.p * (len(self.q) - 1))]
+        return self.q[2]
+
+    def to_dict(self):
+        return {"p": self.p, "q": self.q, "n": self.n, "want": self.want}
+
+    @classmethod
+    def from_dict(cls, data):
+        est = cls(data["p"])
+        est.q, est.n, est.want = data["q"], data["n"], data["want"]
+        return est
+
+
+class PriceStats:
+    """Count, running mean and QUANTILES for one group of prices."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.quantiles = {p: P2Quantile(p) for p in QUANTILES}
+
+    def add(self, price):
+        self.count += 1
+        self.mean += (price - self.mean) / self.count
+        for est in self.quantiles.values():
+            est.add(price)
+
+    def quantile(self, p):
+        return self.quantiles[p].value()
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean,
+                "quantiles": [est.to_dict() for est in self.quantiles.values()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count, stats.mean = data["count"], data["mean"]
+        for est in data["quantiles"]:
+            stats.quantiles[est["p"]] = P2Quantile.from_dict(est)
+        return stats
+
+
+class PriceModel:
+    """
+    Per-(category, condition) price sketches learned from listings.
+
+    recommend() blends the group median with the prior price, weighting
+    the prior as prior_weight pseudo-listings, so a new group starts at the
+    prior and moves to the data as listings arrive. band() blends the
+    group's 10th–90th percentile range with the prior's ±prior_spread range
+    the same way, once the group has min_samples listings, and is never
+    narrower than ±min_spread around the recommendation.
+    """
+
+    def __init__(self, priors, prior_weight=5, min_samples=10, round_to=50,
+                 prior_spread=0.25, min_spread=0.1):
+        self.priors = priors
+        self.prior_weight = prior_weight
+        self.min_samples = min_samples
+        self.round_to = round_to
+        self.prior_spread = prior_spread
+        self.min_spread = min_spread
+        self.groups = {}  # (category, condition) -> PriceStats
+        self.last_id = 0
+        self._lock = threading.RLock()
+
+    def add(self, listing):
+        with self._lock:
+            if listing["id"] <= self.last_id:
+                return
+            key = (listing["category"], listing["condition"])
+            self.groups.setdefault(key, PriceStats()).add(listing["price"])
+            self.last_id = listing["id"]
+
+    def _blend(self, prior, observed, n):
+        return (prior * self.prior_weight + observed * n) / (self.prior_weight + n)
+
+    def recommend(self, category, condition):
+        prior = self.priors[category][condition]
+        with self._lock:
+            stats = self.groups.get((category, condition))
+            if stats is None or not stats.count:
+                return prior
+            median, n = stats.quantile(0.5), stats.count
+        blended = self._blend(prior, median, n)
+        return int(round(blended / self.round_to) * self.round_to)
+
+    def band(self, category, condition):
+        """(low, high) typical price range, or None while the group is too small."""
+        prior = self.priors[category][condition]
+        with self._lock:
+            stats = self.groups.get((category, condition))
+            if stats is None or stats.count < self.min_samples:
+                return None
+            q10, q90, n = stats.quantile(0.1), stats.quantile(0.9), stats.count
+        low = self._blend(prior * (1 - self.prior_spread), q10, n)
+        high = self._blend(prior * (1 + self.prior_spread), q90, n)
+        # identical prices give a zero-width range; keep room around the recommendation
+        rec = self.recommend(category, condition)
+        return min(low, rec * (1 - self.min_spread)), max(high, rec * (1 + self.min_spread))
+
+    def stats(self, category, condition):
+        with self._lock:
+            return self.groups.get((category, condition))
+
+    def dumps(self):
+        with self._lock:
+            return json.dumps({
+                "last_id": self.last_id,
+                "groups": [[c, k, s.to_dict()] for (c, k), s in self.groups.items()],
+            })
+
+    def loads(self, text):
+        data = json.loads(text)
+        with self._lock:
+            self.last_id = data["last_id"]
+            self.groups = {(c, k): PriceStats.from_dict(s) for c, k, s in data["groups"]}
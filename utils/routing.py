@@ -0,0 +1,285 @@
+# utils/routing.py
+import heapq
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from utils.geo import haversine_np
+from utils.osrm import OSRMClient
+from utils.spatial import GridIndex
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+WALKWAYS_FILE = DATA_DIR / "campus_walkways.json"
+ROUTE_CACHE_FILE = DATA_DIR / ".cache" / "routes.sqlite"
+
+# =========================================================
+# Offline walkway graph (A* with landmark heuristics)
+# =========================================================
+
+class WalkGraph:
+    """
+    Undirected walkway graph with edge lengths in km.
+
+    Shortest paths use A* with the ALT heuristic: the larger of the
+    straight-line distance and the triangle-inequality bound from a few
+    precomputed landmarks, which keeps the search focused on the target.
+    """
+
+    def __init__(self, lats, lons, edges, names=None, n_landmarks=4):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.names = names or [""] * len(self.lats)
+        self.size = len(self.lats)
+
+        self.adj = [[] for _ in range(self.size)]
+        for a, b, km in edges:
+            self.adj[a].append((b, km))
+            self.adj[b].append((a, km))
+
+        self.index = GridIndex(self.lats, self.lons)
+        self.landmarks = self._pick_landmarks(n_landmarks)
+        self.landmark_dist = np.array([self.dijkstra(l) for l in self.landmarks]) \
+            if self.landmarks else np.zeros((0, self.size))
+
+    @classmethod
+    def from_file(cls, path=WALKWAYS_FILE):
+        """Load {"nodes": [{id, lat, lon, name}], "edges": [[a, b, km?]]} JSON."""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        ids = [n["id"] for n in data["nodes"]]
+        pos = {node_id: i for i, node_id in enumerate(ids)}
+        lats = [n["lat"] for n in data["nodes"]]
+        lons = [n["lon"] for n in data["nodes"]]
+        names = [n.get("name", "") for n in data["nodes"]]
+
+        edges = []
+        for edge in data["edges"]:
+            a, b = pos[edge[0]], pos[edge[1]]
+            if len(edge) > 2:
+                km = float(edge[2])
+            else:
+                km = float(haversine_np([lats[b]], [lons[b]], (lats[a], lons[a]))[0])
+            edges.append((a, b, km))
+        return cls(lats, lons, edges, names)
+
+    def _pick_landmarks(self, k):
+        """Farthest-point landmarks spread across the graph."""
+        if self.size == 0 or k <= 0:
+            return []
+        landmarks = [0]
+        min_dist = self.dijkstra(0)
+        while len(landmarks) < min(k, self.size):
+            reachable = np.where(np.isfinite(min_dist), min_dist, -1)
+            nxt = int(np.argmax(reachable))
+            if reachable[nxt] <= 0:
+                break
+            landmarks.append(nxt)
+            min_dist = np.minimum(min_dist, self.dijkstra(nxt))
+        return landmarks
+
+    def dijkstra(self, src):
+        """Shortest distance (km) from src to every node (inf if unreachable)."""
+        dist = np.full(self.size, np.inf)
+        dist[src] = 0.0
+        heap = [(0.0, src)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, km in self.adj[u]:
+                nd = d + km
+                if nd < dist[v]:
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return dist
+
+    def snap(self, origin):
+        """Nearest graph node to origin (lat, lon): (node, km_to_node)."""
+        idx, dist = self.index.nearest(origin, k=1)
+        return int(idx[0]), float(dist[0])
+
+    def _heuristic(self, target):
+        h = haversine_np(self.lats, self.lons, (self.lats[target], self.lons[target]))
+        if len(self.landmarks):
+            alt = np.abs(self.landmark_dist - self.landmark_dist[:, [target]])
+            alt = np.nan_to_num(alt, nan=0.0, posinf=0.0).max(axis=0)
+            h = np.maximum(h, alt)
+        return h
+
+    def shortest_path(self, src, dst):
+        """A* path between node indices: (node list, km) or (None, inf)."""
+        h = self._heuristic(dst)
+        g = {src: 0.0}
+        parent = {src: None}
+        heap = [(h[src], src)]
+        closed = set()
+
+        while heap:
+            _, u = heapq.heappop(heap)
+            if u == dst:
+                path = []
+                while u is not None:
+                    path.append(u)
+                    u = parent[u]
+                return path[::-1], g[dst]
+            if u in closed:
+                continue
+            closed.add(u)
+            for v, km in self.adj[u]:
+                nd = g[u] + km
+                if nd < g.get(v, np.inf):
+                    g[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd + h[v], v))
+        return None, np.inf
+
+# =========================================================
+# Routing backends
+# =========================================================
+
+class LocalBackend:
+    """Routes over the campus walkway graph; no network needed."""
+
+    name = "local"
+
+    def __init__(self, graph, max_snap_km=1.0):
+        self.graph = graph
+        self.max_snap_km = max_snap_km
+
+    def cache_key(self, origin, dest):
+        """None when either end is too far off the graph (never served from cache)."""
+        src, src_km = self.graph.snap(origin)
+        dst, dst_km = self.graph.snap(dest)
+        if src_km > self.max_snap_km or dst_km > self.max_snap_km:
+            return None
+        return f"{self.name}:{src}:{dst}"
+
+    def route(self, origin, dest):
+        src, src_km = self.graph.snap(origin)
+        dst, dst_km = self.graph.snap(dest)
+        if src_km > self.max_snap_km or dst_km > self.max_snap_km:
+            return None
+
+        path, km = self.graph.shortest_path(src, dst)
+        if path is None:
+            return None
+        coords = [[float(self.graph.lons[n]), float(self.graph.lats[n])] for n in path]
+        return {"coords": coords, "distance_km": km}
+
+    def finalize(self, route, origin, dest):
+        """Cached paths run node-to-node; attach the exact endpoints."""
+        _, src_km = self.graph.snap(origin)
+        _, dst_km = self.graph.snap(dest)
+        return dict(
+            route,
+            coords=[[origin[1], origin[0]], *route["coords"], [dest[1], dest[0]]],
+            distance_km=route["distance_km"] + src_km + dst_km,
+        )
+
+
+class OSRMBackend:
+    """Remote OSRM HTTP API (public demo server unless base_url is given)."""
+
+    name = "osrm"
+
+    def __init__(self, base_url="http://router.project-osrm.org", profile="driving", timeout=6):
+        self.client = OSRMClient(base_url, profile=profile, timeout=timeout)
+
+    def cache_key(self, origin, dest):
+        # ~10 m snapping so nearby repeat lookups share a cache entry
+        return f"{self.name}:{origin[0]:.4f},{origin[1]:.4f}:{dest[0]:.4f},{dest[1]:.4f}"
+
+    def route(self, origin, dest):
+        try:
+            return self.client.route(origin, dest)
+        except Exception:
+            return None
+
+    def table(self, origin, lats, lons):
+        """Road (km, min) arrays from origin to each point, or None on failure."""
+        try:
+            return self.client.table(origin, zip(lats, lons))
+        except Exception:
+            return None
+
+    def finalize(self, route, origin, dest):
+        return route
+
+# =========================================================
+# Persistent LRU route cache
+# =========================================================
+
+class RouteCache:
+    """SQLite-backed LRU cache of routes keyed by backend + snapped endpoints."""
+
+    def __init__(self, path=ROUTE_CACHE_FILE, max_entries=5000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS routes ("
+            "key TEXT PRIMARY KEY, route TEXT NOT NULL, used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS routes_used ON routes(used)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT route FROM routes WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE routes SET used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key, route):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO routes (key, route, used) VALUES (?, ?, ?)",
+                (key, json.dumps(route), time.time()),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM routes").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM routes WHERE key IN "
+                    "(SELECT key FROM routes ORDER BY used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+
+class Router:
+    """Tries the allowed backends in order, serving repeat lookups from the route cache."""
+
+    def __init__(self, backends, cache=None):
+        self.backends = {b.name: b for b in backends}
+        self.cache = cache
+
+    def route(self, origin, dest, backends=("local",)):
+        """
+        Route between (lat, lon) points, trying only the named backends, in order
+        (e.g. ("osrm", "local") falls back to the walkway graph, never the reverse).
+        Returns {"coords": [[lon, lat], ...], "distance_km", "source"} or None.
+        """
+        for name in backends:
+            backend = self.backends.get(name)
+            if backend is None:
+                continue
+            key = backend.cache_key(origin, dest)
+            route = self.cache.get(key) if self.cache and key is not None else None
+            if route is None:
+                route = backend.route(origin, dest)
+                if route is None:
+                    continue
+                route["source"] = name
+                if self.cache and key is not None:
+                    self.cache.put(key, route)
+            return backend.finalize(route, origin, dest)
+        return None
@@ -0,0 +1,94 @@
+# utils/search.py
+import bisect
+import math
+import re
+import threading
+from collections import defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    Incremental full-text index with BM25 ranking.
+
+    Every query token also matches as a prefix ("sams" finds "samsung"),
+    so results update while the student is still typing. Prefix matches
+    are found by binary search over the sorted vocabulary and score a bit
+    lower than exact matches. A document must match every query token.
+    """
+
+    PREFIX_WEIGHT = 0.6
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)  # term -> {doc_id: term frequency}
+        self.doc_len = {}
+        self.total_len = 0
+        self.vocab = []  # sorted terms, for prefix lookups
+        self.last_id = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    def add(self, doc_id, text):
+        tokens = tokenize(text)
+        with self._lock:
+            if doc_id in self.doc_len:
+                return
+            counts = defaultdict(int)
+            for t in tokens:
+                counts[t] += 1
+            for term, tf in counts.items():
+                if term not in self.postings:
+                    bisect.insort(self.vocab, term)
+                self.postings[term][doc_id] = tf
+            self.doc_len[doc_id] = len(tokens)
+            self.total_len += len(tokens)
+            self.last_id = max(self.last_id, doc_id)
+
+    def _expand(self, token):
+        """Vocabulary terms starting with token: [(term, weight)]."""
+        i = bisect.bisect_left(self.vocab, token)
+        terms = []
+        while i < len(self.vocab) and self.vocab[i].startswith(token):
+            term = self.vocab[i]
+            terms.append((term, 1.0 if term == token else self.PREFIX_WEIGHT))
+            i += 1
+        return terms
+
+    def search(self, query, limit=None, offset=0):
+        """Ranked doc ids for query: (ids for the requested page, total matches)."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return [], 0
+
+        with self._lock:
+            n = len(self.doc_len)
+            avgdl = self.total_len / n if n else 0.0
+            scores = None
+            for token in tokens:
+                token_scores = defaultdict(float)
+                for term, weight in self._expand(token):
+                    docs = self.postings[term]
+                    idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                    for doc_id, tf in docs.items():
+                        norm = self.k1 * (1 - self.b + self.b * self.doc_len[doc_id] / avgdl)
+                        s = weight * idf * tf * (self.k1 + 1) / (tf + norm)
+                        token_scores[doc_id] = max(token_scores[doc_id], s)
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {d: scores[d] + s for d, s in token_scores.items() if d in scores}
+                if not scores:
+                    return [], 0
+
+        ranked = sorted(scores, key=lambda d: (-scores[d], -d))
+        end = None if limit is None else offset + limit
+        return ranked[offset:end], len(ranked)
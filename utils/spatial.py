@@ -0,0 +1,96 @@
+# utils/spatial.py
+import math
+import numpy as np
+from utils.geo import EARTH_RADIUS_KM, haversine_np
+
+KM_PER_DEG_LAT = math.radians(EARTH_RADIUS_KM)  # same sphere as haversine, so boxes never undershoot
+
+
+class GridIndex:
+    """
+    Spatial index over lat/lon points using a fixed-size grid of cells.
+
+    Points are sorted by (row, col) cell key, so every grid row inside a
+    query's bounding box is one contiguous slice found with binary search.
+    Only points in those slices get an exact haversine check.
+    """
+
+    def __init__(self, lats, lons, cell_km=0.25):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.cell_km = cell_km
+        self.size = len(self.lats)
+
+        self.dlat = cell_km / KM_PER_DEG_LAT
+        self.dlon = self.dlat  # cells are square in degrees; queries widen by latitude
+
+        rows = np.floor(self.lats / self.dlat).astype(np.int64)
+        cols = np.floor(self.lons / self.dlon).astype(np.int64)
+        self._col_span = int(cols.max() - cols.min() + 2) if self.size else 1
+        self._col_min = int(cols.min()) if self.size else 0
+        keys = rows * self._col_span + (cols - self._col_min)
+
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+        self._row_min = int(rows.min()) if self.size else 0
+        self._row_max = int(rows.max()) if self.size else -1
+
+    def _candidates(self, origin, radius_km):
+        """Point indices in the grid cells overlapping the query's bounding box."""
+        lat, lon = origin
+        dlat = radius_km / KM_PER_DEG_LAT
+        max_lat = min(abs(lat) + dlat, 89.9)
+        dlon = radius_km / (KM_PER_DEG_LAT * math.cos(math.radians(max_lat)))
+
+        r0 = max(math.floor((lat - dlat) / self.dlat), self._row_min)
+        r1 = min(math.floor((lat + dlat) / self.dlat), self._row_max)
+        if r0 > r1:
+            return np.empty(0, dtype=np.int64)
+
+        c0 = max(math.floor((lon - dlon) / self.dlon) - self._col_min, 0)
+        c1 = min(math.floor((lon + dlon) / self.dlon) - self._col_min, self._col_span - 1)
+        if c0 > c1:
+            return np.empty(0, dtype=np.int64)
+
+        rows = np.arange(r0, r1 + 1, dtype=np.int64) * self._col_span
+        starts = np.searchsorted(self._keys, rows + c0, side="left")
+        ends = np.searchsorted(self._keys, rows + c1, side="right")
+        slices = [self._order[s:e] for s, e in zip(starts, ends) if e > s]
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def query_radius(self, origin, radius_km):
+        """
+        Points within radius_km of origin (lat, lon).
+        Returns (indices, distances_km) sorted by distance.
+        """
+        idx = self._candidates(origin, radius_km)
+        if idx.size == 0:
+            return idx, np.empty(0)
+        dist = haversine_np(self.lats[idx], self.lons[idx], origin)
+        keep = dist <= radius_km
+        idx, dist = idx[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")
+        return idx[order], dist[order]
+
+    def nearest(self, origin, k=1):
+        """
+        k nearest points to origin (lat, lon).
+        Searches a growing radius until at least k points fall inside it.
+        Returns (indices, distances_km) sorted by distance.
+        """
+        k = min(k, self.size)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        radius = self.cell_km
+        while True:
+            idx, dist = self.query_radius(origin, radius)
+            if len(idx) >= k:
+                return idx[:k], dist[:k]
+            if radius > 2 * math.pi * 6371:
+                break
+            radius *= 2
+
+        dist = haversine_np(self.lats, self.lons, origin)
+        idx = np.argsort(dist, kind="stable")[:k]
+        return idx, dist[idx]
@@ -0,0 +1,336 @@
+# utils/store.py
+"""
+Shared SQLite store for Student Exchange records.
+
+Every student sees the same Skill Exchange listings, Lost & Found reports,
+travel plans and marketplace items. The database runs in WAL mode so reads
+never block the writer. Connections come from a small pool, and filter
+columns are indexed so pages can run paginated queries instead of scanning
+Python lists.
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+
+from utils.trips import destination_key
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DB_FILE = DATA_DIR / "exchange.db"
+PAGE_SIZE = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS skill_listings (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    title TEXT NOT NULL,
+    category TEXT NOT NULL,
+    tags TEXT NOT NULL DEFAULT '[]',
+    availability TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS skill_type_created ON skill_listings(type, created);
+CREATE INDEX IF NOT EXISTS skill_type_category ON skill_listings(type, category);
+
+CREATE TABLE IF NOT EXISTS skill_matches (
+    listing_id INTEGER NOT NULL,
+    other_id INTEGER NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (listing_id, other_id)
+);
+
+CREATE TABLE IF NOT EXISTS lost_found (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    location TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,
+    status TEXT NOT NULL,
+    category TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lf_status_created ON lost_found(status, created);
+CREATE INDEX IF NOT EXISTS lf_status_category ON lost_found(status, category);
+
+CREATE TABLE IF NOT EXISTS lost_found_matches (
+    item_id INTEGER NOT NULL,
+    other_id INTEGER NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (item_id, other_id)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS trips (
+    id INTEGER PRIMARY KEY,
+    destination TEXT NOT NULL,
+    destination_key TEXT NOT NULL,
+    start TEXT NOT NULL,
+    datetime TEXT NOT NULL,
+    seats INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trips_dest_time ON trips(destination_key, datetime);
+CREATE INDEX IF NOT EXISTS trips_time ON trips(datetime);
+
+CREATE TABLE IF NOT EXISTS market_listings (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    price INTEGER NOT NULL,
+    recommended INTEGER NOT NULL,
+    flag TEXT NOT NULL,
+    negotiation TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS market_category_price ON market_listings(category, price);
+CREATE INDEX IF NOT EXISTS market_price ON market_listings(price);
+"""
+
+
+class Store:
+    """SQLite (WAL) database with a bounded connection pool."""
+
+    def __init__(self, path=DB_FILE, pool_size=8):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        for _ in range(pool_size):
+            self._pool.put(self._open())
+        with self.connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _open(self):
+        conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connect(self):
+        """Borrow a pooled connection; commits on success, rolls back on error."""
+        conn = self._pool.get()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._pool.put(conn)
+
+    def _insert(self, table, record):
+        record = dict(record, created=time.time())
+        cols = ", ".join(record)
+        marks = ", ".join("?" for _ in record)
+        with self.connect() as conn:
+            cur = conn.execute(f"INSERT INTO {table} ({cols}) VALUES ({marks})", list(record.values()))
+            return cur.lastrowid
+
+    def _select(self, sql, params=()):
+        with self.connect() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _count(self, table, where, params):
+        sql = f"SELECT COUNT(*) FROM {table}" + (f" WHERE {where}" if where else "")
+        return self._select(sql, params)[0][0]
+
+    @staticmethod
+    def _page(limit, offset):
+        if limit is None:
+            return "", []
+        return " LIMIT ? OFFSET ?", [limit, offset]
+
+    # ---------------- Skill & Service Exchange ----------------
+
+    def add_skill_listing(self, listing):
+        return self._insert("skill_listings", dict(listing, tags=json.dumps(listing.get("tags", []))))
+
+    def skill_listings(self, type=None, limit=None, offset=0):
+        where, params = ("type = ?", [type]) if type else ("", [])
+        page, page_params = self._page(limit, offset)
+        rows = self._select(
+            "SELECT * FROM skill_listings" + (f" WHERE {where}" if where else "")
+            + " ORDER BY created DESC, id DESC" + page, params + page_params)
+        return [dict(r, tags=json.loads(r["tags"])) for r in rows]
+
+    def count_skill_listings(self, type=None):
+        return self._count("skill_listings", "type = ?" if type else "", [type] if type else [])
+
+    def skill_listings_since(self, last_id):
+        """Listings with id > last_id, oldest first (for incremental indexing)."""
+        rows = self._select("SELECT * FROM skill_listings WHERE id > ? ORDER BY id", (last_id,))
+        return [dict(r, tags=json.loads(r["tags"])) for r in rows]
+
+    def replace_skill_matches(self, matches):
+        """Overwrite the stored top-k for each listing in {listing_id: [(other_id, score)]}."""
+        if not matches:
+            return
+        with self.connect() as conn:
+            conn.executemany("DELETE FROM skill_matches WHERE listing_id = ?", [(i,) for i in matches])
+            conn.executemany(
+                "INSERT INTO skill_matches (listing_id, other_id, score) VALUES (?, ?, ?)",
+                [(i, o, sc) for i, rows in matches.items() for o, sc in rows])
+
+    def skill_matches(self):
+        """All stored (listing_id, other_id, score) rows."""
+        return [tuple(r) for r in self._select("SELECT listing_id, other_id, score FROM skill_matches")]
+
+    def get_meta(self, key, default=None):
+        rows = self._select("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else default
+
+    def set_meta(self, key, value):
+        with self.connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    # ---------------- Lost & Found ----------------
+
+    def add_lost_found(self, item):
+        return self._insert("lost_found", dict(item, date=item["date"].isoformat()))
+
+    def _lost_found_where(self, status, search):
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if search:
+            clauses.append("lower(name || ' ' || description || ' ' || location) LIKE ?")
+            params.append(f"%{search.lower()}%")
+        return " AND ".join(clauses), params
+
+    def lost_found_items(self, status=None, search=None, limit=None, offset=0):
+        where, params = self._lost_found_where(status, search)
+        page, page_params = self._page(limit, offset)
+        rows = self._select(
+            "SELECT * FROM lost_found" + (f" WHERE {where}" if where else "")
+            + " ORDER BY created DESC, id DESC" + page, params + page_params)
+        return [dict(r, date=date.fromisoformat(r["date"])) for r in rows]
+
+    def count_lost_found(self, status=None, search=None):
+        return self._count("lost_found", *self._lost_found_where(status, search))
+
+    def lost_found_since(self, last_id):
+        """Items with id > last_id, oldest first (for incremental indexing)."""
+        rows = self._select("SELECT * FROM lost_found WHERE id > ? ORDER BY id", (last_id,))
+        return [dict(r, date=date.fromisoformat(r["date"])) for r in rows]
+
+    def lost_found_by_ids(self, ids):
+        """Items for ids, in the same order as ids."""
+        if not ids:
+            return []
+        rows = self._select(
+            f"SELECT * FROM lost_found WHERE id IN ({', '.join('?' for _ in ids)})", list(ids))
+        by_id = {r["id"]: dict(r, date=date.fromisoformat(r["date"])) for r in rows}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def add_lost_found_matches(self, item_id, matches):
+        """Store item_id's [(other_id, score)] matches in both directions."""
+        rows = [(item_id, o, sc) for o, sc in matches] + [(o, item_id, sc) for o, sc in matches]
+        with self.connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO lost_found_matches (item_id, other_id, score) VALUES (?, ?, ?)", rows)
+
+    def lost_found_matches(self, ids, limit=5):
+        """{item_id: [(other_item, score)]}, best first, for the given items."""
+        if not ids:
+            return {}
+        rows = self._select(
+            "SELECT m.item_id, m.score, lf.* FROM lost_found_matches m "
+            "JOIN lost_found lf ON lf.id = m.other_id "
+            f"WHERE m.item_id IN ({', '.join('?' for _ in ids)}) "
+            "ORDER BY m.item_id, m.score DESC", list(ids))
+        found = {}
+        for r in rows:
+            bucket = found.setdefault(r["item_id"], [])
+            if len(bucket) < limit:
+                other = {k: r[k] for k in r.keys() if k not in ("item_id", "score")}
+                bucket.append((dict(other, date=date.fromisoformat(other["date"])), r["score"]))
+        return found
+
+    # ---------------- Travel Sharing ----------------
+
+    def add_trip(self, trip):
+        return self._insert("trips", dict(
+            trip,
+            destination_key=destination_key(trip["destination"]),
+            datetime=trip["datetime"].isoformat(timespec="minutes"),
+        ))
+
+    def trips(self, destination=None, limit=None, offset=0):
+        where, params = ("destination_key = ?", [destination_key(destination)]) if destination else ("", [])
+        page, page_params = self._page(limit, offset)
+        rows = self._select(
+            "SELECT * FROM trips" + (f" WHERE {where}" if where else "")
+            + " ORDER BY datetime, id" + page, params + page_params)
+        return [dict(r, datetime=datetime.fromisoformat(r["datetime"])) for r in rows]
+
+    def count_trips(self):
+        return self._count("trips", "", [])
+
+    def trips_since(self, last_id):
+        """Trips with id > last_id, oldest first (for incremental indexing)."""
+        rows = self._select("SELECT * FROM trips WHERE id > ? ORDER BY id", (last_id,))
+        return [dict(r, datetime=datetime.fromisoformat(r["datetime"])) for r in rows]
+
+    # ---------------- Buy / Sell Marketplace ----------------
+
+    def add_market_listing(self, listing):
+        return self._insert("market_listings", listing)
+
+    def _market_where(self, categories, max_price):
+        clauses, params = [], []
+        if categories is not None:
+            clauses.append(f"category IN ({', '.join('?' for _ in categories)})" if categories else "0")
+            params.extend(categories)
+        if max_price is not None:
+            clauses.append("price <= ?")
+            params.append(max_price)
+        return " AND ".join(clauses), params
+
+    def market_listings(self, categories=None, max_price=None, limit=None, offset=0):
+        where, params = self._market_where(categories, max_price)
+        page, page_params = self._page(limit, offset)
+        rows = self._select(
+            "SELECT * FROM market_listings" + (f" WHERE {where}" if where else "")
+            + " ORDER BY created DESC, id DESC" + page, params + page_params)
+        return [dict(r) for r in rows]
+
+    def count_market_listings(self, categories=None, max_price=None):
+        return self._count("market_listings", *self._market_where(categories, max_price))
+
+    def market_listings_by_ids(self, ids):
+        """Listings for ids, in the same order as ids."""
+        if not ids:
+            return []
+        rows = self._select(
+            f"SELECT * FROM market_listings WHERE id IN ({', '.join('?' for _ in ids)})", list(ids))
+        by_id = {r["id"]: dict(r) for r in rows}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def market_listings_since(self, last_id):
+        """Listings with id > last_id, oldest first (for incremental indexing)."""
+        rows = self._select("SELECT * FROM market_listings WHERE id > ? ORDER BY id", (last_id,))
+        return [dict(r) for r in rows]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The process-wide Store shared by all sessions."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = Store()
+        return _store
@@ -0,0 +1,467 @@
+# utils/summarizer.py
+"""
+Mail summarization service.
+
+- Pluggable backends: Gemini, a local extractive (TextRank) summarizer,
+  or a stub for tests; chosen per request, with automatic fallback to a
+  local backend when the remote one fails, is rate limited or is slow
+- Persistent SQLite cache keyed by a hash of the normalized mail + backend
+- Identical mails being summarized right now share one backend call; every
+  waiting session streams the same chunks as they arrive
+- Token-bucket rate limit on backend calls
+"""
+import hashlib
+import queue
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from dateutil import parser as date_parser
+
+from utils.lazy import lazy_import
+
+genai = lazy_import("google.generativeai")  # only needed once Gemini is used
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+SUMMARY_CACHE_FILE = DATA_DIR / ".cache" / "summaries.sqlite"
+
+PROMPT_VERSION = 1
+PROMPT = """
+You are a college assistant AI.
+
+Summarize the following mail in simple student-friendly language.
+
+Return:
+1. 3–5 bullet point summary
+2. Important dates (if any)
+3. Action required (Yes/No)
+
+Mail:
+{mail}
+"""
+
+
+class RateLimited(Exception):
+    """No backend call could be made within the wait limit."""
+
+
+# =========================================================
+# Backends
+# =========================================================
+
+def _mail_from_prompt(prompt):
+    return prompt.split("Mail:", 1)[-1].strip()
+
+
+class GeminiBackend:
+    """Google Gemini, streamed. google-generativeai is imported on first use."""
+
+    remote = True
+
+    def __init__(self, api_key, model_name="gemini-1.5-flash"):
+        self.name = f"gemini:{model_name}"
+        self.api_key = api_key
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                genai.configure(api_key=self.api_key)
+                self._model = genai.GenerativeModel(self.model_name)
+            return self._model
+
+    def stream(self, prompt):
+        for chunk in self._get_model().generate_content(prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+
+DATE_RE = re.compile(
+    r"\b(\d{1,2}(?:st|nd|rd|th)?[ -/.](?:\d{1,2}|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*"
+    r"(?:[ -/.,]+\d{2,4})?|(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]* \d{1,2}(?:st|nd|rd|th)?"
+    r"(?:,? \d{4})?|today|tomorrow|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b",
+    re.IGNORECASE,
+)
+ACTION_WORDS = ("must", "submit", "register", "required", "mandatory", "deadline", "fill", "pay", "report")
+
+
+class StubBackend:
+    """
+    Local, deterministic stand-in for an LLM: leading sentences as bullets,
+    regex-found dates and an action keyword check. Streams word by word.
+    """
+
+    name = "stub"
+    remote = False
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def summarize(self, prompt):
+        mail = _mail_from_prompt(prompt)
+        sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+|\n+", mail) if len(s.strip()) > 3]
+        bullets = "\n".join(f"- {s}" for s in sentences[:5]) or "- (empty mail)"
+        dates = list(dict.fromkeys(m.group(0) for m in DATE_RE.finditer(mail)))
+        action = "Yes" if any(w in mail.lower() for w in ACTION_WORDS) else "No"
+        return (f"**Summary**\n{bullets}\n\n"
+                f"**Important dates:** {', '.join(dates) if dates else 'None'}\n\n"
+                f"**Action required:** {action}")
+
+    def stream(self, prompt):
+        for word in re.findall(r"\S+\s*", self.summarize(prompt)):
+            if self.delay:
+                time.sleep(self.delay)
+            yield word
+
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n\s*[-•*]?\s*|\n+")
+WORD_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with "
+    "you your we our all dear students regards please".split()
+)
+DEADLINE_CUES = re.compile(
+    r"\b(deadline|last date|due|before|by|no later than|closes?|until|till|latest)\b", re.IGNORECASE
+)
+
+
+def split_sentences(text):
+    return [s.strip() for s in SENTENCE_RE.split(text) if len(WORD_RE.findall(s.lower())) >= 3]
+
+
+def textrank(sentences, damping=0.85, iterations=50, tol=1e-6):
+    """TextRank scores for sentences over TF-IDF cosine similarity (NumPy power iteration)."""
+    docs = [[w for w in WORD_RE.findall(s.lower()) if w not in STOPWORDS] for s in sentences]
+    vocab = {w: i for i, w in enumerate(sorted({w for d in docs for w in d}))}
+    n = len(sentences)
+    if n < 2 or not vocab:
+        return np.ones(n)
+
+    tf = np.zeros((n, len(vocab)))
+    for row, doc in enumerate(docs):
+        for w in doc:
+            tf[row, vocab[w]] += 1
+    idf = np.log(n / (tf > 0).sum(axis=0)) + 1
+    vectors = tf * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1, norms)
+
+    sim = vectors @ vectors.T
+    np.fill_diagonal(sim, 0)
+    out = sim.sum(axis=1, keepdims=True)
+    transition = np.where(out > 0, sim / np.where(out == 0, 1, out), 1 / n)
+
+    scores = np.full(n, 1 / n)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * transition.T @ scores
+        if np.abs(updated - scores).sum() < tol:
+            return updated
+        scores = updated
+    return scores
+
+
+def extract_deadlines(text, today=None):
+    """[(date, sentence)] for sentences that pair a deadline cue with a date."""
+    today = today or datetime.now()
+    default = today.replace(hour=0, minute=0, second=0, microsecond=0)
+    found = []
+    for sentence in split_sentences(text):
+        cue = DEADLINE_CUES.search(sentence)
+        if not cue:
+            continue
+        # "register by 25 Oct", not "released on 2 Nov after registration closes"
+        for m in DATE_RE.finditer(sentence, cue.start()):
+            try:
+                when = date_parser.parse(m.group(0), fuzzy=True, default=default)
+            except (ValueError, OverflowError):
+                continue
+            found.append((when.strftime("%d %b %Y"), sentence))
+            break
+    return found
+
+
+class ExtractiveBackend:
+    """
+    Local, offline summarizer: the top TextRank sentences in mail order,
+    regex/date-parser deadlines and an action keyword check. Typically a
+    few milliseconds per mail, with no network.
+    """
+
+    name = "extractive"
+    remote = False
+
+    def __init__(self, max_sentences=5):
+        self.max_sentences = max_sentences
+
+    def summarize(self, prompt):
+        mail = _mail_from_prompt(prompt)
+        sentences = split_sentences(mail)
+        if sentences:
+            k = min(len(sentences), max(3, min(self.max_sentences, len(sentences) // 3)))
+            top = np.argsort(-textrank(sentences), kind="stable")[:k]
+            bullets = "\n".join(f"- {sentences[i]}" for i in sorted(top))
+        else:
+            bullets = "- (empty mail)"
+
+        dates = list(dict.fromkeys(m.group(0) for m in DATE_RE.finditer(mail)))
+        deadlines = extract_deadlines(mail)
+        action = "Yes" if deadlines or any(w in mail.lower() for w in ACTION_WORDS) else "No"
+        text = (f"**Summary**\n{bullets}\n\n"
+                f"**Important dates:** {', '.join(dates) if dates else 'None'}\n\n")
+        if deadlines:
+            text += "**Deadlines:**\n" + "\n".join(f"- {d}: {s}" for d, s in deadlines) + "\n\n"
+        return text + f"**Action required:** {action}"
+
+    def stream(self, prompt):
+        yield self.summarize(prompt)
+
+
+# =========================================================
+# Cache and rate limiting
+# =========================================================
+
+class SummaryCache:
+    """Persistent summaries keyed by content hash (SQLite)."""
+
+    def __init__(self, path=SUMMARY_CACHE_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "key TEXT PRIMARY KEY, summary TEXT NOT NULL, created REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE summaries SET hits = hits + 1 WHERE key = ?", (key,))
+                self._conn.commit()
+        return row[0] if row else None
+
+    def put(self, key, summary):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, created) VALUES (?, ?, ?)",
+                (key, summary, time.time()),
+            )
+            self._conn.commit()
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Take one token, waiting up to timeout seconds. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+# =========================================================
+# Service
+# =========================================================
+
+class _InFlight:
+    """Chunks of one summary being generated, shared with every waiting caller."""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.cond = threading.Condition()
+
+    def push(self, chunk):
+        with self.cond:
+            self.chunks.append(chunk)
+            self.cond.notify_all()
+
+    def finish(self, error=None):
+        with self.cond:
+            self.done, self.error = True, error
+            self.cond.notify_all()
+
+    def follow(self):
+        i = 0
+        while True:
+            with self.cond:
+                while i == len(self.chunks) and not self.done:
+                    self.cond.wait()
+                chunks, done, error = self.chunks[i:], self.done, self.error
+            yield from chunks
+            i += len(chunks)
+            if done:
+                if error is not None:
+                    raise error
+                return
+
+
+def normalize_mail(text):
+    """Whitespace-insensitive form of a mail, so re-pasted copies hash the same."""
+    return " ".join(text.split())
+
+
+def _first_chunk_within(chunks, timeout):
+    """
+    Re-yield chunks, raising TimeoutError if the first one takes longer than timeout.
+    Once the caller gives up (timeout or stops iterating), the pump thread stops
+    reading and closes the stream as soon as its pending read returns.
+    """
+    q = queue.Queue()
+    done = object()
+    cancelled = threading.Event()
+
+    def pump():
+        try:
+            for chunk in chunks:
+                if cancelled.is_set():
+                    break
+                q.put(chunk)
+            else:
+                q.put(done)
+        except Exception as exc:
+            q.put(exc)
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    threading.Thread(target=pump, daemon=True).start()
+    first = True
+    try:
+        while True:
+            try:
+                item = q.get(timeout=timeout if first else None)
+            except queue.Empty:
+                raise TimeoutError(f"no response within {timeout:g}s") from None
+            first = False
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
+
+
+class Summarizer:
+    """
+    backends: one or more backends; the first is the default per request.
+    fallback: name of a local backend to use when the chosen one raises,
+    cannot get a rate-limit token, or sends nothing within first_chunk_timeout.
+    Fallback summaries are cached under the fallback's own key, so the
+    chosen backend is tried again next time.
+    """
+
+    def __init__(self, backends, cache=None, bucket=None, fallback=None,
+                 max_wait=30.0, first_chunk_timeout=8.0):
+        backends = backends if isinstance(backends, (list, tuple)) else [backends]
+        self.backends = {b.name: b for b in backends}
+        self.default = backends[0].name
+        self.fallback = fallback
+        self.cache = cache
+        self.bucket = bucket
+        self.max_wait = max_wait
+        self.first_chunk_timeout = first_chunk_timeout
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "coalesced": 0, "backend_calls": 0, "fallbacks": 0}
+
+    @property
+    def backend(self):
+        return self.backends[self.default]
+
+    def key(self, mail, backend=None):
+        raw = f"{backend or self.default}|{PROMPT_VERSION}|{normalize_mail(mail)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def stream(self, mail, backend=None):
+        """Yield the summary of mail in chunks (all at once when cached)."""
+        name = backend or self.default
+        key = self.key(mail, name)
+        cached = self.cache.get(key) if self.cache else None
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            yield cached
+            return
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            if flight is None and self.cache:
+                # a generation may have finished since the first lookup
+                cached = self.cache.get(key)
+            leader = flight is None and cached is None
+            if leader:
+                flight = self._inflight[key] = _InFlight()
+            elif flight is not None:
+                self.stats["coalesced"] += 1
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            yield cached
+            return
+
+        if leader:
+            threading.Thread(target=self._generate, args=(key, name, mail, flight), daemon=True).start()
+        yield from flight.follow()
+
+    def summarize(self, mail, backend=None):
+        return "".join(self.stream(mail, backend))
+
+    def _run(self, name, mail, flight):
+        backend = self.backends[name]
+        if getattr(backend, "remote", False):
+            # with a fallback available, never queue behind the rate limit
+            wait = 0 if self.fallback else self.max_wait
+            if self.bucket and not self.bucket.acquire(timeout=wait):
+                raise RateLimited("Summarizer is busy, please try again in a moment.")
+        self.stats["backend_calls"] += 1
+        chunks = backend.stream(PROMPT.format(mail=mail))
+        if getattr(backend, "remote", False) and self.first_chunk_timeout:
+            chunks = _first_chunk_within(chunks, self.first_chunk_timeout)
+        for chunk in chunks:
+            flight.push(chunk)
+        if self.cache:
+            self.cache.put(self.key(mail, name), "".join(flight.chunks))
+
+    def _generate(self, key, name, mail, flight):
+        """Runs in its own thread so the result is cached even if the leader's session goes away."""
+        try:
+            try:
+                self._run(name, mail, flight)
+            except Exception:
+                if not self.fallback or name == self.fallback or flight.chunks:
+                    raise
+                self.stats["fallbacks"] += 1
+                self._run(self.fallback, mail, flight)
+            flight.finish()
+        except Exception as exc:
+            flight.finish(exc)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
@@ -0,0 +1,261 @@
+# utils/timetable.py
+"""
+Timetable engine shared by the Live Timetable page and the app's Timetable view.
+
+Slots are stored as minute-of-day intervals, per day, in two sorted arrays:
+- every slot, ordered by start (clash lookups)
+- the merged busy intervals (free gaps, "free now?" and "what's next?")
+
+Clash checks, "free now" and "next class" are bisections, so they stay
+O(log n) however many slots a day holds.
+"""
+import bisect
+import re
+from dataclasses import dataclass
+from datetime import datetime, time
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+DAY_START = 8 * 60  # free gaps are reported inside the teaching day
+DAY_END = 18 * 60
+AFTERNOON_BEFORE = 8  # "1-2" in a timetable means 13:00-14:00 (zero-padded "01:00" is taken as written)
+FREE_SUBJECTS = {"free", "free period", "-", ""}
+
+_TIME_RE = re.compile(r"^\s*(\d{1,2})(?:[:.](\d{2}))?\s*([ap]\.?m\.?)?\s*$", re.IGNORECASE)
+
+
+# =========================================================
+# Parsing
+# =========================================================
+
+def normalize_day(value):
+    """'monday', 'Mon', 'MON.' -> 'Mon'; ValueError if it is not a weekday."""
+    key = str(value).strip().rstrip(".")[:3].title()
+    if key not in DAYS:
+        raise ValueError(f"unknown day: {value!r}")
+    return key
+
+
+def parse_time(value, meridiem=None):
+    """'9', '9:30', '2pm', '14.00' or a datetime.time -> minutes after midnight."""
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    m = _TIME_RE.match(str(value))
+    if not m:
+        raise ValueError(f"unreadable time: {value!r}")
+    hour, minute = int(m.group(1)), int(m.group(2) or 0)
+    suffix = (m.group(3) or meridiem or "").lower().replace(".", "")
+    if suffix == "pm" and hour < 12:
+        hour += 12
+    elif suffix == "am" and hour == 12:
+        hour = 0
+    elif not suffix and hour < AFTERNOON_BEFORE and len(m.group(1)) == 1:
+        hour += 12
+    if hour > 23 or minute > 59:
+        raise ValueError(f"unreadable time: {value!r}")
+    return hour * 60 + minute
+
+
+def parse_range(value):
+    """'9-10', '9:30 - 11', '1-2pm', '10:00–11:30' -> (start, end) minutes."""
+    parts = re.split(r"\s*(?:-|–|—|to)\s*", str(value).strip(), maxsplit=1)
+    if len(parts) != 2:
+        raise ValueError(f"unreadable time range: {value!r}")
+    meridiem = re.search(r"[ap]\.?m\.?", parts[1], re.IGNORECASE)
+    end = parse_time(parts[1])
+    start = parse_time(parts[0], meridiem.group(0) if meridiem else None)
+    if start >= end and parse_time(parts[0], "am") < end:
+        start = parse_time(parts[0], "am")  # "11-12pm" is 11:00-12:00
+    if start >= end:
+        raise ValueError(f"time range ends before it starts: {value!r}")
+    return start, end
+
+
+def fmt_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def is_free(subject):
+    return str(subject).strip().lower() in FREE_SUBJECTS
+
+
+# =========================================================
+# Engine
+# =========================================================
+
+@dataclass
+class Slot:
+    day: str
+    start: int  # minutes after midnight
+    end: int
+    subject: str
+    location: str = ""
+
+    @property
+    def label(self):
+        return f"{self.day} {fmt_minutes(self.start)}–{fmt_minutes(self.end)}"
+
+    def as_row(self):
+        return {"Day": self.day, "Start": fmt_minutes(self.start), "End": fmt_minutes(self.end),
+                "Subject": self.subject, "Location": self.location}
+
+
+class SlotClash(ValueError):
+    """Raised by Timetable.add when a slot overlaps existing classes."""
+
+    def __init__(self, slot, clashes):
+        self.slot = slot
+        self.clashes = clashes
+        names = ", ".join(f"{c.subject} ({c.label})" for c in clashes)
+        super().__init__(f"{slot.subject} ({slot.label}) clashes with {names}")
+
+
+class _Day:
+    def __init__(self):
+        self.starts = []  # slot starts, sorted
+        self.slots = []  # slots, same order
+        self.max_len = 0  # longest slot, bounds how far back an overlap can start
+        self.busy_starts = []  # merged busy intervals, sorted and disjoint
+        self.busy_ends = []
+
+    def overlapping(self, start, end):
+        lo = bisect.bisect_right(self.starts, start - self.max_len)
+        hi = bisect.bisect_left(self.starts, end)
+        return [s for s in self.slots[lo:hi] if s.end > start]
+
+    def insert(self, slot):
+        i = bisect.bisect_right(self.starts, slot.start)
+        self.starts.insert(i, slot.start)
+        self.slots.insert(i, slot)
+        self.max_len = max(self.max_len, slot.end - slot.start)
+
+        # merge [start, end) into the busy intervals it touches
+        lo = bisect.bisect_left(self.busy_ends, slot.start)
+        hi = bisect.bisect_right(self.busy_starts, slot.end)
+        start, end = slot.start, slot.end
+        if lo < hi:
+            start = min(start, self.busy_starts[lo])
+            end = max(end, self.busy_ends[hi - 1])
+        self.busy_starts[lo:hi] = [start]
+        self.busy_ends[lo:hi] = [end]
+
+    def busy_at(self, minute):
+        """Index of the busy interval covering minute, or None."""
+        i = bisect.bisect_right(self.busy_starts, minute) - 1
+        return i if i >= 0 and self.busy_ends[i] > minute else None
+
+
+class Timetable:
+    """Weekly timetable with clash detection, free gaps and now/next queries."""
+
+    def __init__(self, day_start=DAY_START, day_end=DAY_END):
+        self.day_start = day_start
+        self.day_end = day_end
+        self.days = {d: _Day() for d in DAYS}
+
+    def __len__(self):
+        return sum(len(d.slots) for d in self.days.values())
+
+    def slots(self):
+        return [s for d in DAYS for s in self.days[d].slots]
+
+    def clashes(self, day, start, end):
+        """Slots on day overlapping [start, end) minutes."""
+        return self.days[normalize_day(day)].overlapping(start, end)
+
+    def add(self, day, start, end, subject, location="", allow_clash=False):
+        """
+        Insert a class; start and end are minutes or anything parse_time reads.
+        Raises SlotClash unless allow_clash (the clashing slots are on the error).
+        Returns (slot, clashes).
+        """
+        if not isinstance(start, int):
+            start = parse_time(start)
+        if not isinstance(end, int):
+            end = parse_time(end)
+        if start >= end:
+            raise ValueError("a slot must end after it starts")
+        slot = Slot(normalize_day(day), start, end, str(subject).strip(), str(location or "").strip())
+        day_ = self.days[slot.day]
+        clashes = day_.overlapping(start, end)
+        if clashes and not allow_clash:
+            raise SlotClash(slot, clashes)
+        day_.insert(slot)
+        return slot, clashes
+
+    def free_gaps(self, day, min_minutes=0):
+        """(start, end) free windows inside the teaching day, in order."""
+        d = self.days[normalize_day(day)]
+        gaps, cursor = [], self.day_start
+        lo = bisect.bisect_right(d.busy_ends, self.day_start)
+        for start, end in zip(d.busy_starts[lo:], d.busy_ends[lo:]):
+            if start >= self.day_end:
+                break
+            if start - cursor > 0:
+                gaps.append((cursor, start))
+            cursor = max(cursor, end)
+        if self.day_end > cursor:
+            gaps.append((cursor, self.day_end))
+        return [(s, e) for s, e in gaps if e - s >= max(min_minutes, 1)]
+
+    def week_gaps(self, min_minutes=0, days=DAYS[:5]):
+        return [(day, s, e) for day in days for s, e in self.free_gaps(day, min_minutes)]
+
+    def current(self, when=None):
+        """Slots in progress at when (default now)."""
+        when = when or datetime.now()
+        minute = when.hour * 60 + when.minute
+        d = self.days[DAYS[when.weekday()]]
+        return [s for s in d.overlapping(minute, minute + 1)]
+
+    def free_until(self, when=None):
+        """Minutes of free time left at when (None if a class is on), capped at day end."""
+        when = when or datetime.now()
+        minute = when.hour * 60 + when.minute
+        d = self.days[DAYS[when.weekday()]]
+        if d.busy_at(minute) is not None:
+            return None
+        i = bisect.bisect_right(d.busy_starts, minute)
+        until = d.busy_starts[i] if i < len(d.busy_starts) else self.day_end
+        return max(min(until, max(self.day_end, minute)) - minute, 0)
+
+    def next_slot(self, when=None):
+        """(days ahead, slot) for the next class starting after when, or None."""
+        when = when or datetime.now()
+        minute = when.hour * 60 + when.minute
+        today = when.weekday()
+        for ahead in range(8):
+            d = self.days[DAYS[(today + ahead) % 7]]
+            i = bisect.bisect_right(d.starts, minute) if ahead == 0 else 0
+            if i < len(d.slots):
+                return ahead, d.slots[i]
+        return None
+
+    def to_rows(self):
+        return [s.as_row() for s in self.slots()]
+
+    @classmethod
+    def from_rows(cls, rows, **kwargs):
+        """
+        Build from rows with Day and either Time ('9-10') or Start/End.
+        'Free' rows are skipped (gaps are computed); clashes are kept.
+        Returns (timetable, clashes, errors): clashes are (slot, [existing]),
+        errors are (row number, message).
+        """
+        table, clashes, errors = cls(**kwargs), [], []
+        for n, row in enumerate(rows, start=1):
+            subject = row.get("Subject", "")
+            if is_free(subject):
+                continue
+            try:
+                if row.get("Start") not in (None, "") and row.get("End") not in (None, ""):
+                    start, end = parse_time(row["Start"]), parse_time(row["End"])
+                else:
+                    start, end = parse_range(row.get("Time", ""))
+                slot, found = table.add(row.get("Day", ""), start, end, subject,
+                                        row.get("Location", ""), allow_clash=True)
+            except ValueError as e:
+                errors.append((n, str(e)))
+                continue
+            if found:
+                clashes.append((slot, found))
+        return table, clashes, errors
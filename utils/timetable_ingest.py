@@ -0,0 +1,351 @@
+# utils/timetable_ingest.py
+"""
+Upload ingestion for the Live Timetable.
+
+Uploads are hashed and the parsed frame is kept in the shared cache under
+that hash, so reruns with the same file never parse it again. Parsing
+streams the file:
+
+- CSV: one timetable, or an institution export with a Section column or
+  "Section: X" marker rows between blocks (repeated headers are skipped)
+- ICS: VEVENTs from a calendar export, folded to one weekly slot each
+
+Rows are validated in chunks of CHUNK_ROWS; bad rows are reported by row
+number and skipped instead of failing the whole upload.
+"""
+import csv
+import hashlib
+import io
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from utils.cache import shared_cache
+from utils.timetable import DAYS, FREE_SUBJECTS, Timetable, normalize_day, parse_range, parse_time
+
+COLUMNS = ["Day", "Start", "End", "Subject", "Section", "Location", "Student"]
+CHUNK_ROWS = 20_000
+MAX_REPORTED_ERRORS = 200
+
+ALIASES = {
+    "Day": ("day", "weekday", "days"),
+    "Time": ("time", "slot", "period", "timing", "timings"),
+    "Start": ("start", "from", "start time", "starts", "begin"),
+    "End": ("end", "to", "end time", "ends", "finish"),
+    "Subject": ("subject", "course", "class", "module", "paper", "course name"),
+    "Section": ("section", "batch", "group", "division", "sec"),
+    "Location": ("location", "room", "venue", "hall"),
+    "Student": ("student", "student id", "roll", "roll no", "roll number", "enrollment", "email"),
+}
+_SECTION_MARKER = re.compile(r"^\s*(?:section|batch|group|division)\s*[:\-]\s*(.+?)\s*$", re.IGNORECASE)
+
+
+class TimetableFormatError(ValueError):
+    """The upload cannot be read as a timetable at all (e.g. no Subject column)."""
+
+
+@dataclass
+class Ingested:
+    frame: pd.DataFrame  # COLUMNS; Start/End are minutes after midnight
+    rows: int = 0  # data rows read, including skipped ones
+    errors: list = field(default_factory=list)  # (row number, message), first MAX_REPORTED_ERRORS
+    error_count: int = 0
+
+    @property
+    def sections(self):
+        return [s for s in self.frame["Section"].cat.categories if s]
+
+
+# =========================================================
+# Hashing and caching
+# =========================================================
+
+def upload_digest(source):
+    """sha256 of an uploaded file (file-like) or a path, read in 1 MB blocks."""
+    h = hashlib.sha256()
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    else:
+        source.seek(0)
+        for block in iter(lambda: source.read(1 << 20), b""):
+            h.update(block)
+        source.seek(0)
+    return h.hexdigest()
+
+
+def ingest_upload(source, name=None, digest=None):
+    """
+    Parsed Ingested for source, computed once per content hash (process-wide).
+    Pass digest when the caller already knows it to skip re-hashing.
+    """
+    name = name or getattr(source, "name", None) or str(source)
+    digest = digest or upload_digest(source)
+    kind = "ics" if Path(name).suffix.lower() in (".ics", ".ical") else "csv"
+    return shared_cache.get_or_set(("timetable_upload", digest, kind), lambda: parse_timetable(source, kind))
+
+
+def timetable_for(digest, ingested, section=None):
+    """(Timetable, clashes) for one section of an ingested upload, cached per hash."""
+    return shared_cache.get_or_set(("timetable_engine", digest, section),
+                                   lambda: build_timetable(ingested.frame, section))
+
+
+def build_timetable(frame, section=None):
+    if section is not None:
+        frame = frame[frame["Section"] == section]
+    table, clashes = Timetable(), []
+    for day, start, end, subject, location in zip(frame["Day"], frame["Start"], frame["End"],
+                                                  frame["Subject"], frame["Location"]):
+        slot, found = table.add(day, int(start), int(end), subject, location, allow_clash=True)
+        if found:
+            clashes.append((slot, found))
+    return table, clashes
+
+
+# =========================================================
+# Streaming readers
+# =========================================================
+
+def _open_text(source):
+    """Text stream over a path or binary file-like; the caller must close it."""
+    if isinstance(source, (str, Path)):
+        return open(source, newline="", encoding="utf-8-sig", errors="replace")
+    source.seek(0)
+    return io.TextIOWrapper(source, newline="", encoding="utf-8-sig", errors="replace")
+
+
+def _close_text(stream, source):
+    if isinstance(source, (str, Path)):
+        stream.close()
+    else:
+        stream.detach()  # leave the upload itself open for the next rerun
+
+
+def _header_map(header):
+    lookup = {alias: col for col, aliases in ALIASES.items() for alias in aliases}
+    mapping = {}
+    for i, name in enumerate(header):
+        col = lookup.get(str(name).strip().lower())
+        if col and col not in mapping:
+            mapping[col] = i
+    return mapping
+
+
+def _check_header(mapping):
+    if "Subject" not in mapping:
+        raise TimetableFormatError("no Subject column found (expected one of: Subject, Course, Class, Module)")
+    if "Day" not in mapping:
+        raise TimetableFormatError("no Day column found")
+    if "Time" not in mapping and not {"Start", "End"} <= mapping.keys():
+        raise TimetableFormatError("no Time column (\"9-10\") or Start/End columns found")
+
+
+def _csv_chunks(stream):
+    """
+    Raw frames of up to CHUNK_ROWS data rows (plus their line numbers).
+    "Section: X" rows set the section for the rows below; repeated
+    header rows are skipped.
+    """
+    header, mapping, section = None, None, ""
+    numbers, rows, sections = [], [], []
+
+    def frame():
+        raw = pd.DataFrame(rows)
+        chunk = pd.DataFrame({col: raw[i] if i in raw else "" for col, i in mapping.items()})
+        own = chunk["Section"].fillna("") if "Section" in chunk else pd.Series("", index=chunk.index)
+        chunk["Section"] = own.where(own.str.strip() != "", sections)  # else the marker's section
+        chunk["row"] = numbers
+        return chunk
+
+    for n, cells in enumerate(csv.reader(stream), start=1):
+        if not cells:
+            continue
+        if not any(c.strip() for c in cells[1:]):  # a lone first cell: section marker or blank line
+            marker = _SECTION_MARKER.match(cells[0])
+            if marker:
+                section = marker.group(1)
+                continue
+            if not cells[0].strip():
+                continue
+        if header is None:
+            header, mapping = cells, _header_map(cells)
+            _check_header(mapping)
+            continue
+        if cells == header:
+            continue
+        numbers.append(n)
+        rows.append(cells)
+        sections.append(section)
+        if len(rows) >= CHUNK_ROWS:
+            yield frame()
+            numbers, rows, sections = [], [], []
+    if rows:
+        yield frame()
+
+
+def _ics_time(value):
+    """DTSTART/DTEND value -> local datetime, or None for all-day dates."""
+    value = value.strip()
+    if re.fullmatch(r"\d{8}", value):
+        return None
+    dt = datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        dt = dt.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    return dt
+
+
+def _unfold(stream):
+    """(line number, line) with RFC 5545 continuation lines joined back on."""
+    prev = None
+    for n, line in enumerate(stream, start=1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and prev is not None:
+            prev = (prev[0], prev[1] + line[1:])
+            continue
+        if prev is not None:
+            yield prev
+        prev = (n, line)
+    if prev is not None:
+        yield prev
+
+
+def _iter_ics(stream):
+    """(line number, VEVENT properties) per event."""
+    event, start_line = None, 0
+    for n, line in _unfold(stream):
+        name, _, value = line.partition(":")
+        key = name.split(";")[0].upper()
+        if key == "BEGIN" and value.upper() == "VEVENT":
+            event, start_line = {}, n
+        elif key == "END" and value.upper() == "VEVENT" and event is not None:
+            yield start_line, event
+            event = None
+        elif event is not None and key in ("DTSTART", "DTEND", "SUMMARY", "LOCATION", "CATEGORIES"):
+            event[key] = value.replace("\\,", ",").replace("\\;", ";").strip()
+
+
+def _ics_raw(event):
+    start = _ics_time(event.get("DTSTART", ""))
+    if start is None:
+        return None  # all-day event: a holiday or exam day, not a class
+    end = _ics_time(event["DTEND"]) if event.get("DTEND") else None
+    if end is None or end.date() != start.date():
+        raise ValueError("event has no end time on the same day")
+    return {
+        "Day": DAYS[start.weekday()],
+        "Start": start.strftime("%H:%M"),
+        "End": end.strftime("%H:%M"),
+        "Subject": event.get("SUMMARY", ""),
+        "Section": event.get("CATEGORIES", ""),
+        "Location": event.get("LOCATION", ""),
+    }
+
+
+def _ics_chunks(stream, result):
+    """Raw frames of up to CHUNK_ROWS timed events; unreadable events are reported."""
+    rows = []
+    for n, event in _iter_ics(stream):
+        try:
+            raw = _ics_raw(event)
+        except ValueError as e:
+            _report(result, n, e)
+            continue
+        if raw is not None:
+            rows.append(raw | {"row": n})
+        if len(rows) >= CHUNK_ROWS:
+            yield pd.DataFrame(rows)
+            rows = []
+    if rows:
+        yield pd.DataFrame(rows)
+
+
+# =========================================================
+# Chunked validation
+# =========================================================
+
+def _parsed(values, parse):
+    """Parse each distinct value once: ({value: result}, {value: error message})."""
+    ok, err = {}, {}
+    for v in pd.unique(values):
+        try:
+            ok[v] = parse(v)
+        except ValueError as e:
+            err[v] = str(e)
+    return ok, err
+
+
+def _report(result, row, error):
+    result.error_count += 1
+    if len(result.errors) < MAX_REPORTED_ERRORS:
+        result.errors.append((row, str(error)))
+
+
+def _validate_chunk(chunk, result):
+    """Typed COLUMNS frame for one raw chunk; bad rows are reported on result."""
+    chunk = chunk.reindex(columns=["Day", "Time", "Start", "End", "Subject", "Section", "Location",
+                                   "Student", "row"])
+    for col in ("Day", "Time", "Start", "End", "Subject", "Section", "Location", "Student"):
+        chunk[col] = chunk[col].fillna("").astype(str).str.strip()
+    chunk = chunk[~chunk["Subject"].str.lower().isin(FREE_SUBJECTS)]  # gaps, not classes
+
+    day_ok, day_err = _parsed(chunk["Day"], normalize_day)
+    start_ok, start_err = _parsed(chunk["Start"], parse_time)
+    end_ok, end_err = _parsed(chunk["End"], parse_time)
+    range_ok, range_err = _parsed(chunk["Time"], parse_range)
+
+    # rows give either Start and End, or a Time range such as "9-10"
+    by_range = (chunk["Start"] == "") | (chunk["End"] == "")
+    start = chunk["Start"].map(start_ok).where(~by_range, chunk["Time"].map({k: v[0] for k, v in range_ok.items()}))
+    end = chunk["End"].map(end_ok).where(~by_range, chunk["Time"].map({k: v[1] for k, v in range_ok.items()}))
+    error = (chunk["Day"].map(day_err)
+             .fillna(chunk["Time"].map(range_err).where(by_range))
+             .fillna(chunk["Start"].map(start_err).where(~by_range))
+             .fillna(chunk["End"].map(end_err).where(~by_range)))
+    error = error.where(error.notna() | (start < end), "class ends before it starts")
+
+    bad = error.notna()
+    for row, message in zip(chunk["row"][bad], error[bad]):
+        _report(result, int(row), message)
+    good = ~bad
+    return pd.DataFrame({
+        "Day": chunk["Day"][good].map(day_ok),
+        "Start": start[good],
+        "End": end[good],
+        "Subject": chunk["Subject"][good],
+        "Section": chunk["Section"][good],
+        "Location": chunk["Location"][good],
+        "Student": chunk["Student"][good],
+    }, columns=COLUMNS)
+
+
+def _typed(frame):
+    frame["Day"] = pd.Categorical(frame["Day"], categories=DAYS, ordered=True)
+    frame["Start"] = frame["Start"].astype("int16")
+    frame["End"] = frame["End"].astype("int16")
+    for col in ("Subject", "Section", "Location", "Student"):
+        frame[col] = frame[col].astype(str).astype("category")
+    return frame
+
+
+def parse_timetable(source, kind="csv"):
+    """Stream source (path or binary file-like) into an Ingested result."""
+    result = Ingested(frame=pd.DataFrame(columns=COLUMNS))
+    stream = _open_text(source)
+    chunks = []
+    try:
+        for chunk in _ics_chunks(stream, result) if kind == "ics" else _csv_chunks(stream):
+            result.rows += len(chunk)
+            chunks.append(_validate_chunk(chunk, result))
+    finally:
+        _close_text(stream, source)
+
+    frame = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=COLUMNS)
+    # calendar exports repeat each weekly class for every date of the term
+    frame = _typed(frame.drop_duplicates(ignore_index=True))
+    result.frame = frame.sort_values(["Day", "Start"], ignore_index=True)
+    return result
@@ -0,0 +1,101 @@
+# utils/trips.py
+import bisect
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from utils.geo import haversine_np
+
+
+def destination_key(destination):
+    """Normalized destination used for grouping ("  Delhi " -> "delhi")."""
+    return destination.strip().lower()
+
+
+def route_tokens(start):
+    """(lowercased start, its word set, word count): precomputed once per trip."""
+    text = start.lower()
+    words = text.split()
+    return text, frozenset(words), len(words)
+
+
+class TripIndex:
+    """
+    Trips bucketed by destination, each bucket sorted by departure time.
+    A ±hours window is two bisects instead of a scan over every trip to
+    the same city.
+
+    With a gazetteer, destinations and start points are geocoded once when
+    a trip is added: "New Delhi" and "delhi" share a bucket, and start
+    points get coordinates for vectorized distance scoring. Start-point
+    tokens are kept too, for trips the gazetteer cannot place.
+    """
+
+    def __init__(self, gazetteer=None):
+        self.gazetteer = gazetteer
+        self.buckets = defaultdict(lambda: ([], []))  # key -> (sorted timestamps, trip ids)
+        self.trips = {}
+        self.keys = {}  # id -> bucket key
+        self.routes = {}  # id -> route_tokens(start)
+        self.coords = {}  # id -> (lat, lon) of the start point, NaN if unknown
+        self.last_id = 0
+        self._lock = threading.RLock()
+
+    def key(self, destination):
+        """Bucket key: the gazetteer's name for destination, else its normalized text."""
+        hit = self.gazetteer.lookup(destination) if self.gazetteer else None
+        return hit[0].lower() if hit else destination_key(destination)
+
+    def _locate(self, start):
+        hit = self.gazetteer.lookup(start) if self.gazetteer else None
+        return (hit[1], hit[2]) if hit else (np.nan, np.nan)
+
+    def __len__(self):
+        return len(self.trips)
+
+    def add(self, trip):
+        with self._lock:
+            if trip["id"] in self.trips:
+                return
+            key = self.key(trip["destination"])
+            times, ids = self.buckets[key]
+            ts = trip["datetime"].timestamp()
+            i = bisect.bisect_right(times, ts)
+            times.insert(i, ts)
+            ids.insert(i, trip["id"])
+            self.trips[trip["id"]] = trip
+            self.keys[trip["id"]] = key
+            self.routes[trip["id"]] = route_tokens(trip["start"])
+            self.coords[trip["id"]] = self._locate(trip["start"])
+            self.last_id = max(self.last_id, trip["id"])
+
+    def window(self, trip, hours):
+        """Other trips to trip's destination departing within ±hours, in time order."""
+        ts = trip["datetime"].timestamp()
+        with self._lock:
+            key = self.keys.get(trip["id"]) or self.key(trip["destination"])
+            times, ids = self.buckets.get(key, ([], []))
+            lo = bisect.bisect_left(times, ts - hours * 3600)
+            hi = bisect.bisect_right(times, ts + hours * 3600)
+            return [self.trips[i] for i in ids[lo:hi] if i != trip["id"]]
+
+    def destination(self, key):
+        """All trips to a normalized destination, in time order."""
+        with self._lock:
+            return [self.trips[i] for i in self.buckets.get(key, ([], []))[1]]
+
+    def route(self, trip):
+        """route_tokens of trip's start point (computed on the fly if it is not indexed yet)."""
+        with self._lock:
+            tokens = self.routes.get(trip["id"])
+        return tokens or route_tokens(trip["start"])
+
+    def start_distances(self, trip, others):
+        """Km between trip's start point and each of others' (NaN where either is unknown)."""
+        if not others:
+            return np.empty(0)
+        with self._lock:
+            origin = self.coords.get(trip["id"]) or self._locate(trip["start"])
+            points = np.array([self.coords[o["id"]] for o in others], dtype=np.float64)
+        return haversine_np(points[:, 0], points[:, 1], origin)
@@ -0,0 +1,141 @@
+# utils/vectors.py
+import math
+import threading
+import zlib
+
+import numpy as np
+
+from utils.lazy import available, lazy_import
+from utils.search import tokenize
+
+# brute-force NumPy search instead when hnswlib is not installed
+hnswlib = lazy_import("hnswlib") if available("hnswlib") else None
+
+HNSW_MIN_ITEMS = 5_000  # below this a NumPy matmul beats building a graph
+QUERY_CHUNK = 256  # bounds the (queries x items) similarity block in exact search
+
+
+class HashingEncoder:
+    """
+    Lightweight text encoder: hashed TF-IDF over words and in-word character
+    trigrams. Trigrams keep it tolerant of typos and word forms
+    ("pythn" ~ "python", "design" ~ "designing").
+
+    Documents are encoded with sublinear TF only, so stored vectors never
+    change. IDF is tracked incrementally and applied to queries, which keeps
+    common words like "help" from dominating the match.
+    """
+
+    def __init__(self, dim=1024):
+        self.dim = dim
+        self.df = np.zeros(dim, dtype=np.float32)
+        self.n_docs = 0
+
+    def _features(self, text):
+        for word in tokenize(text):
+            yield "w:" + word
+            padded = f"<{word}>"
+            for i in range(len(padded) - 2):
+                yield "c:" + padded[i:i + 3]
+
+    def _raw(self, texts):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = {}
+            for feat in self._features(text):
+                h = zlib.crc32(feat.encode())
+                col, sign = h % self.dim, 1.0 if h & 0x80000000 else -1.0
+                counts[col] = counts.get(col, 0.0) + sign
+            for col, tf in counts.items():
+                out[row, col] = math.copysign(1 + math.log(abs(tf)), tf) if tf else 0.0
+        return out
+
+    @staticmethod
+    def _normalize(x):
+        norms = np.linalg.norm(x, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return x / norms
+
+    def fit_encode(self, texts):
+        """Encode new documents and count them towards the IDF."""
+        raw = self._raw(texts)
+        self.df += (raw != 0).sum(axis=0)
+        self.n_docs += len(texts)
+        return self._normalize(raw)
+
+    def encode_queries(self, texts):
+        idf = np.log((1 + self.n_docs) / (1 + self.df)) + 1
+        return self._normalize(self._raw(texts) * idf)
+
+
+class VectorIndex:
+    """
+    Inner-product nearest-neighbour index over unit vectors.
+
+    Uses an HNSW graph (hnswlib) once the index is large enough and
+    hnswlib is installed; otherwise an exact NumPy matmul + argpartition.
+    """
+
+    def __init__(self, dim):
+        self.dim = dim
+        self.ids = []
+        self.vectors = np.empty((1024, dim), dtype=np.float32)
+        self._hnsw = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, ids, vectors):
+        with self._lock:
+            start = len(self.ids)
+            need = start + len(ids)
+            if need > len(self.vectors):
+                grown = np.empty((max(need, 2 * len(self.vectors)), self.dim), dtype=np.float32)
+                grown[:start] = self.vectors[:start]
+                self.vectors = grown
+            self.vectors[start:need] = vectors
+            self.ids.extend(ids)
+
+            if self._hnsw is not None:
+                if need > self._hnsw.get_max_elements():
+                    self._hnsw.resize_index(2 * need)
+                self._hnsw.add_items(vectors, np.arange(start, need))
+            elif hnswlib is not None and need >= HNSW_MIN_ITEMS:
+                self._build_hnsw(need)
+
+    def _build_hnsw(self, n):
+        index = hnswlib.Index(space="ip", dim=self.dim)
+        index.init_index(max_elements=2 * n, ef_construction=200, M=16)
+        index.add_items(self.vectors[:n], np.arange(n))
+        self._hnsw = index
+
+    def _exact(self, queries, n, k):
+        sims = queries @ self.vectors[:n].T
+        rows = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        sims = np.take_along_axis(sims, rows, axis=1)
+        order = np.argsort(-sims, axis=1)
+        return np.take_along_axis(rows, order, axis=1), np.take_along_axis(sims, order, axis=1)
+
+    def search(self, queries, k):
+        """Top-k (ids, similarities) per query row, best first."""
+        with self._lock:
+            n = len(self.ids)
+            k = min(k, n)
+            if k == 0:
+                return [[] for _ in queries], [[] for _ in queries]
+
+            if self._hnsw is not None:
+                self._hnsw.set_ef(max(2 * k, 50))
+                rows, dist = self._hnsw.knn_query(queries, k=k)
+                sims = 1.0 - dist
+            else:
+                rows, sims = [], []
+                for start in range(0, len(queries), QUERY_CHUNK):
+                    r, s = self._exact(queries[start:start + QUERY_CHUNK], n, k)
+                    rows.append(r)
+                    sims.append(s)
+                rows, sims = np.concatenate(rows), np.concatenate(sims)
+
+            return ([[self.ids[r] for r in row] for row in rows],
+                    [list(map(float, s)) for s in sims])
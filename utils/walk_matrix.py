@@ -0,0 +1,164 @@
+# utils/walk_matrix.py
+"""
+Precomputed walking distances between campus POIs.
+
+Build offline (re-run whenever places or walkways change):
+    python -m utils.walk_matrix
+
+Rows are origins (every POI, then every cell of a grid over the campus),
+columns are POIs. Values are walking km along the walkway graph as float32,
+stored as a .npy file that is memory-mapped on load.
+"""
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+
+from utils.cache import cached, file_version
+from utils.places import PLACES_FILE, load_places_shared
+from utils.routing import WALKWAYS_FILE, WalkGraph
+from utils.spatial import KM_PER_DEG_LAT
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+MATRIX_FILE = DATA_DIR / ".cache" / "walk_matrix.npy"
+WALK_KMH = 4.8
+
+
+def build_walk_matrix(places, graph, cell_km=0.05, pad_km=0.2):
+    """
+    Compute the (n_places + n_cells) x n_places walking-distance matrix.
+    Returns (matrix, meta) where meta describes the row/column layout.
+    """
+    place_lats = places["lat"].to_numpy(dtype=np.float64)
+    place_lons = places["lon"].to_numpy(dtype=np.float64)
+
+    # one Dijkstra per distinct POI node; the graph is undirected, so this
+    # row also gives the distance from any origin node to that POI
+    place_nodes, place_snap = zip(*(graph.snap(o) for o in zip(place_lats, place_lons))) \
+        if len(places) else ((), ())
+    place_nodes = np.asarray(place_nodes, dtype=np.int64)
+    place_snap = np.asarray(place_snap, dtype=np.float64)
+    unique_nodes, inverse = np.unique(place_nodes, return_inverse=True)
+    node_dist = np.array([graph.dijkstra(int(n)) for n in unique_nodes]).reshape(len(unique_nodes), graph.size)
+    to_place = node_dist[inverse]  # (n_places, n_nodes)
+
+    # grid of origin cells over the walkway graph
+    dlat = cell_km / KM_PER_DEG_LAT
+    mid_lat = float(np.mean(graph.lats)) if graph.size else 0.0
+    dlon = cell_km / (KM_PER_DEG_LAT * math.cos(math.radians(mid_lat)))
+    pad_lat = pad_km / KM_PER_DEG_LAT
+    pad_lon = pad_lat * dlon / dlat
+    lat0 = float(graph.lats.min()) - pad_lat
+    lon0 = float(graph.lons.min()) - pad_lon
+    n_rows = int(math.ceil((float(graph.lats.max()) + pad_lat - lat0) / dlat))
+    n_cols = int(math.ceil((float(graph.lons.max()) + pad_lon - lon0) / dlon))
+
+    rr, cc = np.meshgrid(np.arange(n_rows), np.arange(n_cols), indexing="ij")
+    cell_lats = lat0 + (rr.ravel() + 0.5) * dlat
+    cell_lons = lon0 + (cc.ravel() + 0.5) * dlon
+
+    origin_lats = np.concatenate([place_lats, cell_lats])
+    origin_lons = np.concatenate([place_lons, cell_lons])
+    origin_nodes, origin_snap = zip(*(graph.snap(o) for o in zip(origin_lats, origin_lons)))
+    origin_nodes = np.asarray(origin_nodes, dtype=np.int64)
+    origin_snap = np.asarray(origin_snap, dtype=np.float64)
+
+    matrix = origin_snap[:, None] + to_place[:, origin_nodes].T + place_snap[None, :]
+    # a POI to itself is zero, not a round trip to its snapped node
+    n_places = len(places)
+    matrix[np.arange(n_places), np.arange(n_places)] = 0.0
+
+    meta = {
+        "place_ids": [int(i) for i in places["id"]],
+        "grid": {"lat0": lat0, "lon0": lon0, "dlat": dlat, "dlon": dlon,
+                 "rows": n_rows, "cols": n_cols},
+    }
+    return matrix.astype(np.float32), meta
+
+
+def save_walk_matrix(matrix, meta, path=MATRIX_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, matrix)
+    path.with_suffix(".json").write_text(json.dumps(meta))
+
+
+class WalkMatrix:
+    """Memory-mapped walking-distance lookups (km / minutes)."""
+
+    def __init__(self, matrix, meta):
+        self.matrix = matrix
+        self.place_ids = meta["place_ids"]
+        self.column = {pid: i for i, pid in enumerate(self.place_ids)}
+        self.grid = meta["grid"]
+
+    @classmethod
+    def load(cls, path=MATRIX_FILE):
+        path = Path(path)
+        meta = json.loads(path.with_suffix(".json").read_text())
+        return cls(np.load(path, mmap_mode="r"), meta)
+
+    def _origin_row(self, origin):
+        g = self.grid
+        r = math.floor((origin[0] - g["lat0"]) / g["dlat"])
+        c = math.floor((origin[1] - g["lon0"]) / g["dlon"])
+        if 0 <= r < g["rows"] and 0 <= c < g["cols"]:
+            return len(self.place_ids) + r * g["cols"] + c
+        return None
+
+    def from_origin(self, origin, place_ids=None):
+        """
+        Walking km from origin (lat, lon) to each place (all, or place_ids order).
+        None when the origin is outside the precomputed campus grid.
+        """
+        row = self._origin_row(origin)
+        if row is None:
+            return None
+        dist = self.matrix[row]
+        if place_ids is None:
+            return np.asarray(dist)
+        cols = np.array([self.column.get(int(p), -1) for p in place_ids], dtype=np.int64)
+        out = np.where(cols >= 0, dist[np.maximum(cols, 0)], np.nan)
+        return out.astype(np.float64)
+
+    def between(self, place_a, place_b):
+        """Walking km between two places by id."""
+        return float(self.matrix[self.column[place_a], self.column[place_b]])
+
+    @staticmethod
+    def minutes(km):
+        return np.asarray(km) / WALK_KMH * 60
+
+
+def load_or_build(places, graph, sources, path=MATRIX_FILE):
+    """Load the matrix, rebuilding it first if any source file is newer."""
+    path = Path(path)
+    newest = max(Path(s).stat().st_mtime for s in sources)
+    if path.exists() and path.stat().st_mtime >= newest:
+        walk = WalkMatrix.load(path)
+        if walk.place_ids == [int(i) for i in places["id"]]:
+            return walk
+    save_walk_matrix(*build_walk_matrix(places, graph), path=path)
+    return WalkMatrix.load(path)
+
+
+@cached()
+def _shared_matrix(places_version, walk_version):
+    return load_or_build(load_places_shared(places_version[0]), WalkGraph.from_file(walk_version[0]),
+                         sources=[places_version[0], walk_version[0]])
+
+
+def load_walk_matrix(places_path=PLACES_FILE, walk_path=WALKWAYS_FILE):
+    """Matrix shared by every session and page (rebuilt if places/walkways changed)."""
+    return _shared_matrix(file_version(places_path), file_version(walk_path))
+
+
+if __name__ == "__main__":
+    from utils.places import load_places
+
+    places = load_places(PLACES_FILE)
+    graph = WalkGraph.from_file(WALKWAYS_FILE)
+    matrix, meta = build_walk_matrix(places, graph)
+    save_walk_matrix(matrix, meta)
+    print(f"walk matrix {matrix.shape} -> {MATRIX_FILE}")